@@ -0,0 +1,83 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import absolute_import
+
+import os
+import sys
+import unittest
+
+# utils/jenkins is not a package
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '..', 'utils', 'jenkins'))
+
+import fuel_logs  # noqa
+
+ASTUTE_LOG = (
+    '2016-03-01T10:11:12 info: [123] Run task "netconfig" on node-2\n'
+    '2016-03-01T10:11:13 debug: [123] Data received by '
+    'DeploymentProxyReporter: {"nodes"=>[{"uid"=>"3", "status"=>"ready"}]}\n'
+    '2016-03-01T10:11:14 err: [123] Node 4: task "netconfig" failed\n'
+)
+
+
+class TestLogIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = fuel_logs.LogIndex(':memory:')
+        self.index.open()
+        self.addCleanup(self.index.close)
+        self.index.connection.execute(
+            "INSERT INTO snapshots (id, path, size, mtime) "
+            "VALUES (1, 'fail_error_snapshot.tar.gz', 0, 0)")
+        self.index.insert_records(
+            1, 'astute', 'astute.log',
+            self.index.astute_records(ASTUTE_LOG))
+        if self.index.fts:
+            self.index.connection.execute(
+                'INSERT INTO records_fts (rowid, line) '
+                'SELECT id, line FROM records')
+
+    def test_astute_nodes(self):
+        self.assertEqual(
+            [record['node'] for record in self.index.query()],
+            ['node-2', 'node-3', 'node-4'])
+
+    def test_query_node(self):
+        for node in ('node-2', '2', 'node-2.test.domain.local'):
+            self.assertEqual(
+                [record['time'] for record in self.index.query(node=node)],
+                ['2016-03-01T10:11:12.000000'])
+
+    def test_query_match(self):
+        self.assertEqual(
+            [record['node'] for record in self.index.query(match='node-2')],
+            ['node-2'])
+        self.assertEqual(
+            list(self.index.query(match='"nodes" AND OR')), [])
+
+    def test_normalize_node(self):
+        self.assertEqual(fuel_logs.LogIndex.normalize_node('5'), 'node-5')
+        self.assertEqual(
+            fuel_logs.LogIndex.normalize_node('node-5.test.domain.local'),
+            'node-5')
+        self.assertEqual(fuel_logs.LogIndex.normalize_node('10.20.0.3'),
+                         '10.20.0.3')
+
+    def test_normalize_time(self):
+        for time in ('2016-03-01T10:11:12+00:00', '2016-03-01 10:11:12Z',
+                     '2016-03-01T10:11:12.000-0500'):
+            self.assertEqual(fuel_logs.LogIndex.normalize_time(time),
+                             '2016-03-01T10:11:12.000000')
+        self.assertIsNone(fuel_logs.LogIndex.normalize_time('garbage'))
@@ -211,6 +211,82 @@ class TestLogWrap(unittest.TestCase):
             ),
         ))
 
+    def test_disabled_level(self, logger):
+        logger.isEnabledFor.return_value = False
+
+        @log_helpers.logwrap
+        def func(tst):
+            return tst
+
+        with mock.patch(
+                'core.helpers.log_helpers.pretty_repr',
+                autospec=True) as pretty_repr:
+            result = func('test arg')
+
+        self.assertEqual(result, 'test arg')
+        pretty_repr.assert_not_called()
+        logger.log.assert_not_called()
+
+    def test_logger_level(self, logger):
+        log = logging.getLogger('core.logwrap.test_logger_level')
+        self.addCleanup(log.setLevel, log.level)
+
+        @log_helpers.logwrap(log=log)
+        def func(tst):
+            return tst
+
+        with mock.patch(
+                'core.helpers.log_helpers.pretty_repr',
+                autospec=True, return_value='') as pretty_repr:
+            log.setLevel(logging.INFO)
+            func(['test', 'arg'])
+            pretty_repr.assert_not_called()
+
+            log.setLevel(logging.DEBUG)
+            func(['test', 'arg'])
+            pretty_repr.assert_called_with(['test', 'arg'])
+
+    def test_negative_disabled_level(self, logger):
+        logger.isEnabledFor.side_effect = lambda level: level >= logging.ERROR
+
+        @log_helpers.logwrap
+        def func():
+            raise ValueError('as expected')
+
+        with self.assertRaises(ValueError):
+            func()
+
+        logger.log.assert_called_once_with(
+            level=logging.ERROR,
+            msg="Failed: \n'func'()",
+            exc_info=True
+        )
+
+    def test_max_len(self, logger):
+        arg = 'x' * 100
+
+        @log_helpers.logwrap(log=logger, max_len=20)
+        def func(tst):
+            return tst
+
+        result = func(arg)
+        self.assertEqual(result, arg)
+        logger.assert_has_calls((
+            mock.call.log(
+                level=logging.DEBUG,
+                msg="Calling: \n'func'(\n    'tst'={},\n)".format(
+                    log_helpers.pretty_repr(
+                        arg, indent=8, no_indent_start=True)[:20] +
+                    '\n... (87 more characters truncated)')
+            ),
+            mock.call.log(
+                level=logging.DEBUG,
+                msg="Done: 'func' with result:\n{}".format(
+                    log_helpers.pretty_repr(result)[:20] +
+                    '\n... (87 more characters truncated)')
+            ),
+        ))
+
 
 @patch('logging.StreamHandler')
 @patch('core.helpers.log_helpers.logger', autospec=True)
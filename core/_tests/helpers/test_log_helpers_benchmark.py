@@ -0,0 +1,101 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+import timeit
+import unittest
+import warnings
+
+from core.helpers import log_helpers
+
+
+def _make_nodes(count=30):
+    """Data, which looks like nailgun nodes list"""
+    return [
+        {
+            'id': node_id,
+            'name': 'slave-{:02d}'.format(node_id),
+            'status': 'ready',
+            'online': True,
+            'roles': ['controller', 'cinder'],
+            'meta': {
+                'interfaces': [
+                    {'name': 'eth{}'.format(i),
+                     'mac': '64:{:02x}:00:00:00:{:02x}'.format(node_id, i)}
+                    for i in range(6)],
+                'disks': [{'name': 'vd{}'.format(d), 'size': 53687091200}
+                          for d in 'abc'],
+            },
+        }
+        for node_id in range(count)]
+
+
+class TestLogWrapOverhead(unittest.TestCase):
+    """Measure logwrap overhead per call for big results
+
+    Numbers are only reported: timing depends on the load of test node.
+    """
+
+    calls = 20
+
+    def setUp(self):
+        self.nodes = _make_nodes()
+        self.log = logging.getLogger('core.logwrap.benchmark')
+        self.log.propagate = False
+        self.log.addHandler(logging.NullHandler())
+        self.addCleanup(self.log.setLevel, self.log.level)
+
+    def _per_call(self, func):
+        return timeit.timeit(
+            lambda: func(self.nodes), number=self.calls) / self.calls
+
+    def _wrapped(self, **kwargs):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+
+            @log_helpers.logwrap(log=self.log, **kwargs)
+            def func(nodes):
+                return nodes
+
+        return func
+
+    def test_overhead(self):
+        def func(nodes):
+            return nodes
+
+        bare = self._per_call(func)
+
+        self.log.setLevel(logging.DEBUG)
+        enabled = self._per_call(self._wrapped())
+        truncated = self._per_call(self._wrapped(max_len=1024))
+
+        self.log.setLevel(logging.INFO)
+        disabled = self._per_call(self._wrapped())
+
+        print(
+            '\nlogwrap overhead per call, {count} nodes:'
+            '\n\tno logwrap:       {bare:.6f}s'
+            '\n\tDEBUG enabled:    {enabled:.6f}s'
+            '\n\tmax_len=1024:     {truncated:.6f}s'
+            '\n\tDEBUG disabled:   {disabled:.6f}s'.format(
+                count=len(self.nodes),
+                bare=bare,
+                enabled=enabled,
+                truncated=truncated,
+                disabled=disabled))
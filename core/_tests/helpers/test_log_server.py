@@ -0,0 +1,129 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import absolute_import
+
+import socket
+import time
+import unittest
+
+from fuelweb_test.helpers import log_server
+
+
+class TestParseSyslog(unittest.TestCase):
+    def test_bsd_header(self):
+        self.assertEqual(
+            log_server.parse_syslog(
+                b'<14>Oct 18 04:35:00 node-1 nova-api: started'),
+            (1, 6, 'node-1'))
+
+    def test_iso_header(self):
+        self.assertEqual(
+            log_server.parse_syslog(
+                b'<131>2016-10-18T04:35:00.123+00:00 node-2: error'),
+            (16, 3, 'node-2'))
+
+    def test_no_timestamp(self):
+        self.assertEqual(log_server.parse_syslog(b'<30>node-3 message'),
+                         (3, 6, 'node-3'))
+
+    def test_not_syslog(self):
+        self.assertEqual(log_server.parse_syslog(b'plain text'),
+                         (None, None, None))
+
+
+class TestLogFilter(unittest.TestCase):
+    message = b'<14>Oct 18 04:35:00 node-1 nova-api: started'
+
+    def test_empty(self):
+        self.assertTrue(log_server.LogFilter()(self.message))
+
+    def test_facility(self):
+        self.assertTrue(log_server.LogFilter(facilities=[1, 2])(self.message))
+        self.assertFalse(log_server.LogFilter(facilities=[16])(self.message))
+
+    def test_host(self):
+        self.assertTrue(log_server.LogFilter(hosts=['node-1'])(self.message))
+        self.assertFalse(log_server.LogFilter(hosts=['node-2'])(self.message))
+
+    def test_regex(self):
+        self.assertTrue(log_server.LogFilter(regex='nova')(self.message))
+        self.assertFalse(log_server.LogFilter(regex='^nova')(self.message))
+
+    def test_all_conditions(self):
+        self.assertFalse(log_server.LogFilter(
+            facilities=[1], hosts=['node-1'], regex='neutron')(self.message))
+
+
+class TestLogServer(unittest.TestCase):
+    def _serve(self, protocol, send, count, **kwargs):
+        """Start server, send data by send(address) and get messages"""
+        messages = []
+        server = log_server.LogServer(port=0, protocol=protocol, **kwargs)
+        server.set_handler(messages.append)
+        server.start()
+        try:
+            send(server.socket.getsockname())
+            deadline = time.time() + 10
+            while len(messages) < count and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            server.stop()
+            server.join(5)
+        return messages, server.stats
+
+    @staticmethod
+    def _send_tcp(*chunks):
+        def send(address):
+            conn = socket.create_connection(address)
+            for chunk in chunks:
+                conn.sendall(chunk)
+                time.sleep(0.05)
+            conn.close()
+        return send
+
+    def test_udp(self):
+        def send(address):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.sendto(b'<14>node-1 first', address)
+            sock.sendto(b'<14>node-2 second', address)
+            sock.close()
+
+        messages, stats = self._serve(
+            'udp', send, 1, filters=[log_server.LogFilter(hosts=['node-2'])])
+        self.assertEqual(messages, [b'<14>node-2 second'])
+        self.assertEqual(stats['received'], 2)
+        self.assertEqual(stats['filtered'], 1)
+        self.assertEqual(stats['truncated'], 0)
+
+    def test_tcp_newline_framing(self):
+        messages, stats = self._serve('tcp', self._send_tcp(
+            b'<14>node-1 first\r\n<14>node-1 sec', b'ond\n<14>node-1 last'),
+            3)
+        self.assertEqual(messages, [b'<14>node-1 first',
+                                    b'<14>node-1 second',
+                                    b'<14>node-1 last'])
+        self.assertEqual(stats['handled'], 3)
+
+    def test_tcp_octet_counting(self):
+        messages, _ = self._serve('tcp', self._send_tcp(
+            b'12 <14>node-1 a\n13 <14>node-1', b' bc'), 2)
+        self.assertEqual(messages, [b'<14>node-1 a', b'<14>node-1 bc'])
+
+    def test_tcp_truncated(self):
+        size = log_server.MAX_MESSAGE_SIZE
+        messages, stats = self._serve('tcp', self._send_tcp(
+            b'x' * (size + 10), b'\n<14>node-1 next\n'), 2)
+        self.assertEqual(messages, [b'x' * size, b'<14>node-1 next'])
+        self.assertEqual(stats['truncated'], 1)
@@ -178,12 +178,38 @@ def pretty_repr(src, indent=0, no_indent_start=False, max_indent=20):
     )
 
 
-def logwrap(log=logger, log_level=logging.DEBUG, exc_level=logging.ERROR):
+def _truncate(text, max_len=None):
+    """Cut too long text and mark the cut
+
+    :type text: str
+    :param max_len: maximal length of text, None - do not cut
+    :type max_len: int
+    :rtype: str
+
+    >>> print(_truncate('0123456789', max_len=4))
+    0123
+    ... (6 more characters truncated)
+    """
+    if max_len is None or len(text) <= max_len:
+        return text
+    return '{text}\n... ({count} more characters truncated)'.format(
+        text=text[:max_len],
+        count=len(text) - max_len
+    )
+
+
+def logwrap(log=logger, log_level=logging.DEBUG, exc_level=logging.ERROR,
+            max_len=None):
     """Log function calls
 
+    Arguments and result are formatted only if logger is enabled for
+    the corresponding level, so disabled logging costs almost nothing.
+
     :type log: logging.Logger
     :type log_level: int
     :type exc_level: int
+    :param max_len: maximal length of arguments and result representation
+    :type max_len: int
     :rtype: callable
     """
     warnings.warn(
@@ -192,42 +218,57 @@ def logwrap(log=logger, log_level=logging.DEBUG, exc_level=logging.ERROR):
         DeprecationWarning)
 
     def real_decorator(func):
-        @functools.wraps(func)
-        def wrapped(*args, **kwargs):
+        def format_args(*args, **kwargs):
             call_args = _getcallargs(func, *args, **kwargs)
-            args_repr = ""
-            if len(call_args) > 0:
-                args_repr = "\n    " + "\n    ".join((
-                    "{key!r}={val},".format(
-                        key=key,
-                        val=pretty_repr(val, indent=8, no_indent_start=True)
-                    )
-                    for key, val in call_args.items())
-                ) + '\n'
-            log.log(
-                level=log_level,
-                msg="Calling: \n{name!r}({arguments})".format(
-                    name=func.__name__,
-                    arguments=args_repr
+            if len(call_args) == 0:
+                return ""
+            return "\n    " + "\n    ".join((
+                "{key!r}={val},".format(
+                    key=key,
+                    val=_truncate(
+                        pretty_repr(val, indent=8, no_indent_start=True),
+                        max_len=max_len)
                 )
-            )
-            try:
-                result = func(*args, **kwargs)
+                for key, val in call_args.items())
+            ) + '\n'
+
+        @functools.wraps(func)
+        def wrapped(*args, **kwargs):
+            # Check levels once: formatting of big objects is expensive
+            enabled = bool(log.isEnabledFor(log_level))
+            exc_enabled = bool(log.isEnabledFor(exc_level))
+            args_repr = None
+            if enabled:
+                args_repr = format_args(*args, **kwargs)
                 log.log(
                     level=log_level,
-                    msg="Done: {name!r} with result:\n{result}".format(
+                    msg="Calling: \n{name!r}({arguments})".format(
                         name=func.__name__,
-                        result=pretty_repr(result))
+                        arguments=args_repr
+                    )
                 )
+            try:
+                result = func(*args, **kwargs)
+                if enabled:
+                    log.log(
+                        level=log_level,
+                        msg="Done: {name!r} with result:\n{result}".format(
+                            name=func.__name__,
+                            result=_truncate(pretty_repr(result),
+                                             max_len=max_len))
+                    )
             except BaseException:
-                log.log(
-                    level=exc_level,
-                    msg="Failed: \n{name!r}({arguments})".format(
-                        name=func.__name__,
-                        arguments=args_repr,
-                    ),
-                    exc_info=True
-                )
+                if exc_enabled:
+                    if args_repr is None:
+                        args_repr = format_args(*args, **kwargs)
+                    log.log(
+                        level=exc_level,
+                        msg="Failed: \n{name!r}({arguments})".format(
+                            name=func.__name__,
+                            arguments=args_repr,
+                        ),
+                        exc_info=True
+                    )
                 raise
             return result
         return wrapped
@@ -30,6 +30,7 @@ from proboscis.asserts import assert_equal
 from proboscis.asserts import assert_true
 
 from keystoneauth1 import exceptions
+from six.moves import shlex_quote
 # pylint: disable=redefined-builtin
 # noinspection PyUnresolvedReferences
 from six.moves import xrange
@@ -1165,58 +1166,99 @@ def check_haproxy_backend(ip,
     return result
 
 
+def _grep_pattern_to_re(pattern):
+    """Convert grep basic regular expression to python regular expression
+
+    :param pattern: str, grep BRE
+    :rtype: str
+    """
+    result = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == '\\':
+            escaped = next(chars, '\\')
+            if escaped in '+?|(){}':
+                result.append(escaped)
+            else:
+                result.append('\\' + escaped)
+        elif char == '[':
+            # bracket expression is copied as is, ']' is literal first
+            bracket = char
+            for char in chars:
+                bracket += char
+                if char == ']' and bracket not in ('[]', '[^]'):
+                    break
+            result.append(bracket)
+        elif char in '+?|(){}':
+            result.append(re.escape(char))
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
 def check_log_lines_order(ip, log_file_path, line_matcher):
     """Read log file and check that lines order are same as strings in list
 
+    Log file is read once: all lines matching any of patterns are found by
+    single grep, then every pattern should match exactly one of these lines
+    after the line matched by previous pattern.
+
     :param ip: ip of node in str format
     :param log_file_path: path to log file
-    :param line_matcher: list of strings to search
+    :param line_matcher: list of strings (grep patterns) to search
+    :return: list of numbers of matched lines
     """
     check_file_exists(ip, path=log_file_path)
 
-    previous_line_pos = 1
+    cmd = 'grep -n {0} -- {1}'.format(
+        ' '.join('-e {0}'.format(shlex_quote(line)) for line in line_matcher),
+        shlex_quote(log_file_path))
+    result = ssh_manager.check_call(ip=ip, command=cmd, expected=[0, 1])
+    found = []
+    for line in result['stdout']:
+        num, _, text = line.partition(':')
+        found.append((int(num), text))
+
+    positions = []
+    previous_line_pos = 0
     previous_line = None
     for current_line in line_matcher:
-        cmd = 'tail -n +{0} {1} | grep -n "{2}"'\
-            .format(previous_line_pos, log_file_path, current_line)
-
-        result = ssh_manager.execute_on_remote(
-            ip=ip,
-            cmd=cmd,
-            err_msg="Line '{0}' not found after line '{1}' in the file "
-                    "'{2}'.".format(current_line, previous_line, log_file_path)
-
-        )
+        regex = re.compile(_grep_pattern_to_re(current_line))
+        matched = ['{0}:{1}'.format(num, text) for num, text in found
+                   if num > previous_line_pos and regex.search(text)]
+        assert_true(
+            matched,
+            "Line '{0}' not found after line '{1}' in the file "
+            "'{2}'.".format(current_line, previous_line, log_file_path))
 
         # few lines found case
         assert_equal(1,
-                     len(result['stdout']),
+                     len(matched),
                      "Found {0} lines like {1} but should be only 1 in {2}"
                      " Command '{3}' executed with exit_code='{4}'\n"
                      "stdout:\n* {5} *\n"
                      "stderr:\n'* {6} *\n"
-                     .format(len(result['stdout']),
+                     .format(len(matched),
                              current_line,
                              log_file_path,
                              cmd,
                              result['exit_code'],
-                             '\n'.join(result['stdout']),
+                             '\n'.join(matched),
                              '\n'.join(result['stderr'])))
 
-        current_line_pos = int(result['stdout'][0].split(':')[0])
-
-        previous_line_pos += current_line_pos
+        previous_line_pos = int(matched[0].split(':')[0])
         previous_line = current_line
+        positions.append(previous_line_pos)
+    return positions
 
 
 def check_hiera_hosts(nodes, cmd):
     hiera_hosts = []
+    results = ssh_manager.check_call_many(
+        ips=[node['ip'] for node in nodes],
+        command=cmd)
     for node in nodes:
-        result = ssh_manager.execute_on_remote(
-            ip=node['ip'],
-            cmd=cmd
-        )['stdout_str']
-        hosts = result.split(',')
+        hosts = results[node['ip']].stdout_str.split(',')
         logger.debug("hosts on {0} are {1}".format(node['hostname'], hosts))
 
         if not hiera_hosts:
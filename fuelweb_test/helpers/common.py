@@ -13,6 +13,7 @@
 #    under the License.
 
 import sys
+import threading
 import time
 import traceback
 
@@ -27,6 +28,8 @@ from keystoneclient.v2_0 import Client as KeystoneClient
 from novaclient.client import Client as NovaClient
 from neutronclient.v2_0.client import Client as NeutronClient
 from proboscis.asserts import assert_equal
+import requests
+from requests.adapters import HTTPAdapter
 import six
 # pylint: disable=redefined-builtin
 # noinspection PyUnresolvedReferences
@@ -43,10 +46,29 @@ from fuelweb_test.helpers import checkers
 from fuelweb_test.helpers.ssh_manager import SSHManager
 from fuelweb_test import logger
 from fuelweb_test.settings import DISABLE_SSL
+from fuelweb_test.settings import KEYSTONE_SESSION_POOL_SIZE
+from fuelweb_test.settings import KEYSTONE_SESSIONS_CACHE
 from fuelweb_test.settings import PATH_TO_CERT
 from fuelweb_test.settings import VERIFY_SSL
 
 
+# Keystone sessions shared by Common instances:
+# {(controller_ip, auth_url, user, password, tenant): (auth, session)}
+_keystone_sessions = {}
+_keystone_sessions_lock = threading.Lock()
+
+
+def drop_keystone_sessions(controller_ip=None):
+    """Drop cached keystone sessions of controller or all of them
+
+    :param controller_ip: str, drop all sessions if None
+    """
+    with _keystone_sessions_lock:
+        for key in list(_keystone_sessions):
+            if controller_ip is None or key[0] == controller_ip:
+                del _keystone_sessions[key]
+
+
 class Common(object):
     """Common."""  # TODO documentation
 
@@ -72,13 +94,68 @@ class Common(object):
 
         logger.debug('Auth URL is {0}'.format(auth_url))
 
+        session_key = (controller_ip, auth_url, user, password, tenant)
+        if self.__reuse_keystone_session(session_key):
+            return
+
         self.__keystone_auth = V2Password(
             auth_url=auth_url,
             username=user,
             password=password,
             tenant_name=tenant)  # TODO: in v3 project_name
 
-        self.__start_keystone_session(ca_cert=path_to_cert, insecure=insecure)
+        try:
+            self.__start_keystone_session(ca_cert=path_to_cert,
+                                          insecure=insecure)
+        except ClientException:
+            # session stored by another instance meanwhile is not valid too
+            with _keystone_sessions_lock:
+                _keystone_sessions.pop(session_key, None)
+            raise
+
+        if KEYSTONE_SESSIONS_CACHE:
+            with _keystone_sessions_lock:
+                _keystone_sessions[session_key] = (self.__keystone_auth,
+                                                   self.keystone_session)
+
+    def __reuse_keystone_session(self, session_key):
+        """Use cached keystone session with still valid token
+
+        Token is issued again by the cached auth plugin only if it is
+        expired, session which fails to authenticate is dropped.
+
+        :return: bool, True if cached session is used
+        """
+        if not KEYSTONE_SESSIONS_CACHE:
+            return False
+        with _keystone_sessions_lock:
+            cached = _keystone_sessions.get(session_key)
+        if cached is None:
+            return False
+        auth, session = cached
+        try:
+            session.get_auth_headers()
+        except ClientException as exc:
+            logger.warning('Cached keystone session of {0} failed to '
+                           'authenticate: {1}'.format(self.controller_ip, exc))
+            with _keystone_sessions_lock:
+                if _keystone_sessions.get(session_key) is cached:
+                    del _keystone_sessions[session_key]
+            return False
+        logger.debug('Reuse keystone session of {0}'.format(
+            self.controller_ip))
+        self.__keystone_auth, self.keystone_session = auth, session
+        return True
+
+    @staticmethod
+    def __make_http_session():
+        """Create requests session with connection pool per host"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=KEYSTONE_SESSION_POOL_SIZE,
+                              pool_maxsize=KEYSTONE_SESSION_POOL_SIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
 
     @property
     def keystone(self):
@@ -275,13 +352,16 @@ class Common(object):
             try:
                 if insecure:
                     self.keystone_session = KeystoneSession(
-                        auth=self.__keystone_auth, verify=False)
+                        auth=self.__keystone_auth, verify=False,
+                        session=self.__make_http_session())
                 elif ca_cert:
                     self.keystone_session = KeystoneSession(
-                        auth=self.__keystone_auth, verify=ca_cert)
+                        auth=self.__keystone_auth, verify=ca_cert,
+                        session=self.__make_http_session())
                 else:
                     self.keystone_session = KeystoneSession(
-                        auth=self.__keystone_auth)
+                        auth=self.__keystone_auth,
+                        session=self.__make_http_session())
                 self.keystone_session.get_auth_headers()
                 return
 
@@ -12,27 +12,141 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import errno
+import re
 import select
 import socket
 import threading
 
+from six.moves import queue
+
 from core.helpers.log_helpers import logwrap
 
+from fuelweb_test import logger
+from fuelweb_test.settings import LOG_SERVER_QUEUE_SIZE
+from fuelweb_test.settings import LOG_SERVER_RCVBUF
+
+# Max size of message: UDP datagram can't be longer, longer TCP messages
+# without framing are truncated
+MAX_MESSAGE_SIZE = 65535
+
+# Count of datagrams read from socket per one select wakeup
+BATCH_SIZE = 1000
+
+SYSLOG_RE = re.compile(
+    br'^<(?P<pri>\d{1,3})>'
+    br'(?:(?:\w{3} [ \d]\d \d\d:\d\d:\d\d|\d{4}-\d\d-\d\dT\S+) )?'
+    br'(?P<host>[^\s:]+)?')
+
+
+def parse_syslog(message):
+    """Get facility, severity and host of syslog message
+
+    :param message: bytes, raw syslog message
+    :return: tuple (facility, severity, host), None for unknown values
+    """
+    match = SYSLOG_RE.match(message)
+    if not match:
+        return None, None, None
+    pri = int(match.group('pri'))
+    host = match.group('host')
+    return pri >> 3, pri & 7, host.decode('utf-8', 'replace') if host else None
+
+
+class LogFilter(object):
+    """Filter of syslog messages by facility, host and regex
+
+    Message passes the filter if it matches all specified conditions.
+    """
+
+    def __init__(self, facilities=None, hosts=None, regex=None):
+        """
+
+        :param facilities: list of int, syslog facility codes
+        :param hosts: list of str, host names from syslog header
+        :param regex: str, pattern to search in message
+        """
+        self.facilities = set(facilities) if facilities else None
+        self.hosts = set(hosts) if hosts else None
+        self.regex = re.compile(regex.encode('utf-8')
+                                if not isinstance(regex, bytes) else regex
+                                ) if regex else None
+
+    def __repr__(self):
+        return '{cls}(facilities={facilities}, hosts={hosts}, ' \
+               'regex={regex})'.format(
+                   cls=self.__class__.__name__,
+                   facilities=self.facilities,
+                   hosts=self.hosts,
+                   regex=self.regex.pattern if self.regex else None)
+
+    def __call__(self, message):
+        if self.facilities or self.hosts:
+            facility, _, host = parse_syslog(message)
+            if self.facilities and facility not in self.facilities:
+                return False
+            if self.hosts and host not in self.hosts:
+                return False
+        if self.regex and not self.regex.search(message):
+            return False
+        return True
+
 
 class LogServer(threading.Thread):
-    """LogServer."""  # TODO documentation
+    """Syslog receiver
 
-    @logwrap
-    def __init__(self, address="localhost", port=5514):
+    Receiver thread drains socket in batches and puts messages to the
+    queue, worker thread passes messages through filters to handlers, so
+    slow handlers don't cause loss of datagrams. UDP (default) and TCP
+    (newline or octet counting framing) syslog are supported.
+    Counters of received, dropped (queue is full), truncated (TCP message
+    without newline is longer than MAX_MESSAGE_SIZE), filtered and handled
+    messages are available in stats.
+    """
+
+    def __init__(self, address="localhost", port=5514, protocol='udp',
+                 rcvbuf=LOG_SERVER_RCVBUF, queue_size=LOG_SERVER_QUEUE_SIZE,
+                 filters=None):
+        """
+
+        :param address: str, address to listen
+        :param port: int, port to listen
+        :param protocol: str, 'udp' or 'tcp'
+        :param rcvbuf: int, SO_RCVBUF of socket, bytes
+        :param queue_size: int, max count of messages waiting for handlers
+        :param filters: list of callables, message is handled only if all
+                        of them return True
+        """
         super(LogServer, self).__init__()
-        self.socket = socket.socket(
-            socket.AF_INET, socket.SOCK_DGRAM
-        )
+        self.daemon = True
+        self.protocol = protocol
+        if protocol == 'udp':
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        elif protocol == 'tcp':
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        else:
+            raise ValueError('Unknown protocol {0!r}'.format(protocol))
+        try:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        except socket.error as e:
+            logger.warning('Failed to set SO_RCVBUF: {0}'.format(e))
         self.socket.bind((str(address), port))
+        if protocol == 'tcp':
+            self.socket.listen(128)
+        self.socket.setblocking(False)
         self.rlist = [self.socket]
-        self._stop = threading.Event()
-        self._handler = self.handler
+        self.__buffers = {}
+        self.filters = list(filters or [])
+        self._stop_event = threading.Event()
+        self._handlers = [self.handler]
         self._status = False
+        self.__queue = queue.Queue(maxsize=queue_size)
+        self.__stats_lock = threading.Lock()
+        self.stats = dict.fromkeys(
+            ('received', 'dropped', 'truncated', 'filtered', 'handled'), 0)
+        self.__worker = threading.Thread(target=self._process)
+        self.__worker.daemon = True
 
     def handler(self, messages):
         pass
@@ -44,37 +158,153 @@ class LogServer(threading.Thread):
         return self._status
 
     def set_handler(self, handler):
-        self._handler = handler
+        self._handlers = [handler]
+
+    def add_handler(self, handler):
+        """Add one more handler of messages to the pipeline"""
+        self._handlers.append(handler)
+
+    def add_filter(self, message_filter):
+        """Handle only messages for which message_filter returns True"""
+        self.filters.append(message_filter)
+
+    def _count(self, name, value=1):
+        with self.__stats_lock:
+            self.stats[name] += value
 
     @logwrap
     def stop(self):
-        self.socket.close()
-        self._stop.set()
+        self._stop_event.set()
+        if not self.is_alive():
+            self._close()
+
+    def _close(self):
+        for sock in self.rlist:
+            sock.close()
+        self.rlist = []
 
     def started(self):
-        return not self._stop.is_set()
+        return not self._stop_event.is_set()
 
     def rude_join(self, timeout=None):
-        self._stop.set()
+        self._stop_event.set()
         super(LogServer, self).join(timeout)
+        if self.__worker.is_alive():
+            self.__worker.join(timeout)
 
     def join(self, timeout=None):
         self.rude_join(timeout)
 
+    def start(self):
+        self.__worker.start()
+        super(LogServer, self).start()
+
+    def _put(self, message, truncated=False):
+        self._count('received')
+        if truncated:
+            self._count('truncated')
+        try:
+            self.__queue.put_nowait(message)
+        except queue.Full:
+            self._count('dropped')
+
+    def _process(self):
+        """Pass queued messages through filters to handlers"""
+        while self.started() or not self.__queue.empty():
+            try:
+                message = self.__queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            if not all(f(message) for f in self.filters):
+                self._count('filtered')
+                continue
+            for handler in self._handlers:
+                try:
+                    handler(message)
+                except Exception:
+                    logger.exception('LogServer handler {0!r} failed'.format(
+                        handler))
+            self._count('handled')
+
+    def _receive_datagrams(self):
+        for _ in range(BATCH_SIZE):
+            try:
+                message, _ = self.socket.recvfrom(MAX_MESSAGE_SIZE)
+            except socket.error as e:
+                if e.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return
+                raise
+            self._put(message)
+
+    def _split_stream(self, conn):
+        """Get complete messages from buffer of TCP connection
+
+        Both octet counting ("<len> <message>") and non-transparent
+        (newline delimited) framing are supported.
+        """
+        data = self.__buffers[conn]
+        while data:
+            head, sep, tail = data.partition(b' ')
+            if sep and head.isdigit():
+                size = int(head)
+                if len(tail) < size:
+                    break
+                message, data = tail[:size], tail[size:]
+            else:
+                message, sep, rest = data.partition(b'\n')
+                if not sep:
+                    if len(data) > MAX_MESSAGE_SIZE:
+                        self._put(data[:MAX_MESSAGE_SIZE], truncated=True)
+                        data = b''
+                    break
+                data = rest
+            message = message.rstrip(b'\r\n')
+            if message:
+                self._put(message)
+        self.__buffers[conn] = data
+
+    def _receive_stream(self, conn):
+        try:
+            data = conn.recv(MAX_MESSAGE_SIZE)
+        except socket.error as e:
+            if e.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return
+            data = b''
+        if data:
+            self.__buffers[conn] += data
+            self._split_stream(conn)
+            return
+        # connection is closed, handle the last message without newline
+        if self.__buffers[conn].strip():
+            self._put(self.__buffers[conn].rstrip(b'\r\n'))
+        del self.__buffers[conn]
+        self.rlist.remove(conn)
+        conn.close()
+
     @logwrap
     def run(self):
-        while self.started():
-            r, _, _ = select.select(self.rlist, [], [], 1)
-            if self.socket in r:
-                message, _ = self.socket.recvfrom(2048)
-                self._handler(message)
+        try:
+            while self.started():
+                r, _, _ = select.select(self.rlist, [], [], 1)
+                for sock in r:
+                    if sock is not self.socket:
+                        self._receive_stream(sock)
+                    elif self.protocol == 'udp':
+                        self._receive_datagrams()
+                    else:
+                        conn, _ = self.socket.accept()
+                        conn.setblocking(False)
+                        self.__buffers[conn] = b''
+                        self.rlist.append(conn)
+        finally:
+            self._close()
 
 
 class TriggeredLogServer(LogServer):
     """TriggeredLogServer."""  # TODO documentation
 
-    def __init__(self, address="localhost", port=5514):
-        super(TriggeredLogServer, self).__init__(address, port)
+    def __init__(self, address="localhost", port=5514, **kwargs):
+        super(TriggeredLogServer, self).__init__(address, port, **kwargs)
         self.set_handler(self.handler)
 
     def handler(self, message):
@@ -0,0 +1,206 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import hashlib
+import io
+import os
+import re
+import sqlite3
+import threading
+import time
+from xml.etree import ElementTree
+import zlib
+
+from six.moves.urllib.error import URLError
+from six.moves.urllib.request import Request
+from six.moves.urllib.request import urlopen
+
+from fuelweb_test import logger
+from fuelweb_test import settings
+
+
+class PackagesIndex(object):
+    """Persistent index of packages available in remote repositories
+
+    Names of packages are stored in sqlite database per repository URL
+    together with checksum of repository metadata (HTTP validators of
+    Packages file of deb repository, repomd.xml of rpm one). Full packages
+    list (Packages, primary.xml.gz) is parsed only if the checksum is
+    changed. If server doesn't send validators of Packages file, it is
+    downloaded and its content is checksummed.
+    """
+
+    def __init__(self, path=settings.PATCHING_PACKAGES_INDEX):
+        """
+
+        :param path: str, path to sqlite database, ':memory:' is allowed
+        """
+        self.path = path
+        if path != ':memory:' and not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        with self.__db:
+            self.__db.execute(
+                'CREATE TABLE IF NOT EXISTS repositories ('
+                'url TEXT PRIMARY KEY, repo_type TEXT, checksum TEXT, '
+                'updated REAL)')
+            self.__db.execute(
+                'CREATE TABLE IF NOT EXISTS packages ('
+                'url TEXT, name TEXT, PRIMARY KEY (url, name))')
+
+    def __repr__(self):
+        return '{cls}(path={path!r})'.format(
+            cls=self.__class__.__name__, path=self.path)
+
+    @staticmethod
+    def _is_deb(repo_type):
+        return repo_type == settings.OPENSTACK_RELEASE_UBUNTU
+
+    @staticmethod
+    def _head_checksum(url):
+        """Checksum of HTTP validators of url, None if there are no ones"""
+        request = Request(url)
+        request.get_method = lambda: 'HEAD'
+        try:
+            headers = urlopen(request).info()
+        except URLError as e:
+            logger.debug('HEAD request of {0} failed: {1}'.format(url, e))
+            return None
+        validators = [headers.get(name) for name in
+                      ('ETag', 'Last-Modified', 'Content-Length')]
+        if not any(validators):
+            return None
+        return hashlib.sha256(
+            '|'.join(str(v) for v in validators).encode()).hexdigest()
+
+    def _get_metadata(self, url, repo_type):
+        """Get checksum of repository metadata and URL of packages list
+
+        :return: tuple (checksum or None, packages list URL)
+        """
+        if self._is_deb(repo_type):
+            # Release file is not always regenerated with Packages one
+            packages_url = '{0}/Packages'.format(url)
+            return self._head_checksum(packages_url), packages_url
+        repomd = urlopen('{0}/repodata/repomd.xml'.format(url)).read()
+        packages_url = '{0}/repodata/primary.xml.gz'.format(url)
+        for data in ElementTree.fromstring(repomd):
+            if data.tag.endswith('}data') and data.get('type') == 'primary':
+                for location in data:
+                    if location.tag.endswith('}location'):
+                        packages_url = '{0}/{1}'.format(
+                            url, location.get('href'))
+        return hashlib.sha256(repomd).hexdigest(), packages_url
+
+    def _parse_packages(self, raw, repo_type):
+        if self._is_deb(repo_type):
+            return set(re.findall(br'^Package: (\S+)\s*$', raw, re.M))
+        primary = zlib.decompressobj(zlib.MAX_WBITS | 32).decompress(raw)
+        names = set()
+        for _, elem in ElementTree.iterparse(io.BytesIO(primary)):
+            if elem.tag.endswith('}name'):
+                names.add(elem.text)
+            elif elem.tag.endswith('}package'):
+                elem.clear()
+        return names
+
+    def update(self, url, repo_type):
+        """Refresh packages of repository if its metadata is changed
+
+        :param url: str, repository URL
+        :param repo_type: str, OPENSTACK_RELEASE_UBUNTU for deb repository
+        :return: bool, True if packages list was changed and parsed
+        """
+        url = url.rstrip('/')
+        checksum, packages_url = self._get_metadata(url, repo_type)
+        with self.__lock:
+            row = self.__db.execute(
+                'SELECT checksum FROM repositories WHERE url = ?',
+                (url,)).fetchone()
+        if checksum is not None and row and row[0] == checksum:
+            logger.debug('Packages index of {0} is up to date'.format(url))
+            return False
+        raw = urlopen(packages_url).read()
+        if checksum is None:
+            checksum = hashlib.sha256(raw).hexdigest()
+            if row and row[0] == checksum:
+                logger.debug('Packages list of {0} is not changed'.format(
+                    url))
+                return False
+        logger.info('Updating packages index of {0}'.format(url))
+        names = [name.decode('utf-8') if isinstance(name, bytes) else name
+                 for name in self._parse_packages(raw, repo_type)]
+        with self.__lock, self.__db:
+            self.__db.execute('DELETE FROM packages WHERE url = ?', (url,))
+            self.__db.executemany(
+                'INSERT INTO packages (url, name) VALUES (?, ?)',
+                [(url, name) for name in names])
+            self.__db.execute(
+                'INSERT OR REPLACE INTO repositories '
+                '(url, repo_type, checksum, updated) VALUES (?, ?, ?, ?)',
+                (url, repo_type, checksum, time.time()))
+        return True
+
+    def get_packages(self, urls, repo_type):
+        """Get names of packages available in repositories
+
+        :param urls: list of repositories URLs
+        :param repo_type: str, OPENSTACK_RELEASE_UBUNTU for deb repositories
+        :rtype: set
+        """
+        urls = [url.rstrip('/') for url in urls]
+        for url in urls:
+            self.update(url, repo_type)
+        if not urls:
+            return set()
+        with self.__lock:
+            return {row[0] for row in self.__db.execute(
+                'SELECT DISTINCT name FROM packages WHERE url IN ({0})'
+                ''.format(', '.join('?' * len(urls))), urls)}
+
+    def get_missing(self, packages, urls):
+        """Get packages which are absent in all indexed repositories
+
+        Repositories should be updated before, e.g. by get_packages().
+
+        :param packages: iterable of package names
+        :param urls: list of repositories URLs
+        :rtype: set
+        """
+        packages = set(packages)
+        urls = [url.rstrip('/') for url in urls]
+        if not packages or not urls:
+            return packages
+        with self.__lock:
+            self.__db.execute('CREATE TEMP TABLE IF NOT EXISTS wanted '
+                              '(name TEXT PRIMARY KEY)')
+            self.__db.execute('DELETE FROM wanted')
+            self.__db.executemany('INSERT INTO wanted (name) VALUES (?)',
+                                  [(name,) for name in packages])
+            return {row[0] for row in self.__db.execute(
+                'SELECT name FROM wanted WHERE name NOT IN '
+                '(SELECT name FROM packages WHERE url IN ({0}))'
+                ''.format(', '.join('?' * len(urls))), urls)}
+
+
+_packages_index = None
+
+
+def get_packages_index():
+    """Get process wide PackagesIndex at PATCHING_PACKAGES_INDEX"""
+    global _packages_index
+    if _packages_index is None:
+        _packages_index = PackagesIndex()
+    return _packages_index
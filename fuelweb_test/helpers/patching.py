@@ -16,8 +16,6 @@ import os
 import re
 import sys
 import traceback
-import zlib
-from xml.dom.minidom import parseString
 
 from proboscis import register
 from proboscis import TestProgram
@@ -27,14 +25,13 @@ from proboscis.asserts import assert_not_equal
 from proboscis.asserts import assert_true
 # pylint: disable=import-error,wrong-import-order
 # noinspection PyUnresolvedReferences
-from six.moves.urllib.request import urlopen
-# noinspection PyUnresolvedReferences
 from six.moves.urllib.parse import urlparse
 # pylint: enable=import-error,wrong-import-order
 import yaml
 
 from fuelweb_test import logger
 from fuelweb_test import settings
+from fuelweb_test.helpers.packages_index import get_packages_index
 from fuelweb_test.helpers.ssh_manager import SSHManager
 
 patching_validation_schema = {
@@ -102,31 +99,31 @@ def map_test(target):
             settings.PATCHING_PKGS = set(
                 [re.split('=|<|>', package)[0] for package
                  in errata['affected-pkgs'][env_distro.lower()]])
-    available_env_packages = set()
-    available_master_packages = set()
-    for repo in settings.PATCHING_MIRRORS:
-        logger.debug(
-            'Checking packages from "{0}" repository'.format(repo))
-        available_env_packages.update(get_repository_packages(repo,
-                                                              env_distro))
-    for repo in settings.PATCHING_MASTER_MIRRORS:
-        logger.debug(
-            'Checking packages from "{0}" repository'.format(repo))
-        available_master_packages.update(get_repository_packages(
-            repo, master_distro))
-    available_packages = available_env_packages | available_master_packages
+    packages_index = get_packages_index()
+    logger.debug('Checking packages from "{0}" repositories'.format(
+        settings.PATCHING_MIRRORS))
+    available_env_packages = packages_index.get_packages(
+        settings.PATCHING_MIRRORS, env_distro)
+    logger.debug('Checking packages from "{0}" repositories'.format(
+        settings.PATCHING_MASTER_MIRRORS))
+    available_master_packages = packages_index.get_packages(
+        settings.PATCHING_MASTER_MIRRORS, master_distro)
     if not settings.PATCHING_PKGS:
         if target == 'master':
             settings.PATCHING_PKGS = available_master_packages
         else:
             settings.PATCHING_PKGS = available_env_packages
     else:
-        assert_true(settings.PATCHING_PKGS <= available_packages,
+        missed_packages = packages_index.get_missing(
+            settings.PATCHING_PKGS,
+            settings.PATCHING_MIRRORS + settings.PATCHING_MASTER_MIRRORS)
+        assert_true(not missed_packages,
                     "Patching repositories don't contain all packages need"
                     "ed for tests. Need: {0}, available: {1}, missed: {2}."
                     "".format(settings.PATCHING_PKGS,
-                              available_packages,
-                              settings.PATCHING_PKGS - available_packages))
+                              available_env_packages |
+                              available_master_packages,
+                              missed_packages))
     assert_not_equal(len(settings.PATCHING_PKGS), 0,
                      "No packages found in repository(s) for patching:"
                      " '{0} {1}'".format(settings.PATCHING_MIRRORS,
@@ -176,23 +173,13 @@ def map_test(target):
 
 
 def get_repository_packages(remote_repo_url, repo_type):
-    repo_url = urlparse(remote_repo_url)
-    packages = []
-    if repo_type == settings.OPENSTACK_RELEASE_UBUNTU:
-        packages_url = '{0}/Packages'.format(repo_url.geturl())
-        pkgs_raw = urlopen(packages_url).read()
-        for pkg in pkgs_raw.split('\n'):
-            match = re.search(r'^Package: (\S+)\s*$', pkg)
-            if match:
-                packages.append(match.group(1))
-    else:
-        packages_url = '{0}/repodata/primary.xml.gz'.format(repo_url.geturl())
-        pkgs_xml = parseString(zlib.decompressobj(zlib.MAX_WBITS | 32).
-                               decompress(urlopen(packages_url).read()))
-        for pkg in pkgs_xml.getElementsByTagName('package'):
-            packages.append(
-                pkg.getElementsByTagName('name')[0].firstChild.nodeValue)
-    return packages
+    """Get names of packages available in repository
+
+    Packages list is taken from persistent packages index, which is
+    refreshed only if repository metadata is changed.
+    """
+    return sorted(get_packages_index().get_packages([remote_repo_url],
+                                                    repo_type))
 
 
 def _get_target_and_project(_pkg, _all_pkgs):
@@ -202,11 +189,23 @@ def _get_target_and_project(_pkg, _all_pkgs):
                 return _installation_target, _project['name']
 
 
+_yaml_cache = {}
+
+
+def _load_yaml(path):
+    """Load yaml file once per modification of the file"""
+    key = (path, os.path.getmtime(path))
+    if key not in _yaml_cache:
+        with open(path) as f:
+            _yaml_cache[key] = yaml.load(f.read())
+    return _yaml_cache[key]
+
+
 def get_package_test_info(package, pkg_type, tests_path, patch_target):
     packages_path = "{0}/{1}/packages.yaml".format(tests_path, pkg_type)
     tests = set()
     tests_file = 'test.yaml'
-    all_packages = yaml.load(open(packages_path).read())
+    all_packages = _load_yaml(packages_path)
     assert_is_not_none(_get_target_and_project(package, all_packages),
                        "Package '{0}' doesn't belong to any installation "
                        "target / project".format(package))
@@ -224,10 +223,10 @@ def get_package_test_info(package, pkg_type, tests_path, patch_target):
                                    package, tests_file))
     for path in (target_tests_path, project_tests_path, package_tests_path):
         try:
-            test = yaml.load(open(path).read())
+            test = _load_yaml(path)
             if 'system_tests' in test.keys():
                 tests.update(test['system_tests']['tags'])
-        except IOError as e:
+        except (IOError, OSError) as e:
             logger.warning('Ignoring exception: {!r}'.format(e))
             logger.debug(traceback.format_exc())
     return tests
@@ -12,9 +12,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from multiprocessing.pool import ThreadPool
 import os
 import posixpath
 import re
+import threading
+import time
 import traceback
 from warnings import warn
 
@@ -26,10 +29,38 @@ from paramiko import SSHException
 import six
 
 from fuelweb_test import logger
+from fuelweb_test.settings import SSH_CONNECTION_CHECK_INTERVAL
 from fuelweb_test.settings import SSH_FUEL_CREDENTIALS
+from fuelweb_test.settings import SSH_KEEPALIVE_INTERVAL
+from fuelweb_test.settings import SSH_PARALLEL_WORKERS
 from fuelweb_test.settings import SSH_SLAVE_CREDENTIALS
 
 
+class MultipleExecutionError(Exception):
+    """Command failed on one or more hosts during parallel execution"""
+
+    def __init__(self, command, errors, results):
+        """
+
+        :type command: str
+        :param errors: exceptions raised for failed hosts
+        :type errors: dict
+        :param results: ExecResult objects of succeeded hosts
+        :type results: dict
+        """
+        self.command = command
+        self.errors = errors
+        self.results = results
+        message = 'Command {cmd!r} failed on {count} of {total} hosts:\n'\
+            .format(cmd=command,
+                    count=len(errors),
+                    total=len(errors) + len(results))
+        message += '\n'.join(
+            '\t{ip}: {err!s}'.format(ip=ip, err=err)
+            for ip, err in sorted(errors.items()))
+        super(MultipleExecutionError, self).__init__(message)
+
+
 class SSHManager(six.with_metaclass(SingletonMeta, object)):
 
     def __init__(self):
@@ -42,11 +73,50 @@ class SSHManager(six.with_metaclass(SingletonMeta, object)):
         self.slave_login = None
         self.slave_fallback_login = 'root'
         self.__slave_password = None
+        self.__lock = threading.RLock()
+        self.__verified = {}  # last successful check time of connections
 
     @property
     def connections(self):
         return self.__connections
 
+    @staticmethod
+    def _get_transport(remote):
+        """Get paramiko transport of connection, if it is opened
+
+        :type remote: SSHClient
+        :rtype: paramiko.Transport
+        """
+        # pylint: disable=protected-access
+        ssh = getattr(remote, '_ssh', None)
+        # pylint: enable=protected-access
+        if ssh is None:
+            return None
+        return ssh.get_transport()
+
+    def _is_verified(self, remote):
+        """Check connection liveness without command execution
+
+        Connection is considered alive, if its transport is active and
+        the command check was passed less than
+        SSH_CONNECTION_CHECK_INTERVAL seconds ago.
+
+        :type remote: SSHClient
+        :rtype: bool
+        """
+        transport = self._get_transport(remote)
+        if transport is None or not transport.is_active():
+            return False
+        verified = self.__verified.get((remote.hostname, remote.port))
+        return (verified is not None and
+                time.time() - verified < SSH_CONNECTION_CHECK_INTERVAL)
+
+    def _set_verified(self, remote):
+        transport = self._get_transport(remote)
+        if transport is not None and SSH_KEEPALIVE_INTERVAL:
+            transport.set_keepalive(SSH_KEEPALIVE_INTERVAL)
+        self.__verified[(remote.hostname, remote.port)] = time.time()
+
     def initialize(self, admin_ip,
                    admin_login=SSH_FUEL_CREDENTIALS['login'],
                    admin_password=SSH_FUEL_CREDENTIALS['password'],
@@ -79,20 +149,30 @@ class SSHManager(six.with_metaclass(SingletonMeta, object)):
     def connect(self, remote):
         """ Check if connection is stable and return this one
 
+        Check command is executed only if the connection transport is not
+        active or if the connection was not checked for a while.
+
         :param remote:
         :return:
         """
+        if self._is_verified(remote):
+            return remote
         try:
-            from fuelweb_test.helpers.utils import RunLimit
-            with RunLimit(
-                    seconds=5,
-                    error_message="Socket timeout! Forcing reconnection"):
-                remote.check_call("cd ~")
+            if isinstance(threading.current_thread(), threading._MainThread):
+                from fuelweb_test.helpers.utils import RunLimit
+                with RunLimit(
+                        seconds=5,
+                        error_message="Socket timeout! Forcing reconnection"):
+                    remote.check_call("cd ~")
+            else:
+                # SIGALRM based RunLimit is available in main thread only
+                remote.check_call("cd ~", timeout=5)
         except Exception:
             logger.debug(traceback.format_exc())
             logger.debug('SSHManager: Check for current connection fails. '
                          'Trying to reconnect')
             remote = self.reconnect(remote)
+        self._set_verified(remote)
         return remote
 
     def reconnect(self, remote):
@@ -103,6 +183,7 @@ class SSHManager(six.with_metaclass(SingletonMeta, object)):
         """
         ip = remote.hostname
         port = remote.port
+        self.__verified.pop((ip, port), None)
         try:
             remote.reconnect()
         except SSHException:
@@ -172,11 +253,13 @@ class SSHManager(six.with_metaclass(SingletonMeta, object)):
         :type port: int
         :rtype: SSHClient
         """
-        if (ip, port) in self.connections:
-            logger.debug('SSH_MANAGER: Return existed connection for '
-                         '{ip}:{port}'.format(ip=ip, port=port))
-        else:
-            self.init_remote(ip=ip, port=port)
+        # Connections could be requested from several threads at once
+        with self.__lock:
+            if (ip, port) in self.connections:
+                logger.debug('SSH_MANAGER: Return existed connection for '
+                             '{ip}:{port}'.format(ip=ip, port=port))
+            else:
+                self.init_remote(ip=ip, port=port)
         logger.debug('SSH_MANAGER: Connections {0}'.format(self.connections))
         return self.connect(self.connections[(ip, port)])
 
@@ -196,6 +279,7 @@ class SSHManager(six.with_metaclass(SingletonMeta, object)):
                          .format(ip=ip, port=port))
             ssh_client = self.connections.pop((ip, port))
             ssh_client.close()
+        self.__verified.pop((ip, port), None)
         if login and (password or keys):
             custom_creds = {
                 'username': login,
@@ -207,6 +291,7 @@ class SSHManager(six.with_metaclass(SingletonMeta, object)):
         self.init_remote(ip=ip, port=port, custom_creds=custom_creds)
 
     def clean_all_connections(self):
+        self.__verified.clear()
         for (ip, port), connection in self.connections.items():
             connection.clear()
             logger.debug('SSH_MANAGER: Close connection for {ip}:{port}'
@@ -250,6 +335,112 @@ class SSHManager(six.with_metaclass(SingletonMeta, object)):
                 raise_on_err=raise_on_err
             )
 
+    @staticmethod
+    def run_many(func, ips, workers=None):
+        """Call func(ip) for each ip in a bounded pool of threads
+
+        :type func: callable
+        :type ips: list
+        :type workers: int
+        :return: results and exceptions of failed calls, both keyed by ip
+        :rtype: tuple(dict, dict)
+        """
+        ips = sorted(set(ips))
+        results, errors = {}, {}
+        if not ips:
+            return results, errors
+
+        def call(ip):
+            try:
+                return ip, func(ip), None
+            except Exception as e:
+                logger.debug(traceback.format_exc())
+                return ip, None, e
+
+        pool = ThreadPool(min(workers or SSH_PARALLEL_WORKERS, len(ips)))
+        try:
+            for ip, result, error in pool.imap_unordered(call, ips):
+                if error is None:
+                    results[ip] = result
+                else:
+                    errors[ip] = error
+        finally:
+            pool.close()
+            pool.join()
+        return results, errors
+
+    def execute_many(self, ips, cmd, port=22, sudo=None, timeout=None,
+                     workers=None):
+        """Execute command on several hosts in parallel
+
+        Exit codes are not checked. Hosts, which were not reachable
+        or did not finish the command in timeout, are absent in the result.
+
+        :type ips: list
+        :type cmd: str
+        :type port: int
+        :type sudo: bool
+        :param timeout: timeout for command on every host
+        :type timeout: int
+        :param workers: count of simultaneous connections
+        :type workers: int
+        :return: ExecResult for each host
+        :rtype: dict
+        """
+        def execute(ip):
+            remote = self.get_remote(ip=ip, port=port)
+            with remote.sudo(enforce=sudo):
+                return remote.execute(cmd, timeout=timeout)
+
+        results, errors = self.run_many(execute, ips, workers=workers)
+        for ip, error in sorted(errors.items()):
+            logger.error('Execution of {cmd!r} on {ip} failed: '
+                         '{err!s}'.format(cmd=cmd, ip=ip, err=error))
+        return results
+
+    def check_call_many(
+            self,
+            ips,
+            command, port=22, verbose=False, timeout=None,
+            error_info=None,
+            expected=None, raise_on_err=True,
+            sudo=None, workers=None
+    ):
+        """Execute command on several hosts in parallel and check it
+
+        :type ips: list
+        :type command: str
+        :type port: int
+        :type verbose: bool
+        :param timeout: timeout for command on every host
+        :type timeout: int
+        :type error_info: str
+        :type expected: list
+        :type raise_on_err: bool
+        :type sudo: bool
+        :param workers: count of simultaneous connections
+        :type workers: int
+        :return: ExecResult for each host
+        :rtype: dict
+        :raises: MultipleExecutionError
+        """
+        def check_call(ip):
+            return self.check_call(
+                ip=ip,
+                command=command,
+                port=port,
+                verbose=verbose,
+                timeout=timeout,
+                error_info=error_info,
+                expected=expected,
+                raise_on_err=raise_on_err,
+                sudo=sudo)
+
+        results, errors = self.run_many(check_call, ips, workers=workers)
+        if errors:
+            raise MultipleExecutionError(command, errors, results)
+        return results
+
     def execute_on_remote(self, ip, cmd, port=22, err_msg=None,
                           jsonify=False, assert_ec_equal=None,
                           raise_on_assert=True, yamlify=False, sudo=None):
@@ -27,6 +27,8 @@ import random
 import re
 import signal
 import string
+import tarfile
+import threading
 import time
 import traceback
 from warnings import warn
@@ -43,6 +45,7 @@ from six.moves import configparser
 # noinspection PyUnresolvedReferences
 from six.moves import xrange
 # pylint: enable=redefined-builtin
+import six
 import yaml
 
 from core.helpers.log_helpers import logwrap
@@ -144,93 +147,157 @@ def pull_out_logs_via_ssh(admin_remote, name,
         logger.error(traceback.format_exc())
 
 
+class ArtifactsArchive(object):
+    """Thread safe writer of downloaded files into tar.gz archive"""
+
+    def __init__(self, path):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__tar = tarfile.open(path, 'w:gz')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, name, data):
+        """Add file with content to archive
+
+        :param name: str, file name in archive
+        :param data: bytes, file content
+        """
+        info = tarfile.TarInfo(name=name)
+        info.size = len(data)
+        info.mtime = time.time()
+        with self.__lock:
+            self.__tar.addfile(info, six.BytesIO(data))
+
+    def add_remote_file(self, ip, path, name):
+        """Read remote file and add it to archive
+
+        :param ip: str, node ip
+        :param path: str, remote file path
+        :param name: str, file name in archive
+        :raises: IOError if remote file is absent
+        """
+        with SSHManager().open_on_remote(ip, path, mode='rb') as f:
+            self.add(name, f.read())
+
+    def close(self):
+        with self.__lock:
+            self.__tar.close()
+
+
+def collect_nodes_artifacts(nodes, collect, archive_path,
+                            budget=settings.ARTIFACTS_NODE_TIMEOUT,
+                            workers=None):
+    """Collect artifacts from nodes concurrently into one archive
+
+    collect(node, archive, deadline) is called for every node in the
+    pool of threads. It should check time.time() against deadline before
+    every step and stop collecting from the node when it is exceeded.
+
+    :param nodes: list of nailgun nodes
+    :param collect: callable(node, ArtifactsArchive, deadline)
+    :param archive_path: str, path of local tar.gz archive
+    :param budget: int, seconds to collect artifacts from one node
+    :param workers: int, count of nodes processed simultaneously
+    :return: dict, {node ip: exception} for failed nodes
+    """
+    nodes = {node['ip']: node for node in nodes}
+    with ArtifactsArchive(archive_path) as archive:
+        _, errors = SSHManager().run_many(
+            lambda ip: collect(nodes[ip], archive, time.time() + budget),
+            nodes,
+            workers=workers)
+    for ip, error in sorted(errors.items()):
+        logger.error('Collecting artifacts from {0} failed: {1}'.format(
+            nodes[ip]['name'], error))
+    logger.info('Artifacts were stored in {0}'.format(archive_path))
+    return errors
+
+
 @logwrap
 def store_astute_yaml(env):
     func_name = get_test_method_name()
-    nailgun_nodes = env.fuel_web.client.list_nodes()
+    nailgun_nodes = [node for node in env.fuel_web.client.list_nodes()
+                     if 'roles' in node]
 
-    def store_astute_yaml_for_one_node(nailgun_node):
-        ssh_manager = SSHManager()
-        if 'roles' not in nailgun_node:
-            return None
+    def store_astute_yaml_for_one_node(nailgun_node, archive, deadline):
         errmsg = 'Downloading "{0}.yaml" from the {1} failed'
         msg = 'File "{0}.yaml" was downloaded from the {1}'
         nodename = nailgun_node['name']
         ip = nailgun_node['ip']
+        filename = None
         for role in nailgun_node['roles']:
-            filename = '{0}/{1}-{2}-{3}.yaml'.format(settings.LOGS_DIR,
-                                                     func_name,
-                                                     nodename,
-                                                     role)
-
-            if not ssh_manager.isfile_on_remote(ip,
-                                                '/etc/{0}.yaml'.format(role)):
-                role = 'primary-' + role
-            if ssh_manager.download_from_remote(ip,
-                                                '/etc/{0}.yaml'.format(role),
-                                                filename):
-                logger.info(msg.format(role, nodename))
+            if time.time() > deadline:
+                logger.error('Time to collect artifacts from the {0} '
+                             'is exceeded'.format(nodename))
+                return
+            filename = '{0}-{1}-{2}.yaml'.format(func_name, nodename, role)
+            for path in ('/etc/{0}.yaml'.format(role),
+                         '/etc/primary-{0}.yaml'.format(role)):
+                try:
+                    archive.add_remote_file(ip, path, filename)
+                except IOError:
+                    continue
+                logger.info(msg.format(posixpath.basename(path)[:-5],
+                                       nodename))
+                break
             else:
                 logger.error(errmsg.format(role, nodename))
-        if settings.DOWNLOAD_FACTS:
+        if settings.DOWNLOAD_FACTS and filename:
+            timeout = int(deadline - time.time())
+            if timeout <= 0:
+                logger.error('Time to collect facts from the {0} '
+                             'is exceeded'.format(nodename))
+                return
             fact_filename = re.sub(r'-\w*\.', '-facts.', filename)
-            generate_facts(ip)
-            if ssh_manager.download_from_remote(ip,
-                                                '/tmp/facts.yaml',
-                                                fact_filename):
+            generate_facts(ip, timeout=timeout)
+            try:
+                archive.add_remote_file(ip, '/tmp/facts.yaml', fact_filename)
                 logger.info(msg.format('facts', nodename))
-            else:
+            except IOError:
                 logger.error(errmsg.format('facts', nodename))
 
     try:
-        for node in nailgun_nodes:
-            store_astute_yaml_for_one_node(node)
+        collect_nodes_artifacts(
+            nailgun_nodes,
+            store_astute_yaml_for_one_node,
+            archive_path=os.path.join(
+                settings.LOGS_DIR, '{0}-astute.tar.gz'.format(func_name)))
     except Exception:
         logger.error(traceback.format_exc())
 
 
 @logwrap
-def generate_facts(ip):
-    ssh_manager = SSHManager()
+def generate_facts(ip, timeout=None):
     facter_dir = '/var/lib/puppet/lib/facter'
     exluded_facts = ['naily.rb']
 
-    if not ssh_manager.isdir_on_remote(ip, facter_dir):
-        ssh_manager.mkdir_on_remote(ip, facter_dir)
-        logger.debug('Directory {0} was created'.format(facter_dir))
-
-    ssh_manager.execute_on_remote(ip, 'rm -f {0}/*.rb'.format(facter_dir))
-    logger.debug('rb files were removed from {0}'.format(facter_dir))
-
-    facts_files = ssh_manager.execute_on_remote(
+    # All steps are done with single command to save round trips
+    SSHManager().check_call(
         ip,
-        'find /etc/puppet/modules/ -wholename "*/lib/facter/*.rb"')['stdout']
-    facts_files = [i.strip() for i in facts_files]
-    logger.debug('The following facts {0} will'
-                 ' be copied to {1}'.format(facts_files, facter_dir))
-    for fact in facts_files:
-        if not fact or re.sub(r'.*/', '', fact) in exluded_facts:
-            continue
-        ssh_manager.execute_on_remote(ip,
-                                      'cp {0} {1}/'.format(fact, facter_dir))
-    logger.debug('Facts were copied')
-
-    ssh_manager.execute_on_remote(ip, 'facter -p -y > /tmp/facts.yaml')
+        'mkdir -p {dir} && rm -f {dir}/*.rb && '
+        'find /etc/puppet/modules/ -wholename "*/lib/facter/*.rb" '
+        '{excluded} -exec cp {{}} {dir}/ \\; && '
+        'facter -p -y > /tmp/facts.yaml; '
+        'rc=$?; rm -f {dir}/*.rb; exit $rc'.format(
+            dir=facter_dir,
+            excluded=' '.join('! -name {0}'.format(fact)
+                              for fact in exluded_facts)),
+        timeout=timeout)
     logger.info('Facts yaml was created')
 
-    ssh_manager.execute_on_remote(ip, 'rm -f {0}/*.rb'.format(facter_dir))
-    logger.debug('rb files were removed from {0}'.format(facter_dir))
-
 
-@logwrap
-def get_node_packages(remote, func_name, node_role,
-                      packages_dict, release=settings.OPENSTACK_RELEASE):
+def _get_packages_cmd(release=settings.OPENSTACK_RELEASE):
     if settings.OPENSTACK_RELEASE_UBUNTU in release:
-        cmd = "dpkg-query -W -f='${Package} ${Version}'\r"
-    else:
-        cmd = 'rpm -qa --qf "%{name} %{version}"\r'
-    node_packages = remote.execute(cmd)['stdout'][0].split('\r')[:-1]
+        return "dpkg-query -W -f='${Package} ${Version}'\r"
+    return 'rpm -qa --qf "%{name} %{version}"\r'
+
 
+def _merge_node_packages(func_name, node_role, packages_dict, node_packages):
     logger.debug("node packages are {0}".format(node_packages))
     packages_dict[func_name][node_role] = node_packages\
         if node_role not in packages_dict[func_name].keys()\
@@ -239,17 +306,34 @@ def get_node_packages(remote, func_name, node_role,
     return packages_dict
 
 
+@logwrap
+def get_node_packages(remote, func_name, node_role,
+                      packages_dict, release=settings.OPENSTACK_RELEASE):
+    cmd = _get_packages_cmd(release)
+    node_packages = remote.execute(cmd)['stdout'][0].split('\r')[:-1]
+    return _merge_node_packages(func_name, node_role, packages_dict,
+                                node_packages)
+
+
 @logwrap
 def store_packages_json(env):
     ssh_manager = SSHManager()
     func_name = "".join(get_test_method_name())
     packages = {func_name: {}}
     cluster_id = env.fuel_web.get_last_created_cluster()
-    for nailgun_node in env.fuel_web.client.list_cluster_nodes(cluster_id):
+    nailgun_nodes = env.fuel_web.client.list_cluster_nodes(cluster_id)
+    results = ssh_manager.execute_many(
+        ips=[nailgun_node['ip'] for nailgun_node in nailgun_nodes],
+        cmd=_get_packages_cmd())
+    for nailgun_node in nailgun_nodes:
         role = '_'.join(nailgun_node['roles'])
         logger.debug('role is {0}'.format(role))
-        remote = ssh_manager.get_remote(nailgun_node['ip'])
-        packages = get_node_packages(remote, func_name, role, packages)
+        if nailgun_node['ip'] not in results:
+            continue
+        node_packages = \
+            results[nailgun_node['ip']]['stdout'][0].split('\r')[:-1]
+        packages = _merge_node_packages(func_name, role, packages,
+                                        node_packages)
     packages_file = '{0}/packages.json'.format(settings.LOGS_DIR)
     if os.path.isfile(packages_file):
         with open(packages_file, 'r') as outfile:
@@ -13,10 +13,12 @@
 #    under the License.
 
 import logging
+from multiprocessing.pool import ThreadPool
 import re
 import time
 
 from devops.client.client import DevopsClient
+from devops.error import TimeoutError
 from devops.helpers.helpers import tcp_ping_
 from devops.helpers.helpers import wait_pass
 from devops.helpers.helpers import wait
@@ -31,6 +33,7 @@ from core.helpers.log_helpers import logwrap
 from core.helpers.log_helpers import QuietLogger
 
 from fuelweb_test.helpers import checkers
+from fuelweb_test.helpers.common import drop_keystone_sessions
 from fuelweb_test.helpers.decorators import revert_info
 from fuelweb_test.helpers.decorators import update_rpm_packages
 from fuelweb_test.helpers.decorators import upload_manifests
@@ -42,7 +45,9 @@ from fuelweb_test.helpers.fuel_actions import NailgunActions
 from fuelweb_test.helpers.fuel_actions import PostgresActions
 from fuelweb_test.helpers.fuel_actions import FuelBootstrapCliActions
 from fuelweb_test.helpers.ssh_manager import SSHManager
+from fuelweb_test.helpers.utils import get_test_method_name
 from fuelweb_test.helpers.utils import TimeStat
+from fuelweb_test.helpers.utils import update_yaml
 from fuelweb_test.helpers.utils import YamlEditor
 from fuelweb_test.helpers import multiple_networks_hacks
 from fuelweb_test.models.fuel_web_client import FuelWebClient
@@ -60,6 +65,9 @@ class EnvironmentModel(six.with_metaclass(SingletonMeta, object)):
             self._virt_env = None
         if not hasattr(self, "_fuel_web"):
             self._fuel_web = None
+        if not hasattr(self, "_unchanged_snapshot"):
+            # name of snapshot made last while environment is suspended
+            self._unchanged_snapshot = None
         self._config = config
         self.ssh_manager = SSHManager()
         self.ssh_manager.initialize(
@@ -113,17 +121,11 @@ class EnvironmentModel(six.with_metaclass(SingletonMeta, object)):
         """
         # self.dhcrelay_check()
 
-        for node in devops_nodes:
-            logger.info("Bootstrapping node: {}".format(node.name))
-            node.start()
-            # TODO(aglarendil): LP#1317213 temporary sleep
-            # remove after better fix is applied
-            time.sleep(5)
+        self._unchanged_snapshot = None
+        started = self.start_nodes(devops_nodes)
 
         with TimeStat("wait_for_nodes_to_start_and_register_in_nailgun"):
-            wait(lambda: all(self.nailgun_nodes(devops_nodes)), 15, timeout,
-                 timeout_msg='Bootstrap timeout for nodes: {}'
-                             ''.format([node.name for node in devops_nodes]))
+            self.wait_nodes_registered(devops_nodes, started, timeout)
 
         wait_pass(
             lambda: checkers.validate_minimal_amount_nodes(
@@ -137,6 +139,88 @@ class EnvironmentModel(six.with_metaclass(SingletonMeta, object)):
 
         return self.nailgun_nodes(devops_nodes)
 
+    @staticmethod
+    def start_nodes(devops_nodes, stagger=settings.BOOTSTRAP_START_STAGGER):
+        """Start devops nodes concurrently
+
+        Start of node N is delayed for N * stagger seconds, so DHCP and
+        PXE requests of nodes are not sent at the same moment.
+
+        :param devops_nodes: list of devops nodes
+        :param stagger: float, seconds between starts of nodes
+        :return: dict, {node name: time of start}
+        """
+        begin = time.time()
+
+        def start(args):
+            num, node = args
+            delay = begin + num * stagger - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            logger.info("Bootstrapping node: {}".format(node.name))
+            node.start()
+            return node.name, time.time()
+
+        if not devops_nodes:
+            return {}
+        pool = ThreadPool(len(devops_nodes))
+        try:
+            return dict(pool.map(start, enumerate(devops_nodes)))
+        finally:
+            pool.close()
+            pool.join()
+
+    def wait_nodes_registered(self, devops_nodes, started,
+                              timeout=settings.BOOTSTRAP_TIMEOUT,
+                              interval=settings.BOOTSTRAP_POLL_INTERVAL):
+        """Wait until devops nodes are registered in nailgun
+
+        Every poll fetches nailgun nodes once, nodes are matched to devops
+        nodes by MAC addresses. Time from start to registration of every
+        node is logged and stored in time statistics.
+
+        :param devops_nodes: list of devops nodes
+        :param started: dict, {node name: time of start}
+        :param timeout: int, seconds
+        :param interval: int, seconds between polls
+        :return: dict, {node name: seconds to register}
+        :raises: TimeoutError
+        """
+        pending = {node.name: node for node in devops_nodes}
+        registered = {}
+        deadline = time.time() + timeout
+        while pending:
+            self.fuel_web.nodes_index.refresh()
+            now = time.time()
+            for name, node in sorted(pending.items()):
+                nailgun_node = self.fuel_web.get_nailgun_node_by_devops_node(
+                    node)
+                if nailgun_node is None:
+                    continue
+                del pending[name]
+                registered[name] = now - started.get(name, now)
+                logger.info('Node {0} is registered as {1} in {2:.1f} '
+                            'seconds'.format(name, nailgun_node['name'],
+                                             registered[name]))
+            if not pending:
+                break
+            if now > deadline:
+                raise TimeoutError(
+                    'Bootstrap timeout for nodes: {}'.format(sorted(pending)))
+            time.sleep(interval)
+
+        method_name = get_test_method_name()
+        yaml_path = [method_name] if method_name else []
+        for name, spent in sorted(registered.items()):
+            try:
+                update_yaml(
+                    yaml_path + ['{0}_registration_time'.format(name)],
+                    '{:.2f}'.format(spent), is_uniq=False)
+            except Exception:
+                logger.warning('Failed to store registration time of '
+                               '{0}'.format(name))
+        return registered
+
     def sync_time(self, nodes_names=None, skip_sync=False):
         if nodes_names is None:
             roles = ['fuel_master', 'fuel_slave']
@@ -248,6 +332,9 @@ class EnvironmentModel(six.with_metaclass(SingletonMeta, object)):
         return self._virt_env
 
     def resume_environment(self):
+        self._unchanged_snapshot = None
+        # tokens issued before the snapshot can be revoked in the cloud
+        drop_keystone_sessions()
         self.d_env.resume()
         admin = self.d_env.nodes().admin
 
@@ -291,6 +378,7 @@ class EnvironmentModel(six.with_metaclass(SingletonMeta, object)):
             self.d_env.snapshot(snapshot_name, force=True,
                                 description=description)
             revert_info(snapshot_name, self.get_admin_node_ip(), description)
+            self._unchanged_snapshot = snapshot_name
 
         if settings.FUEL_STATS_CHECK:
             self.resume_environment()
@@ -315,7 +403,17 @@ class EnvironmentModel(six.with_metaclass(SingletonMeta, object)):
 
         logger.info('We have snapshot with such name: {:s}'.format(name))
 
+        if (settings.SKIP_REDUNDANT_REVERT and
+                self._unchanged_snapshot == name):
+            # environment is suspended right after the snapshot was made
+            logger.info("Environment is in state of the snapshot '{0}', "
+                        "skip reverting".format(name))
+            self.resume_environment()
+            self.sync_time(['admin'] if skip_timesync else None)
+            return True
+
         logger.info("Reverting the snapshot '{0}' ....".format(name))
+        self._unchanged_snapshot = None
         self.d_env.revert(name)
 
         logger.info("Resuming the snapshot '{0}' ....".format(name))
@@ -422,6 +520,7 @@ class EnvironmentModel(six.with_metaclass(SingletonMeta, object)):
                           iso_connect_as=settings.ADMIN_BOOT_DEVICE,
                           security=settings.SECURITY_TEST):
         # Create environment and start the Fuel master node
+        self._unchanged_snapshot = None
         admin = self.d_env.nodes().admin
         self.d_env.start([admin])
 
@@ -15,9 +15,9 @@
 from __future__ import division
 
 import logging
+from multiprocessing.pool import ThreadPool
 import re
 import time
-import traceback
 
 import distutils
 import devops
@@ -70,8 +70,9 @@ from fuelweb_test.helpers.utils import get_node_hiera_roles
 from fuelweb_test.helpers.utils import node_freemem
 from fuelweb_test.helpers.utils import pretty_log
 from fuelweb_test.models.nailgun_client import NailgunClient
+from fuelweb_test.models.nailgun_nodes_index import NailgunNodesIndex
+from fuelweb_test.models.task_watcher import TaskWatcher
 import fuelweb_test.settings as help_data
-from fuelweb_test.settings import ATTEMPTS
 from fuelweb_test.settings import BONDING
 from fuelweb_test.settings import DEPLOYMENT_MODE_HA
 from fuelweb_test.settings import DISABLE_SSL
@@ -80,6 +81,7 @@ from fuelweb_test.settings import iface_alias
 from fuelweb_test.settings import KEYSTONE_CREDS
 from fuelweb_test.settings import KVM_USE
 from fuelweb_test.settings import MULTIPLE_NETWORKS
+from fuelweb_test.settings import NAILGUN_PARALLEL_REQUESTS
 from fuelweb_test.settings import NOVA_QUOTAS_ENABLED
 from fuelweb_test.settings import AUTH_S3_KEYSTONE_CEPH_ENABLED
 from fuelweb_test.settings import NETWORK_PROVIDERS
@@ -94,7 +96,6 @@ from fuelweb_test.settings import OSTF_TEST_RETRIES_COUNT
 from fuelweb_test.settings import REPLACE_DEFAULT_REPOS
 from fuelweb_test.settings import REPLACE_DEFAULT_REPOS_ONLY_ONCE
 from fuelweb_test.settings import SSL_CN
-from fuelweb_test.settings import TIMEOUT
 from fuelweb_test.settings import UCA_ENABLED
 from fuelweb_test.settings import USER_OWNED_CERT
 from fuelweb_test.settings import UBUNTU_SERVICE_PROVIDER
@@ -121,6 +122,10 @@ class FuelWebClient29(object):
 
         self.client = NailgunClient(session=self._session)
         self.fuel_client = FuelClient(session=self._session)
+        self.nodes_index = NailgunNodesIndex(
+            client=self.client,
+            d_env_getter=lambda: self.environment.d_env)
+        self.task_watcher = TaskWatcher(client=self.client)
 
         self.security = SecurityChecks(self.client, self._environment)
 
@@ -157,7 +162,13 @@ class FuelWebClient29(object):
 
     @logwrap
     def _tasks_wait(self, tasks, timeout):
-        return [self.task_wait(task, timeout) for task in tasks]
+        futures = [self.task_watcher.watch(task) for task in tasks]
+        logger.info('Wait for tasks {0} seconds: {1}'.format(
+            timeout, [task['name'] for task in tasks]))
+        self.task_watcher.wait(futures, timeout=timeout)
+        # Finished tasks could change nodes status
+        self.nodes_index.invalidate()
+        return [self.client.get_task(future.task_id) for future in futures]
 
     @logwrap
     def add_syslog_server(self, cluster_id, host, port):
@@ -1099,8 +1110,7 @@ class FuelWebClient29(object):
     def get_nailgun_node_by_base_name(self, base_node_name):
         logger.debug('Get nailgun node by "{0}" base '
                      'node name.'.format(base_node_name))
-        nodes = self.client.list_nodes()
-        for node in nodes:
+        for node in self.nodes_index.nodes:
             if base_node_name in node['name']:
                 return node
 
@@ -1110,32 +1120,12 @@ class FuelWebClient29(object):
         Returns dict with nailgun slave node description if node is
         registered. Otherwise return None.
         """
-        d_macs = {netaddr.EUI(i.mac_address) for i in devops_node.interfaces}
-        logger.debug('Verify that nailgun api is running')
-        attempts = ATTEMPTS
-        nodes = []
-        while attempts > 0:
-            logger.debug(
-                'current timeouts is {0} count of '
-                'attempts is {1}'.format(TIMEOUT, attempts))
-            try:
-                nodes = self.client.list_nodes()
-                logger.debug('Got nodes %s', nodes)
-                attempts = 0
-            except Exception:
-                logger.debug(traceback.format_exc())
-                attempts -= 1
-                time.sleep(TIMEOUT)
-        logger.debug('Look for nailgun node by macs %s', d_macs)
-        for nailgun_node in nodes:
-            node_nics = self.client.get_node_interfaces(nailgun_node['id'])
-            macs = {netaddr.EUI(nic['mac'])
-                    for nic in node_nics if nic['type'] == 'ether'}
-            logger.debug('Look for macs returned by nailgun {0}'.format(macs))
-            # Because our HAproxy may create some interfaces
-            if d_macs.issubset(macs):
-                nailgun_node['devops_name'] = devops_node.name
-                return nailgun_node
+        logger.debug('Look for nailgun node of %s', devops_node.name)
+        # Nailgun node may have more MACs, because our HAproxy
+        # may create some interfaces
+        nailgun_node = self.nodes_index.get_by_devops_node(devops_node)
+        if nailgun_node is not None:
+            return nailgun_node
         # On deployed environment MAC addresses of bonded network interfaces
         # are changes and don't match addresses associated with devops node
         if BONDING:
@@ -1148,9 +1138,7 @@ class FuelWebClient29(object):
         :type fqdn: String
             :rtype: Dict
         """
-        for nailgun_node in self.client.list_nodes():
-            if nailgun_node['meta']['system']['fqdn'] == fqdn:
-                return nailgun_node
+        return self.nodes_index.get_by_fqdn(fqdn)
 
     @logwrap
     def get_nailgun_node_by_status(self, status):
@@ -1159,11 +1147,7 @@ class FuelWebClient29(object):
         :type status: String
             :rtype: List
         """
-        returned_nodes = []
-        for nailgun_node in self.client.list_nodes():
-            if nailgun_node['status'] == status:
-                returned_nodes.append(nailgun_node)
-        return returned_nodes
+        return self.nodes_index.get_by_status(status)
 
     @logwrap
     def find_devops_node_by_nailgun_fqdn(self, fqdn, devops_nodes):
@@ -1189,10 +1173,7 @@ class FuelWebClient29(object):
         :type mac_address: String
             :rtype: Node or None
         """
-        for node in self.environment.d_env.nodes():
-            for iface in node.interfaces:
-                if netaddr.EUI(iface.mac_address) == netaddr.EUI(mac_address):
-                    return node
+        return self.nodes_index.get_devops_node_by_mac(mac_address)
 
     @logwrap
     def get_devops_nodes_by_nailgun_nodes(self, nailgun_nodes):
@@ -1223,8 +1204,11 @@ class FuelWebClient29(object):
         :type nailgun_node_id: int
         :rtype: Node or None
         """
-        nailgun_node = [node for node in self.client.list_nodes() if
-                        node['id'] == nailgun_node_id].pop()
+        nailgun_node = self.nodes_index.get_by_id(nailgun_node_id)
+        if nailgun_node is None:
+            raise IndexError(
+                'Nailgun node with id {0} is not found'.format(
+                    nailgun_node_id))
         return self.get_devops_node_by_mac(nailgun_node['mac'])
 
     @logwrap
@@ -1290,7 +1274,7 @@ class FuelWebClient29(object):
         return any(
             map(lambda node:
                 node['mac'] == nailgun_node['mac'] and
-                node['status'] == 'discover', self.client.list_nodes()))
+                node['status'] == 'discover', self.nodes_index.nodes))
 
     def wait_node_is_discovered(self, nailgun_node, timeout=6 * 60):
         logger.info('Wait for node {!r} to become discovered'
@@ -1365,17 +1349,19 @@ class FuelWebClient29(object):
         states = states or ('ready', 'error')
         logger.info('Wait for task {0} seconds: {1}'.format(
                     timeout, pretty_log(task, indent=1)))
-        start = time.time()
 
-        wait(
-            lambda: (self.client.get_task(task['id'])['status'] in states),
+        future = self.task_watcher.watch(task, states=states)
+        self.task_watcher.wait(
+            [future],
             interval=interval,
             timeout=timeout,
             timeout_msg='Waiting task {0!r} timeout {1} sec '
                         'was exceeded'.format(task['name'], timeout))
 
-        took = time.time() - start
+        took = future.finished - future.started
         task = self.client.get_task(task['id'])
+        # Finished task could change nodes status
+        self.nodes_index.invalidate()
         logger.info('Task changed its state to one of {}. Took {} seconds.'
                     ' {}'.format(states, took, pretty_log(task, indent=1)))
         return task
@@ -1384,9 +1370,9 @@ class FuelWebClient29(object):
     def task_wait_progress(self, task, timeout, interval=5, progress=None):
         logger.info('start to wait with timeout {0} '
                     'interval {1}'.format(timeout, interval))
-        wait(
-            lambda: self.client.get_task(
-                task['id'])['progress'] >= progress,
+        future = self.task_watcher.watch(task, progress=progress)
+        self.task_watcher.wait(
+            [future],
             interval=interval,
             timeout=timeout,
             timeout_msg='Waiting task {0!r} timeout {1} sec '
@@ -1432,13 +1418,16 @@ class FuelWebClient29(object):
         nodes_data = []
         nodes_groups = {}
         updated_nodes = []
-        for node_name in nodes_dict:
-            devops_node = self.environment.d_env.get_node(name=node_name)
-
+        # all nodes are resolved and waited online at once
+        node_names = list(nodes_dict)
+        online_nodes = dict(zip(node_names, self.wait_nodes_get_online_state(
+            [self.environment.d_env.get_node(name=node_name)
+             for node_name in node_names],
+            timeout=60 * 2)))
+        for node_name in node_names:
             node_group, node_roles = self.get_node_group_and_role(node_name,
                                                                   nodes_dict)
-            self.wait_node_is_online(devops_node, timeout=60 * 2)
-            node = self.get_nailgun_node_by_devops_node(devops_node)
+            node = online_nodes[node_name]
 
             if custom_names:
                 name = custom_names.get(node_name,
@@ -1466,6 +1455,7 @@ class FuelWebClient29(object):
         cluster_id = nodes_data[-1]['cluster_id']
         node_ids = [str(node_info['id']) for node_info in nodes_data]
         self.client.update_nodes(nodes_data)
+        self.nodes_index.invalidate()
 
         nailgun_nodes = self.client.list_cluster_nodes(cluster_id)
         cluster_node_ids = [str(_node['id']) for _node in nailgun_nodes]
@@ -1486,11 +1476,47 @@ class FuelWebClient29(object):
         logger.debug("task info is {}".format(task))
         self.assert_task_success(task, interval=interval, timeout=timeout)
 
+    @logwrap
+    def get_nodes_interfaces(self, node_ids):
+        """Get interfaces of nailgun nodes by concurrent requests
+
+        :param node_ids: list of nailgun node ids
+        :return: dict, {node id: list of interfaces}
+        """
+        node_ids = list(node_ids)
+        if not node_ids:
+            return {}
+        pool = ThreadPool(min(NAILGUN_PARALLEL_REQUESTS, len(node_ids)))
+        try:
+            return dict(zip(node_ids, pool.map(self.client.get_node_interfaces,
+                                               node_ids)))
+        finally:
+            pool.close()
+            pool.join()
+
     @logwrap
     def update_node_networks(self, node_id, interfaces_dict,
                              raw_data=None,
                              override_ifaces_params=None):
-        interfaces = self.client.get_node_interfaces(node_id)
+        self.client.put_node_interfaces([self.get_node_networks_data(
+            node_id, interfaces_dict, raw_data=raw_data,
+            override_ifaces_params=override_ifaces_params)])
+
+    def get_node_networks_data(self, node_id, interfaces_dict,
+                               raw_data=None, override_ifaces_params=None,
+                               interfaces=None):
+        """Prepare interfaces of node with networks assigned to them
+
+        :param node_id: int, nailgun node id
+        :param interfaces_dict: dict, {interface name: list of networks}
+        :param raw_data: list, additional interfaces (e.g. bonds)
+        :param override_ifaces_params: list, parameters of interfaces
+        :param interfaces: list, interfaces of node if they are already
+                           fetched
+        :return: dict, item of PUT /nodes/interfaces request
+        """
+        if interfaces is None:
+            interfaces = self.client.get_node_interfaces(node_id)
 
         if raw_data is not None:
             interfaces.extend(raw_data)
@@ -1533,8 +1559,7 @@ class FuelWebClient29(object):
                 [all_networks[i] for i in interfaces_dict.get(name, []) if
                  i in all_networks.keys()]
 
-        self.client.put_node_interfaces(
-            [{'id': node_id, 'interfaces': interfaces}])
+        return {'id': node_id, 'interfaces': interfaces}
 
     @logwrap
     def update_node_disk(self, node_id, disks_dict):
@@ -1676,8 +1701,15 @@ class FuelWebClient29(object):
 
         if not nailgun_nodes:
             nailgun_nodes = self.client.list_cluster_nodes(cluster_id)
-        for node in nailgun_nodes:
-            self.update_node_networks(node['id'], assigned_networks)
+        if not nailgun_nodes:
+            return
+        interfaces = self.get_nodes_interfaces(
+            [node['id'] for node in nailgun_nodes])
+        # All nodes are updated by single bulk request
+        self.client.put_node_interfaces([
+            self.get_node_networks_data(node['id'], assigned_networks,
+                                        interfaces=interfaces[node['id']])
+            for node in nailgun_nodes])
 
     @logwrap
     def get_offloading_modes(self, node_id, interfaces):
@@ -2253,9 +2285,43 @@ class FuelWebClient29(object):
             assert 'No cluster_deletion task found!'
 
     @logwrap
-    def wait_nodes_get_online_state(self, nodes, timeout=4 * 60):
-        for node in nodes:
-            self.wait_node_is_online(node, timeout=timeout)
+    def wait_nodes_get_online_state(self, nodes, timeout=4 * 60, interval=5):
+        """Wait until all nodes are online
+
+        Nodes are waited concurrently: nailgun nodes are fetched once per
+        poll for all of them.
+
+        :param nodes: list of devops nodes or nailgun nodes
+        :param timeout: int, seconds
+        :param interval: int, seconds between polls
+        :return: list of nailgun nodes in the same order
+        """
+        nodes = list(nodes)
+        names = [node.name if isinstance(node, Node) else node['name']
+                 for node in nodes]
+        logger.info('Wait for nodes {!r} online status'.format(names))
+        found = [None] * len(nodes)
+        offline = list(names)
+
+        def all_online():
+            self.nodes_index.refresh()
+            del offline[:]
+            for num, node in enumerate(nodes):
+                if isinstance(node, Node):
+                    found[num] = self.get_nailgun_node_by_devops_node(node)
+                else:
+                    found[num] = self.nodes_index.get_by_id(node['id'])
+                if not found[num] or not found[num]['online']:
+                    offline.append(names[num])
+            return not offline
+
+        try:
+            wait(all_online, interval=interval, timeout=timeout,
+                 timeout_msg='Nodes failed to become online')
+        except TimeoutError:
+            raise TimeoutError('Nodes {!r} failed to become online'.format(
+                offline))
+        return found
 
     @logwrap
     def wait_nodes_get_offline_state(self, nodes, timeout=4 * 60):
@@ -3412,10 +3478,15 @@ class FuelWebClient30(FuelWebClient29):
         nailgun_nodes = nailgun_nodes or []
         if not nailgun_nodes:
             nailgun_nodes = self.client.list_cluster_nodes(cluster_id)
+        if not nailgun_nodes:
+            return
+        nodes_interfaces = self.get_nodes_interfaces(
+            [node['id'] for node in nailgun_nodes])
+        nodes_data = []
         for node in nailgun_nodes:
             assigned_networks = {}
-            interfaces = self.client.get_node_interfaces(node['id'])
-            interfaces = {iface['mac']: iface for iface in interfaces}
+            interfaces = {iface['mac']: iface
+                          for iface in nodes_interfaces[node['id']]}
             d_node = self.get_devops_node_by_nailgun_node(node)
             for net in d_node.network_configs:
                 if net.aggregation is None:  # Have some ifaces aggregation?
@@ -3425,17 +3496,21 @@ class FuelWebClient30(FuelWebClient29):
                 else:
                     assigned_networks[net.label] = net.networks
 
-            self.update_node_networks(node['id'], assigned_networks)
-
-    @logwrap
-    def update_node_networks(self, node_id, interfaces_dict,
-                             raw_data=None,
-                             override_ifaces_params=None):
-        interfaces = self.client.get_node_interfaces(node_id)
+            nodes_data.append(self.get_node_networks_data(
+                node['id'], assigned_networks,
+                interfaces=nodes_interfaces[node['id']]))
+        # All nodes are updated by single bulk request
+        self.client.put_node_interfaces(nodes_data)
+
+    def get_node_networks_data(self, node_id, interfaces_dict,
+                               raw_data=None, override_ifaces_params=None,
+                               interfaces=None):
+        if interfaces is None:
+            interfaces = self.client.get_node_interfaces(node_id)
         phys_interfaces = self.filter_nailgun_entities(interfaces,
                                                        type="ether")
 
-        node = [n for n in self.client.list_nodes() if n['id'] == node_id][0]
+        node = self.nodes_index.get_by_id(node_id)
         d_node = self.get_devops_node_by_nailgun_node(node)
         if d_node:
             bonds = [n for n in d_node.network_configs
@@ -3482,8 +3557,7 @@ class FuelWebClient30(FuelWebClient29):
                 [all_networks[i] for i in interfaces_dict.get(name, []) if
                  i in all_networks.keys()]
 
-        self.client.put_node_interfaces(
-            [{'id': node_id, 'interfaces': interfaces}])
+        return {'id': node_id, 'interfaces': interfaces}
 
     def update_nodegroup_net_settings(self, network_configuration, nodegroup,
                                       cluster_id=None):
@@ -0,0 +1,240 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import division
+
+import copy
+import threading
+import time
+import traceback
+
+import netaddr
+
+from fuelweb_test import logger
+from fuelweb_test.settings import ATTEMPTS
+from fuelweb_test.settings import NAILGUN_NODES_INDEX_TTL
+from fuelweb_test.settings import TIMEOUT
+
+
+class NailgunNodesIndex(object):
+    """Identity index of nailgun nodes built from one bulk request
+
+    All nodes are fetched with a single GET /nodes/ call and indexed by
+    id, fqdn and every MAC address reported by the node agent. The
+    snapshot is re-fetched when it is older than ttl seconds or after
+    invalidate() was called (e.g. after an action which changes nodes
+    status). Devops nodes are indexed by MAC address once, because the
+    devops environment does not change during the test run.
+    """
+
+    def __init__(self, client, d_env_getter, ttl=NAILGUN_NODES_INDEX_TTL):
+        """
+
+        :param client: NailgunClient
+        :param d_env_getter: callable, which returns devops environment
+        :param ttl: int, seconds to reuse fetched nodes snapshot
+        """
+        self.__client = client
+        self.__d_env_getter = d_env_getter
+        self.ttl = ttl
+        self.__lock = threading.RLock()
+        self.__fetched_at = None
+        self.__statuses = {}
+        self.__by_id = {}
+        self.__by_mac = {}
+        self.__by_fqdn = {}
+        self.__by_devops_name = {}
+        self.__devops_by_mac = None
+
+    def __repr__(self):
+        return '{cls}(nodes={nodes}, ttl={ttl})'.format(
+            cls=self.__class__.__name__,
+            nodes=len(self.__by_id),
+            ttl=self.ttl)
+
+    @staticmethod
+    def _mac(mac_address):
+        return netaddr.EUI(mac_address)
+
+    def invalidate(self):
+        """Drop nailgun nodes snapshot: next lookup will fetch it again"""
+        with self.__lock:
+            self.__fetched_at = None
+
+    def invalidate_devops(self):
+        """Drop devops nodes MAC index"""
+        with self.__lock:
+            self.__devops_by_mac = None
+
+    @property
+    def expired(self):
+        if self.__fetched_at is None:
+            return True
+        return time.time() - self.__fetched_at >= self.ttl
+
+    def _fetch(self):
+        logger.debug('Verify that nailgun api is running')
+        attempts = ATTEMPTS
+        while attempts > 0:
+            logger.debug(
+                'current timeouts is {0} count of '
+                'attempts is {1}'.format(TIMEOUT, attempts))
+            try:
+                return self.__client.list_nodes()
+            except Exception:
+                logger.debug(traceback.format_exc())
+                attempts -= 1
+                time.sleep(TIMEOUT)
+        return []
+
+    def refresh(self):
+        """Fetch all nailgun nodes and rebuild the index"""
+        with self.__lock:
+            nodes = self._fetch()
+            by_id, by_mac, by_fqdn = {}, {}, {}
+            statuses = {}
+            for node in nodes:
+                by_id[node['id']] = node
+                statuses[node['id']] = (node.get('status'),
+                                        node.get('online'))
+                macs = {self._mac(iface['mac']) for iface in
+                        node.get('meta', {}).get('interfaces', [])
+                        if iface.get('mac')}
+                if node.get('mac'):
+                    macs.add(self._mac(node['mac']))
+                node['_index_macs'] = macs
+                for mac in macs:
+                    by_mac[mac] = node['id']
+                fqdn = node.get('meta', {}).get('system', {}).get('fqdn')
+                if fqdn:
+                    by_fqdn[fqdn] = node['id']
+                if node.get('fqdn'):
+                    by_fqdn[node['fqdn']] = node['id']
+            changed = [node_id for node_id, status in statuses.items()
+                       if self.__statuses.get(node_id) != status]
+            if changed:
+                logger.debug('Nailgun nodes with changed status: '
+                             '{0}'.format(sorted(changed)))
+            self.__statuses = statuses
+            self.__by_id = by_id
+            self.__by_mac = by_mac
+            self.__by_fqdn = by_fqdn
+            self.__fetched_at = time.time()
+
+    def _snapshot(self):
+        with self.__lock:
+            if self.expired:
+                self.refresh()
+            return self.__by_id
+
+    @staticmethod
+    def _export(node):
+        """Return independent copy of cached node without index data"""
+        if node is None:
+            return None
+        node = copy.deepcopy(node)
+        node.pop('_index_macs', None)
+        return node
+
+    @property
+    def nodes(self):
+        """List of all nailgun nodes
+
+        :rtype: list
+        """
+        return [self._export(node) for _, node in
+                sorted(self._snapshot().items())]
+
+    def get_by_id(self, node_id):
+        """Return nailgun node by id or None
+
+        :type node_id: int
+        :rtype: dict
+        """
+        return self._export(self._snapshot().get(node_id))
+
+    def get_by_fqdn(self, fqdn):
+        """Return nailgun node by fqdn or None
+
+        :type fqdn: str
+        :rtype: dict
+        """
+        nodes = self._snapshot()
+        return self._export(nodes.get(self.__by_fqdn.get(fqdn)))
+
+    def get_by_status(self, status):
+        """Return list of nailgun nodes with given status
+
+        :type status: str
+        :rtype: list
+        """
+        return [node for node in self.nodes if node['status'] == status]
+
+    def get_by_macs(self, macs):
+        """Return nailgun node, which has all listed MAC addresses
+
+        :type macs: set
+        :rtype: dict
+        """
+        nodes = self._snapshot()
+        macs = {self._mac(mac) for mac in macs}
+        for mac in macs:
+            node = nodes.get(self.__by_mac.get(mac))
+            if node is not None and macs.issubset(node['_index_macs']):
+                return self._export(node)
+        return None
+
+    def get_by_devops_node(self, devops_node):
+        """Return nailgun node of devops node or None
+
+        Identity of already resolved devops nodes is memorized, so the
+        following lookups are done by nailgun node id. Memorized node is
+        used only if it still has all MAC addresses of devops node: after
+        revert of snapshot the id can belong to another node.
+
+        :type devops_node: devops.models.node.Node
+        :rtype: dict
+        """
+        nodes = self._snapshot()
+        macs = {i.mac_address for i in devops_node.interfaces}
+        node_id = self.__by_devops_name.get(devops_node.name)
+        node = nodes.get(node_id)
+        if node is not None and not {self._mac(mac) for mac in macs
+                                     }.issubset(node['_index_macs']):
+            node = None
+        if node is None:
+            node = self.get_by_macs(macs)
+            if node is None:
+                return None
+            with self.__lock:
+                self.__by_devops_name[devops_node.name] = node['id']
+        else:
+            node = self._export(node)
+        node['devops_name'] = devops_node.name
+        return node
+
+    def get_devops_node_by_mac(self, mac_address):
+        """Return devops node by MAC address of any of its interfaces
+
+        :type mac_address: str
+        :rtype: devops.models.node.Node
+        """
+        mac = self._mac(mac_address)
+        with self.__lock:
+            if self.__devops_by_mac is None or mac not in self.__devops_by_mac:
+                self.__devops_by_mac = {
+                    self._mac(iface.mac_address): node
+                    for node in self.__d_env_getter().nodes()
+                    for iface in node.interfaces}
+            return self.__devops_by_mac.get(mac)
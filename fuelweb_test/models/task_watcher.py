@@ -0,0 +1,250 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import division
+
+import time
+
+from devops.error import TimeoutError
+
+from fuelweb_test import logger
+from fuelweb_test.settings import TASK_WATCHER_MAX_INTERVAL
+from fuelweb_test.settings import TASK_WATCHER_MIN_INTERVAL
+
+
+class TaskFuture(object):
+    """Pending result of nailgun task
+
+    Future is done, when task status is one of expected states or task
+    progress reached expected value. Futures are resolved by
+    TaskWatcher.wait(), callbacks are called from it.
+    """
+
+    def __init__(self, watcher, task, states=None, progress=None):
+        """
+
+        :param watcher: TaskWatcher
+        :param task: dict, nailgun task
+        :param states: statuses to wait for, ('ready', 'error') by default
+        :param progress: int, progress to wait for instead of status
+        """
+        self.__watcher = watcher
+        self.task = task
+        self.states = states or ('ready', 'error')
+        self.progress = progress
+        self.started = time.time()
+        self.finished = None
+        # (status, progress, time observed) for every observed change
+        self.transitions = [(task.get('status'), task.get('progress'),
+                             self.started)]
+        self.__callbacks = []
+
+    def __repr__(self):
+        return '{cls}(id={id}, name={name!r}, status={status!r})'.format(
+            cls=self.__class__.__name__,
+            id=self.task_id,
+            name=self.task.get('name'),
+            status=self.task.get('status'))
+
+    @property
+    def task_id(self):
+        return self.task['id']
+
+    def done(self):
+        return self.finished is not None
+
+    def _is_completed(self, task):
+        if self.progress is not None:
+            return (task['status'] == 'error' or
+                    (task.get('progress') or 0) >= self.progress)
+        return task['status'] in self.states
+
+    def add_done_callback(self, func):
+        """Call func(future) when future is done
+
+        :param func: callable
+        """
+        if self.done():
+            func(self)
+        else:
+            self.__callbacks.append(func)
+
+    def result(self, timeout, interval=TASK_WATCHER_MAX_INTERVAL):
+        """Wait for future and return the last observed task
+
+        :param timeout: int, seconds
+        :param interval: int, maximal polling interval
+        :rtype: dict
+        """
+        self.__watcher.wait([self], timeout=timeout, interval=interval)
+        return self.task
+
+    def update(self, task, now):
+        """Save observed task state
+
+        :return: True if task status or progress was changed
+        """
+        changed = (task.get('status'), task.get('progress')) != \
+            self.transitions[-1][:2]
+        self.task = task
+        if changed:
+            self.transitions.append(
+                (task.get('status'), task.get('progress'), now))
+            logger.debug('Task {0!r} (id={1}): status {2!r}, progress {3} '
+                         'after {4:.1f} seconds'.format(
+                             task.get('name'), self.task_id,
+                             task.get('status'), task.get('progress'),
+                             now - self.started))
+        if self._is_completed(task):
+            self.finished = now
+            self.__watcher.forget(self)
+            for func in self.__callbacks:
+                func(self)
+            self.__callbacks = []
+        return changed
+
+    def eta(self):
+        """Estimate seconds to completion from observed progress rate
+
+        :rtype: float or None if progress is not changed
+        """
+        first, last = self.transitions[0], self.transitions[-1]
+        elapsed = last[2] - first[2]
+        done = (last[1] or 0) - (first[1] or 0)
+        if elapsed <= 0 or done <= 0:
+            return None
+        return max(0, (self.progress or 100) - (last[1] or 0)) * elapsed / done
+
+
+class TaskWatcher(object):
+    """Wait for many nailgun tasks with single polling loop
+
+    When more than one task is watched, all of them are taken from single
+    get_all_tasks_list() request. Polling interval is adapted to the tasks
+    progress rate: it is shortened when tasks are expected to finish soon
+    and grows up to the maximal interval while nothing changes.
+    """
+
+    def __init__(self, client, min_interval=TASK_WATCHER_MIN_INTERVAL,
+                 backoff=1.5):
+        """
+
+        :param client: NailgunClient
+        :param min_interval: int, minimal seconds between polls
+        :param backoff: float, interval multiplier while nothing changes
+        """
+        self.__client = client
+        self.min_interval = min_interval
+        self.backoff = backoff
+        self.__futures = {}
+
+    def __repr__(self):
+        return '{cls}(pending={pending})'.format(
+            cls=self.__class__.__name__,
+            pending=sorted(self.__futures))
+
+    def watch(self, task, states=None, progress=None):
+        """Start watching for task
+
+        :param task: dict, nailgun task
+        :param states: statuses to wait for, ('ready', 'error') by default
+        :param progress: int, progress to wait for instead of status
+        :rtype: TaskFuture
+        """
+        future = TaskFuture(self, task, states=states, progress=progress)
+        self.__futures.setdefault(future.task_id, []).append(future)
+        return future
+
+    def forget(self, future):
+        """Stop watching for future"""
+        futures = self.__futures.get(future.task_id, [])
+        if future in futures:
+            futures.remove(future)
+        if not futures:
+            self.__futures.pop(future.task_id, None)
+
+    def _get_tasks(self):
+        """Get all watched tasks with minimal count of requests
+
+        :return: dict, {task_id: task}
+        """
+        if len(self.__futures) == 1:
+            task_id = list(self.__futures)[0]
+            return {task_id: self.__client.get_task(task_id)}
+        tasks = {task['id']: task
+                 for task in self.__client.get_all_tasks_list()
+                 if task['id'] in self.__futures}
+        for task_id in set(self.__futures) - set(tasks):
+            # task could be absent in transactions list
+            tasks[task_id] = self.__client.get_task(task_id)
+        return tasks
+
+    def poll(self):
+        """Get tasks once and resolve completed futures
+
+        :return: True if status or progress of any task was changed
+        """
+        tasks = self._get_tasks()
+        now = time.time()
+        changed = False
+        for task_id, task in tasks.items():
+            for future in list(self.__futures.get(task_id, [])):
+                changed = future.update(task, now) or changed
+        return changed
+
+    def _next_interval(self, futures, interval, max_interval, changed):
+        if not changed:
+            return min(max(interval, self.min_interval) * self.backoff,
+                       max_interval)
+        etas = [future.eta() for future in futures if not future.done()]
+        etas = [eta for eta in etas if eta is not None]
+        if not etas:
+            return self.min_interval
+        # poll twice before expected completion
+        return min(max(min(etas) / 2, self.min_interval), max_interval)
+
+    def wait(self, futures, timeout, interval=TASK_WATCHER_MAX_INTERVAL,
+             timeout_msg=None):
+        """Poll tasks until all futures are done
+
+        :param futures: list of TaskFuture
+        :param timeout: int, seconds
+        :param interval: int, maximal seconds between polls
+        :param timeout_msg: str, message of TimeoutError
+        :return: list of tasks of futures
+        :raises: TimeoutError
+        """
+        deadline = time.time() + timeout
+        current = self.min_interval
+        try:
+            while not all(future.done() for future in futures):
+                changed = self.poll()
+                if all(future.done() for future in futures):
+                    break
+                left = deadline - time.time()
+                if left <= 0:
+                    raise TimeoutError(
+                        timeout_msg or
+                        'Waiting tasks {0} timeout {1} sec was exceeded'
+                        .format([future.task.get('name') for future in futures
+                                 if not future.done()],
+                                timeout))
+                current = self._next_interval(futures, current, interval,
+                                              changed)
+                time.sleep(min(current, left))
+        finally:
+            # e.g. request error or interrupt: don't poll abandoned tasks
+            for future in futures:
+                self.forget(future)
+        return [future.task for future in futures]
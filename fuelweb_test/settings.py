@@ -76,6 +76,11 @@ PATH_TO_CERT = os.environ.get('PATH_TO_CERT', os.path.join(
     SSL_CERTS_DIR, 'ca.crt'))
 PATH_TO_PEM = os.environ.get('PATH_TO_PEM', os.path.join(
     SSL_CERTS_DIR, 'ca.pem'))
+# Share keystone sessions of OpenStack clients with the same credentials
+KEYSTONE_SESSIONS_CACHE = get_var_as_bool('KEYSTONE_SESSIONS_CACHE', True)
+# Size of HTTP connections pool of keystone session per host
+KEYSTONE_SESSION_POOL_SIZE = int(
+    os.environ.get('KEYSTONE_SESSION_POOL_SIZE', 10))
 
 OPENSTACK_RELEASE_CENTOS = 'centos'
 OPENSTACK_RELEASE_UBUNTU = os.environ.get('OPENSTACK_RELEASE_UBUNTU',
@@ -101,6 +106,10 @@ DEPLOYMENT_MODE = os.environ.get("DEPLOYMENT_MODE", DEPLOYMENT_MODE_HA)
 DEPLOYMENT_TIMEOUT = int(os.environ.get("DEPLOYMENT_TIMEOUT", 7800))
 DEPLOYMENT_RETRIES = int(os.environ.get("DEPLOYMENT_RETRIES", 1))
 BOOTSTRAP_TIMEOUT = int(os.environ.get("BOOTSTRAP_TIMEOUT", 900))
+# Delay between starts of slave nodes, seconds (LP#1317213)
+BOOTSTRAP_START_STAGGER = float(os.environ.get("BOOTSTRAP_START_STAGGER", 1))
+# Interval between polls of nailgun nodes while slaves are registered
+BOOTSTRAP_POLL_INTERVAL = int(os.environ.get("BOOTSTRAP_POLL_INTERVAL", 5))
 WAIT_FOR_PROVISIONING_TIMEOUT = int(os.environ.get(
     "WAIT_FOR_PROVISIONING_TIMEOUT", 1200))
 
@@ -422,8 +431,25 @@ DEPLOYMENT_NAME = os.environ.get('DEPLOYMENT_NAME')
 TIMEOUT = int(os.environ.get('TIMEOUT', 60))
 ATTEMPTS = int(os.environ.get('ATTEMPTS', 5))
 
+# Seconds to reuse the nailgun nodes list for devops<->nailgun lookups
+NAILGUN_NODES_INDEX_TTL = int(os.environ.get('NAILGUN_NODES_INDEX_TTL', 5))
+# Max count of concurrent nailgun requests for per-node resources
+NAILGUN_PARALLEL_REQUESTS = int(
+    os.environ.get('NAILGUN_PARALLEL_REQUESTS', 10))
+
+# Bounds of adaptive polling interval of nailgun tasks, seconds
+TASK_WATCHER_MIN_INTERVAL = int(
+    os.environ.get('TASK_WATCHER_MIN_INTERVAL', 1))
+TASK_WATCHER_MAX_INTERVAL = int(
+    os.environ.get('TASK_WATCHER_MAX_INTERVAL', 30))
+
 # Create snapshots as last step in test-case
 MAKE_SNAPSHOT = get_var_as_bool('MAKE_SNAPSHOT', False)
+# Don't revert snapshot which was made just before and is not changed since.
+# Environment changes made not through EnvironmentModel are not tracked.
+SKIP_REDUNDANT_REVERT = get_var_as_bool('SKIP_REDUNDANT_REVERT', False)
+# Average seconds of snapshot revert, used to estimate time of test plan
+SNAPSHOT_REVERT_TIME = int(os.environ.get('SNAPSHOT_REVERT_TIME', 300))
 
 FUEL_SETTINGS_YAML = os.environ.get('FUEL_SETTINGS_YAML',
                                     '/etc/fuel/astute.yaml')
@@ -631,6 +657,23 @@ SSH_SLAVE_CREDENTIALS = {
     'sudo': get_var_as_bool('ENV_SLAVE_SUDO', True)
 }
 
+# Seconds to trust an active SSH connection without running a check command
+SSH_CONNECTION_CHECK_INTERVAL = int(os.environ.get(
+    'SSH_CONNECTION_CHECK_INTERVAL', 30))
+# Interval of SSH keepalive packets, 0 disables keepalive
+SSH_KEEPALIVE_INTERVAL = int(os.environ.get('SSH_KEEPALIVE_INTERVAL', 15))
+
+# Max count of simultaneous SSH sessions for SSHManager.*_many methods
+SSH_PARALLEL_WORKERS = int(os.environ.get('SSH_PARALLEL_WORKERS', 10))
+
+# Seconds to collect diagnostic artifacts (astute.yaml, facts) from one node
+ARTIFACTS_NODE_TIMEOUT = int(os.environ.get('ARTIFACTS_NODE_TIMEOUT', 120))
+
+# Receive buffer of LogServer socket (SO_RCVBUF), bytes
+LOG_SERVER_RCVBUF = int(os.environ.get('LOG_SERVER_RCVBUF', 4 * 1024 * 1024))
+# Max count of received syslog messages waiting for LogServer handlers
+LOG_SERVER_QUEUE_SIZE = int(os.environ.get('LOG_SERVER_QUEUE_SIZE', 100000))
+
 SSH_IMAGE_CREDENTIALS = {
     'username': os.environ.get('SSH_IMAGE_CREDENTIALS_LOGIN', "cirros"),
     'password': os.environ.get('SSH_IMAGE_CREDENTIALS_PASSWORD', "cubswin:)")
@@ -651,6 +694,10 @@ PATCHING_SNAPSHOT = os.environ.get("PATCHING_SNAPSHOT", None)
 PATCHING_CUSTOM_TEST = os.environ.get("PATCHING_CUSTOM_TEST", None)
 PATCHING_DISABLE_UPDATES = get_var_as_bool('PATCHING_DISABLE_UPDATES', False)
 PATCHING_RUN_RALLY = get_var_as_bool("PATCHING_RUN_RALLY", False)
+# sqlite cache of packages lists of patching repositories
+PATCHING_PACKAGES_INDEX = os.environ.get(
+    "PATCHING_PACKAGES_INDEX",
+    os.path.join(os.path.expanduser('~'), '.fuel-qa', 'packages_index.db'))
 
 DOWNLOAD_LINK = os.environ.get(
     'DOWNLOAD_LINK', 'http://ubuntu1.hti.pl/14.04.4/'
@@ -14,9 +14,15 @@
 
 from __future__ import unicode_literals
 
+import errno
+import json
+from multiprocessing.pool import ThreadPool
+import os
 import re
+import threading
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.packages.urllib3 import disable_warnings
 from simplejson.scanner import JSONDecodeError
 
@@ -27,12 +33,129 @@ from fuelweb_test.testrail.settings import logger
 disable_warnings()
 
 
+class JenkinsClient(object):
+    """Jenkins HTTP client with connection pool and cache of finished builds
+
+    Data of completed builds never changes, so it is stored on disk
+    in cache_dir/<job>/<build number>/<resource>.json and is not requested
+    again on next runs.
+    """
+
+    def __init__(self, url=JENKINS['url'], cache_dir=JENKINS['cache_dir'],
+                 workers=JENKINS['workers']):
+        """
+        :param url: str - Jenkins url
+        :param cache_dir: str - cache directory, empty value disables cache
+        :param workers: int - count of concurrent requests
+        """
+        self.url = url
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url):
+        """Request url using pooled session
+
+        :param url: str
+        :rtype: requests.Response
+        """
+        return self.session.get(url)
+
+    def _cache_path(self, name, number, resource):
+        resource = re.sub(r'[^\w.-]+', '_', resource)
+        return os.path.join(self.cache_dir, name, str(number),
+                            '{}.json'.format(resource))
+
+    def get_cached(self, name, number, resource):
+        """Get stored data of completed build
+
+        :param name: str - job name
+        :param number: int - build number
+        :param resource: str - name of stored data
+        :return: stored data or None
+        """
+        if not self.cache_dir:
+            return None
+        path = self._cache_path(name, number, resource)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def set_cached(self, name, number, resource, data):
+        """Store data of completed build
+
+        :param name: str - job name
+        :param number: int - build number
+        :param resource: str - name of stored data
+        :param data: json serializable data
+        """
+        if not self.cache_dir:
+            return
+        path = self._cache_path(name, number, resource)
+        try:
+            os.makedirs(os.path.dirname(path))
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        tmp_path = '{0}.{1}.tmp'.format(path, threading.current_thread().ident)
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.rename(tmp_path, path)
+
+    def map(self, func, items):
+        """Call func for every item concurrently
+
+        :param func: callable with single argument
+        :param items: iterable
+        :return: list of results in order of items
+        """
+        items = list(items)
+        if len(items) < 2 or self.workers < 2:
+            return [func(item) for item in items]
+        pool = ThreadPool(min(self.workers, len(items)))
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.close()
+            pool.join()
+
+    def get_builds(self, builds):
+        """Get several builds concurrently
+
+        :param builds: iterable of (job name, build number) pairs
+        :return: list of Build
+        """
+        return self.map(
+            lambda build: Build(build[0], build[1], client=self), builds)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_jenkins_client():
+    """Return JenkinsClient shared by all builds
+
+    :rtype: JenkinsClient
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = JenkinsClient()
+        return _client
+
+
 def get_jobs_for_view(view):
     """Return list of jobs from specified view
     """
     view_url = "/".join([JENKINS["url"], 'view', view, 'api/json'])
     logger.debug("Request view data from {}".format(view_url))
-    view_data = requests.get(view_url).json()
+    view_data = get_jenkins_client().get(view_url).json()
     jobs = [job["name"] for job in view_data["jobs"]]
     return jobs
 
@@ -42,21 +165,20 @@ def get_downstream_builds_from_html(url):
     """
     url = "/".join([url, 'downstreambuildview/'])
     logger.debug("Request downstream builds data from {}".format(url))
-    response = requests.get(url).text
-    jobs = []
+    client = get_jenkins_client()
+    response = client.get(url).text
     raw_downstream_builds = re.findall(
         '.*downstream-buildview.*href="(/job/\S+/[0-9]+/).*', response)
-    for raw_build in raw_downstream_builds:
-        sub_job_name = raw_build.split('/')[2]
-        sub_job_build = raw_build.split('/')[3]
-        build = Build(name=sub_job_name, number=sub_job_build)
-        jobs.append(
-            {
-                'name': build.name,
-                'number': build.number,
-                'result': build.build_data['result']
-            }
-        )
+    builds = client.get_builds(
+        (raw_build.split('/')[2], raw_build.split('/')[3])
+        for raw_build in raw_downstream_builds)
+    jobs = [
+        {
+            'name': build.name,
+            'number': build.number,
+            'result': build.build_data['result']
+        }
+        for build in builds]
 
     return jobs
 
@@ -66,18 +188,20 @@ def get_build_artifact(url, artifact):
     """
     url = "/".join([url, 'artifact', artifact])
     logger.debug("Request artifact content from {}".format(url))
-    return requests.get(url).text
+    return get_jenkins_client().get(url).text
 
 
 class Build(object):
-    def __init__(self, name, number):
+    def __init__(self, name, number, client=None):
         """Get build info via Jenkins API, get test info via direct HTTP
         request.
 
         If number is 'latest', get latest completed build.
+        Data of completed builds is taken from the client cache.
         """
 
         self.name = name
+        self.client = client or get_jenkins_client()
         self._job_info = None
         self._injected_vars = None
         if number == 'latest':
@@ -89,12 +213,40 @@ class Build(object):
         else:
             self.number = int(number)
 
-        self._injected_vars = self.get_injected_vars(
-            depth=0, build_number=self.number)
-
-        self.build_data = self.get_build_data(depth=0)
+        self.build_data = self.client.get_cached(
+            self.name, self.number, 'build_data')
+        if self.build_data is None:
+            self.build_data = self.get_build_data(depth=0)
+            if self.completed:
+                self.client.set_cached(
+                    self.name, self.number, 'build_data', self.build_data)
         self.url = self.build_data["url"]
 
+        self._injected_vars = self.client.get_cached(
+            self.name, self.number, 'injected_vars')
+        if self._injected_vars is None:
+            self._injected_vars = self.get_injected_vars(
+                depth=0, build_number=self.number)
+            # empty list is returned if variables failed to be decoded
+            if self.completed and self._injected_vars:
+                self.client.set_cached(self.name, self.number,
+                                       'injected_vars', self._injected_vars)
+
+    @property
+    def completed(self):
+        """Build is finished, so its data will not change"""
+        return (not self.build_data.get('building') and
+                self.build_data.get('result') is not None)
+
+    def _cached(self, resource, getter):
+        data = self.client.get_cached(self.name, self.number, resource)
+        if data is not None:
+            return data
+        data = getter()
+        if self.completed:
+            self.client.set_cached(self.name, self.number, resource, data)
+        return data
+
     @property
     def job_info(self):
         return self._job_info
@@ -103,7 +255,7 @@ class Build(object):
         job_url = "/".join([JENKINS["url"], 'job', self.name,
                             'api/json?depth={depth}'.format(depth=depth)])
         logger.debug("Request job info from {}".format(job_url))
-        return requests.get(job_url).json()
+        return self.client.get(job_url).json()
 
     @property
     def injected_vars(self):
@@ -117,7 +269,7 @@ class Build(object):
                             'api/json?depth={depth}'.format(depth=depth)])
         logger.debug("Request injected variables from job {}".format(job_url))
         try:
-            result = requests.get(job_url).json()
+            result = self.client.get(job_url).json()
         except JSONDecodeError:
             logger.debug(
                 "Failed to decode injected variables from job {}".format(
@@ -129,7 +281,18 @@ class Build(object):
         job_url = "/".join([JENKINS["url"], 'job', self.name,
                             str(self.number), 'consoleText'])
         logger.debug("Request job console from {}".format(job_url))
-        return requests.get(job_url).text
+        return self.client.get(job_url).text
+
+    def get_artifact(self, artifact, url=None):
+        """Return content of build artifact
+
+        :param artifact: str - relative path of artifact
+        :param url: str - build url, build_data url is used by default
+        :rtype: str
+        """
+        return self._cached(
+            'artifact_{}'.format(artifact),
+            lambda: get_build_artifact(url or self.url.rstrip('/'), artifact))
 
     def get_build_data(self, depth=1):
         build_url = "/".join([JENKINS["url"], 'job',
@@ -137,7 +300,7 @@ class Build(object):
                               str(self.number),
                               'api/json?depth={depth}'.format(depth=depth)])
         logger.debug("Request build data from {}".format(build_url))
-        return requests.get(build_url).json()
+        return self.client.get(build_url).json()
 
     @staticmethod
     def get_test_data(url, result_path=None):
@@ -148,11 +311,13 @@ class Build(object):
             test_url = "/".join([url.rstrip("/"), 'testReport', 'api/json'])
 
         logger.debug("Request test data from {}".format(test_url))
-        return requests.get(test_url).json()
+        return get_jenkins_client().get(test_url).json()
 
     def test_data(self, result_path=None):
         try:
-            data = self.get_test_data(self.url, result_path)
+            data = self._cached(
+                '_'.join(['test_data'] + (result_path or [])),
+                lambda: self.get_test_data(self.url, result_path))
         except Exception as e:
             logger.warning("No test data for {0}: {1}".format(
                 self.url,
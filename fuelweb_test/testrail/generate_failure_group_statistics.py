@@ -17,17 +17,22 @@
 
 from __future__ import division
 import argparse
+from collections import defaultdict
 import hashlib
+import itertools
 import json
+import random
 import re
 import sys
+import time
+import zlib
 from logging import CRITICAL
 from logging import DEBUG
 
 import tablib
 import xmltodict
 from fuelweb_test.testrail.builds import Build
-from fuelweb_test.testrail.builds import get_build_artifact
+from fuelweb_test.testrail.builds import get_jenkins_client
 from fuelweb_test.testrail.launchpad_client import LaunchpadBug
 from fuelweb_test.testrail.report import get_version
 from fuelweb_test.testrail.settings import FAILURE_GROUPING
@@ -81,6 +86,27 @@ def make_cleanup(input_string):
     return stmp
 
 
+_cleanup_cache = {}
+
+
+def cached_cleanup(input_string):
+    """clean up string with make_cleanup, caching results by sha of input
+
+    The same failure messages are repeated across many sub builds,
+    so every unique message is cleaned only once.
+
+    :param input_string: str - input string
+    :return: s after regexp and clean up
+    """
+    if isinstance(input_string, bytes):
+        sha = get_sha(input_string)
+    else:
+        sha = get_sha(input_string.encode('utf-8'))
+    if sha not in _cleanup_cache:
+        _cleanup_cache[sha] = make_cleanup(input_string)
+    return _cleanup_cache[sha]
+
+
 def distance(astr, bstr):
     """Calculates the Levenshtein distance between a and b
 
@@ -106,6 +132,163 @@ def distance(astr, bstr):
     return current_row[alen]
 
 
+def bounded_distance(astr, bstr, max_distance):
+    """Calculates the Levenshtein distance if it does not exceed max_distance
+
+    Only the band of width 2 * max_distance + 1 around the diagonal
+    is calculated and calculation stops as soon as the whole band
+    exceeds max_distance.
+
+    :param astr: str - input string
+    :param bstr: str - input string
+    :param max_distance: int - maximal distance of interest
+    :return: distance: int - distance between astr and bstr or
+             max_distance + 1 if the distance is greater than max_distance
+    """
+
+    alen, blen = len(astr), len(bstr)
+    if alen > blen:
+        astr, bstr = bstr, astr
+        alen, blen = blen, alen
+    over = max_distance + 1
+    if blen - alen > max_distance:
+        return over
+    current_row = [j if j <= max_distance else over for j in range(alen + 1)]
+    for i in range(1, blen + 1):
+        previous_row, current_row = current_row, [over] * (alen + 1)
+        current_row[0] = i if i <= max_distance else over
+        low, high = max(1, i - max_distance), min(alen, i + max_distance)
+        for j in range(low, high + 1):
+            change = previous_row[j - 1]
+            if astr[j - 1] != bstr[i - 1]:
+                change += 1
+            current_row[j] = min(previous_row[j] + 1,
+                                 current_row[j - 1] + 1,
+                                 change,
+                                 over)
+        if min(current_row[low - 1:high + 1]) > max_distance:
+            return over
+    return current_row[alen]
+
+
+def is_len_diff_exceeded(astr, bstr,
+                         max_len_diff=FAILURE_GROUPING.get('max_len_diff')):
+    """Check that lengths of strings differ more than max_len_diff
+
+    :param astr: str - input string
+    :param bstr: str - input string
+    :param max_len_diff: float - maximal relative difference of lengths
+    :return: bool
+    """
+    return abs(len(astr) - len(bstr)) > \
+        max_len_diff * max(len(astr), len(bstr))
+
+
+def group_by_levenshtein(failures, threshold):
+    """ Group similar failures comparing every pair of them
+
+    Every failure, which is not grouped yet, becomes a group and takes
+    all following failures with normalized Levenshtein distance to it
+    less than threshold.
+
+    :param failures: list of str - ordered failure strings
+    :param threshold: float - threshold
+    :return: groups: dict - {failure: [grouped failures]}
+    """
+    groups = {}
+    grouped = set()
+    for num1, key1 in enumerate(failures):
+        if key1 in grouped:
+            continue
+        for key2 in failures[num1 + 1:]:
+            # let's skip grouping if len are different more 10%
+            if key2 in grouped or is_len_diff_exceeded(key1, key2):
+                continue
+            # let's find other failures which can be grouped
+            # if normalized Levenshtein distance less threshold
+            llen = distance(key1, key2)
+            if float(llen) / max(len(key1), len(key2)) < threshold:
+                groups.setdefault(key1, []).append(key2)
+                grouped.add(key2)
+    return groups
+
+
+def minhash_signature(string,
+                      size=FAILURE_GROUPING.get('bands') *
+                      FAILURE_GROUPING.get('rows'),
+                      shingle_size=FAILURE_GROUPING.get('shingle_size')):
+    """ Calculate MinHash signature of string shingles
+
+    One permutation hashing is used: every shingle is hashed once and
+    falls into one of size bins, the minimal hash is kept for every bin.
+
+    :param string: str - input string
+    :param size: int - count of signature values
+    :param shingle_size: int - length of character n-grams
+    :return: signature: tuple of int
+    """
+    if isinstance(string, bytes):
+        data = string
+    else:
+        data = string.encode('utf-8')
+    signature = [None] * size
+    for start in range(max(1, len(data) - shingle_size + 1)):
+        value = zlib.crc32(data[start:start + shingle_size]) & 0xffffffff
+        pos, value = value % size, value // size
+        if signature[pos] is None or value < signature[pos]:
+            signature[pos] = value
+    return tuple(signature)
+
+
+def group_by_lsh(failures, threshold,
+                 bands=FAILURE_GROUPING.get('bands'),
+                 rows=FAILURE_GROUPING.get('rows')):
+    """ Group similar failures comparing only candidate pairs
+
+    Candidate pairs are failures with equal rows of MinHash signature
+    in any of bands (locality sensitive hashing). Candidates are
+    confirmed with banded Levenshtein distance, so the grouping rule is
+    the same as in group_by_levenshtein.
+
+    :param failures: list of str - ordered failure strings
+    :param threshold: float - threshold
+    :param bands: int - count of LSH bands
+    :param rows: int - count of signature values in every band
+    :return: groups: dict - {failure: [grouped failures]}
+    """
+    order = {key: num for num, key in enumerate(failures)}
+    buckets = defaultdict(list)
+    for key in failures:
+        signature = minhash_signature(key, size=bands * rows)
+        for band in range(bands):
+            buckets[(band,) + signature[band * rows:(band + 1) * rows]]\
+                .append(key)
+    candidates = defaultdict(set)
+    for bucket in buckets.values():
+        for key1, key2 in itertools.combinations(bucket, 2):
+            candidates[key1].add(key2)
+    groups = {}
+    grouped = set()
+    for key1 in failures:
+        if key1 in grouped:
+            continue
+        for key2 in sorted(candidates[key1], key=order.get):
+            if key2 in grouped or is_len_diff_exceeded(key1, key2):
+                continue
+            max_len = max(len(key1), len(key2))
+            llen = bounded_distance(key1, key2, int(threshold * max_len))
+            if float(llen) / max_len < threshold:
+                groups.setdefault(key1, []).append(key2)
+                grouped.add(key2)
+    return groups
+
+
+GROUPING_ENGINES = {
+    'levenshtein': group_by_levenshtein,
+    'lsh': group_by_lsh,
+}
+
+
 def get_bugs(subbuilds, testraildata):
     """Get bugs of failed tests
 
@@ -297,7 +480,7 @@ def get_build_test_data(build_number, job_name,
     logger.info('Getting subbuild {} {}'.format(job_name,
                                                 build_number))
     runner_build = Build(job_name, build_number)
-    buildinfo = runner_build.get_build_data(depth=0)
+    buildinfo = runner_build.build_data
     if not buildinfo:
         logger.error('Getting subbuilds info is failed. '
                      'Job={} Build={}'.format(job_name, build_number))
@@ -308,7 +491,7 @@ def get_build_test_data(build_number, job_name,
                           v == JENKINS.get('xml_testresult_file_name')][0]
         artifact_url = "/".join([jenkins_url, 'job', job_name,
                                  str(build_number)])
-        xdata = get_build_artifact(artifact_url, artifact_paths)
+        xdata = runner_build.get_artifact(artifact_paths, url=artifact_url)
         test_data = xmltodict.parse(xdata, xml_attribs=True)
         test_data.update({'build_number': build_number,
                           'job_name': job_name,
@@ -358,7 +541,7 @@ def get_build_failure_reasons(test_data):
                                          'message',
                                          test.get('skipped').get('@message')])
         if failure_reason:
-            failure_reason_cleanup = make_cleanup(failure_reason)
+            failure_reason_cleanup = cached_cleanup(failure_reason)
             failure_reasons.append({'failure': failure_reason_cleanup,
                                     'failure_origin': failure_reason,
                                     'test': test.get('@classname'),
@@ -392,15 +575,17 @@ def get_sub_builds(build_number, job_name=JENKINS.get('job_name'),
     """
 
     runner_build = Build(job_name, build_number)
-    parent_build_info = runner_build.get_build_data(depth=0)
+    parent_build_info = runner_build.build_data
     sub_builds = None
     if parent_build_info:
         sub_builds = parent_build_info.get('subBuilds')
     if sub_builds:
-        for i in sub_builds:
-            test_data = get_build_test_data(i.get('buildNumber'),
-                                            i.get('jobName'),
-                                            jenkins_url)
+        sub_builds_test_data = get_jenkins_client().map(
+            lambda i: get_build_test_data(i.get('buildNumber'),
+                                          i.get('jobName'),
+                                          jenkins_url),
+            sub_builds)
+        for i, test_data in zip(sub_builds, sub_builds_test_data):
             if test_data:
                 i.update({'test_data': test_data})
                 i.update({'description': test_data.get('job_description')})
@@ -410,11 +595,13 @@ def get_sub_builds(build_number, job_name=JENKINS.get('job_name'),
 
 
 def get_global_failure_group_list(
-        sub_builds, threshold=FAILURE_GROUPING.get('threshold')):
+        sub_builds, threshold=FAILURE_GROUPING.get('threshold'),
+        engine=FAILURE_GROUPING.get('engine')):
     """ Filter out and grouping of all failure reasons across all tests
 
     :param sub_builds: list of dict per each subbuild
     :param threshold: float -threshold
+    :param engine: str - grouping engine name, key of GROUPING_ENGINES
     :return: (failure_group_dict, failure_reasons): tuple or () otherwise
               where:
               failure_group_dict(all failure groups and
@@ -440,27 +627,66 @@ def get_global_failure_group_list(
                 failure_group_dict[key] = []
             failure_group_dict[key].append(failure)
     # let's find Levenshtein distance and update failure_group_dict
-    for num1, key1 in enumerate(failure_group_dict):
-        # pylint: disable=C0201
-        for key2 in failure_group_dict.keys()[num1 + 1:]:
-            # let's skip grouping if len are different more 10%
-            if key1 == key2 or abs(float(len(key1) / len(key2))) >\
-                    FAILURE_GROUPING.get('max_len_diff'):
-                continue
-            # let's find other failures which can be grouped
-            # if normalized Levenshtein distance less threshold
-            llen = distance(key1, key2)
-            cal_threshold = float(llen) / max(len(key1), len(key2))
-            if cal_threshold < threshold:
-                # seems we shall combine those groups to one
-                failure_group_dict[key1].extend(failure_group_dict[key2])
-                logger.info("Those groups are going to be combined"
-                            " due to Levenshtein distance\n"
-                            " {}\n{}".format(key1, key2))
-                del failure_group_dict[key2]
+    groups = GROUPING_ENGINES[engine](sorted(failure_group_dict), threshold)
+    for key1, keys in groups.items():
+        for key2 in keys:
+            # seems we shall combine those groups to one
+            failure_group_dict[key1].extend(failure_group_dict.pop(key2))
+            logger.info("Those groups are going to be combined"
+                        " due to Levenshtein distance\n"
+                        " {}\n{}".format(key1, key2))
     return failure_group_dict, failure_reasons
 
 
+def generate_failures(count, variants=3, seed=0):
+    """ Generate synthetic failure strings for grouping benchmark
+
+    :param count: int - count of different failures
+    :param variants: int - count of slightly changed copies of each failure
+    :param seed: int - seed of random generator
+    :return: failures: list of str
+    """
+    rand = random.Random(seed)
+    words = ['node', 'task', 'deployment', 'timeout', 'failed', 'cluster',
+             'controller', 'puppet', 'error', 'service', 'is', 'not',
+             'ready', 'waiting', 'for', 'exceeded', 'status', 'network']
+    failures = []
+    for _ in range(count):
+        message = ' '.join(rand.choice(words)
+                           for _ in range(rand.randint(20, 60)))
+        failure = 'failure___type___AssertionError___message___' + message
+        failures.append(failure)
+        for _ in range(variants):
+            variant = list(failure)
+            for _ in range(max(1, len(variant) // 200)):
+                variant[rand.randrange(len(variant))] = rand.choice('abcxyz')
+            failures.append(''.join(variant))
+    return failures
+
+
+def benchmark_grouping(count, threshold=FAILURE_GROUPING.get('threshold')):
+    """ Compare grouping engines on the synthetic failures
+
+    :param count: int - count of different failures
+    :param threshold: float - threshold
+    :return: None
+    """
+    failures = sorted(set(generate_failures(count)))
+    results = {}
+    for engine in sorted(GROUPING_ENGINES):
+        start = time.time()
+        groups = GROUPING_ENGINES[engine](failures, threshold)
+        took = time.time() - start
+        grouped = sum(len(keys) for keys in groups.values())
+        results[engine] = groups
+        logger.info('Engine {0}: {1} failures, {2} groups, {3:.3f}s'.format(
+            engine, len(failures), len(failures) - grouped, took))
+    for engine in sorted(GROUPING_ENGINES):
+        if results[engine] != results['levenshtein']:
+            logger.info('Engine {0} grouping differs from '
+                        'levenshtein'.format(engine))
+
+
 def update_subbuilds_failuregroup(sub_builds, failure_group_dict,
                                   testrail_testdata, bugs):
     """ update subbuilds by TestRail and Launchpad info
@@ -768,12 +994,23 @@ def main():
                              'Overrides "--verbose" option.')
     parser.add_argument("-v", "--verbose", action="store_true",
                         help="Enable debug logging.")
+    parser.add_argument('-g', '--grouping', type=str, dest='engine',
+                        choices=sorted(GROUPING_ENGINES),
+                        default=FAILURE_GROUPING.get('engine'),
+                        help='Failure grouping engine')
+    parser.add_argument('-b', '--benchmark', type=int, dest='benchmark',
+                        metavar='COUNT',
+                        help='Compare grouping engines on COUNT synthetic '
+                             'failures and exit')
     args = parser.parse_args()
 
     if args.verbose:
         logger.setLevel(DEBUG)
     if args.quiet:
         logger.setLevel(CRITICAL)
+    if args.benchmark:
+        benchmark_grouping(args.benchmark)
+        return 0
     if args.formatfile and\
        args.formatfile not in ['json', 'html', 'xls', 'xlsx', 'yaml', 'csv']:
         logger.info('Not supported format output. Exit')
@@ -793,7 +1030,8 @@ def main():
     logger.info('{} Subbuilds have been found'.format(len(subbuilds)))
 
     logger.info('Calculating failure groups')
-    failure_gd = get_global_failure_group_list(subbuilds)[0]
+    failure_gd = get_global_failure_group_list(subbuilds,
+                                               engine=args.engine)[0]
     if not failure_gd:
         logger.error('Necessary failure grpoup info are absent. Exit')
         return 4
@@ -36,6 +36,8 @@ from fuelweb_test.testrail.settings import logger
 from fuelweb_test.testrail.settings import TestRailSettings
 from fuelweb_test.testrail.testrail_client import TestRailProject
 
+BLOCKED_BY_RE = re.compile(r'Blocked by "(\S+)" test.')
+
 
 def inspect_bug(bug):
     # Return target which matches defined in settings project/milestone and
@@ -75,8 +77,10 @@ class TestRunStatistics(object):
     """Statistics for attached bugs in TestRun
     """
 
-    def __init__(self, project, run_id, check_blocked=False):
+    def __init__(self, project, run_id, check_blocked=False, parallel=True):
         self.project = project
+        # pages of results are requested concurrently if parallel
+        self.parallel = parallel
         self.run = self.project.get_run(run_id)
         self.tests = self.project.get_tests(run_id)
         self.results = self.get_results()
@@ -90,25 +94,26 @@ class TestRunStatistics(object):
                                 for s in TestRailSettings.stauses['failed']]
         self.check_blocked = check_blocked
         self._bugs_statistics = {}
+        # Indexes built once: test id -> run results, group -> test
+        self.results_by_test = {}
+        for result in self.results:
+            self.results_by_test.setdefault(result['test_id'], []).append(
+                result)
+        self.tests_by_group = {}
+        for test in self.tests:
+            self.tests_by_group.setdefault(test['custom_test_group'], test)
+        # All results of tests which blocked other tests, by test id
+        self.blocking_results = {}
 
     def __getitem__(self, item):
         return self.run.__getitem__(item)
 
     def get_results(self):
-        results = []
-        stop = 0
-        offset = 0
-        while not stop:
-            new_results = self.project.get_results_for_run(
-                self.run['id'],
-                limit=TestRailSettings.max_results_per_request,
-                offset=offset)
-            results += new_results
-            offset += len(new_results)
-            stop = TestRailSettings.max_results_per_request - len(new_results)
-        return results
+        return list(self.project.iter_results_for_run(
+            self.run['id'], parallel=self.parallel))
 
-    def get_test_by_group(self, group, version):
+    @staticmethod
+    def _expand_group(group, version):
         if group in GROUPS_TO_EXPAND:
             m = re.search(r'^\d+_(\S+)_on_[\d\.]+', version)
             if m:
@@ -119,15 +124,63 @@ class TestRunStatistics(object):
                 group,
                 TestRailSettings.extra_factor_of_tc_definition
             )
-        for test in self.tests:
-            if test['custom_test_group'] == group:
-                return test
+        return group
+
+    def get_test_by_group(self, group, version):
+        group = self._expand_group(group, version)
+        if group in self.tests_by_group:
+            return self.tests_by_group[group]
         logger.error('Test with group "{0}" not found!'.format(group))
 
+    def get_blocking_results(self, test_ids):
+        """Get all results of tests by concurrent requests
+
+        Results are requested once per test and are reused by following
+        calls.
+
+        :param test_ids: iterable of test ids
+        :return: dict, {test id: list of results}
+        """
+        missing = [test_id for test_id in set(test_ids)
+                   if test_id not in self.blocking_results]
+        self.blocking_results.update(zip(missing, self.project.map(
+            self.project.get_results_for_test, missing)))
+        return {test_id: self.blocking_results[test_id]
+                for test_id in test_ids}
+
+    def get_blocking_tests(self):
+        """Get ids of tests which blocked other tests of run
+
+        Tests with already requested results are skipped.
+
+        :return: set of test ids
+        """
+        test_ids = set()
+        for result in self.results:
+            if result['status_id'] not in self.blocked_statuses or \
+                    result['custom_launchpad_bug'] or not result['version']:
+                continue
+            m = BLOCKED_BY_RE.search(result['comment'] or '')
+            if not m:
+                continue
+            test = self.tests_by_group.get(
+                self._expand_group(m.group(1), result['version']))
+            if test and test['id'] not in self.blocking_results:
+                test_ids.add(test['id'])
+        return test_ids
+
+    def prefetch_blocking_results(self):
+        """Request results of all tests which blocked other tests at once"""
+        test_ids = self.get_blocking_tests()
+        if test_ids:
+            logger.debug('Requesting results of {0} blocking tests'.format(
+                len(test_ids)))
+            self.get_blocking_results(test_ids)
+
     def handle_blocked(self, test, result):
         if result['custom_launchpad_bug']:
             return False
-        m = re.search(r'Blocked by "(\S+)" test.', result['comment'] or '')
+        m = BLOCKED_BY_RE.search(result['comment'] or '')
         if m:
             blocked_test_group = m.group(1)
         else:
@@ -152,8 +205,8 @@ class TestRunStatistics(object):
         logger.debug('Test {0} was blocked by failed test {1}'.format(
             test['custom_test_group'], blocked_test_group))
 
-        blocked_results = self.project.get_results_for_test(
-            blocked_test['id'])
+        blocked_results = self.get_blocking_results(
+            [blocked_test['id']])[blocked_test['id']]
 
         # Since we manually add results to failed tests with statuses
         # ProdFailed, TestFailed, etc. and attach bugs links to them,
@@ -192,10 +245,13 @@ class TestRunStatistics(object):
         logger.info('Collecting stats for TestRun "{0}" on "{1}"...'.format(
             self.run['name'], self.run['config'] or 'default config'))
 
+        if self.check_blocked:
+            self.prefetch_blocking_results()
+
         for test in self.tests:
             logger.debug('Checking "{0}" test...'.format(test['title']))
             test_results = sorted(
-                self.project.get_results_for_test(test['id'], self.results),
+                self.results_by_test.get(test['id'], []),
                 key=lambda x: x['id'], reverse=True)
 
             linked_bugs = []
@@ -249,15 +305,38 @@ class StatisticsGenerator(object):
         self.test_plan = self.project.get_plan(plan_id)
         logger.info('Found TestPlan "{0}"'.format(self.test_plan['name']))
 
-        self.test_runs_stats = [
-            TestRunStatistics(self.project, r['id'], handle_blocked)
-            for e in self.test_plan['entries'] for r in e['runs']
-            if r['id'] in run_ids or len(run_ids) == 0
-        ]
+        run_ids = [r['id'] for e in self.test_plan['entries']
+                   for r in e['runs'] if r['id'] in run_ids or
+                   len(run_ids) == 0]
+        # Runs are requested concurrently, so every run requests pages of
+        # its results one by one to not nest the pools
+        parallel = len(run_ids) < 2
+        self.test_runs_stats = self.project.map(
+            lambda run_id: TestRunStatistics(self.project, run_id,
+                                             handle_blocked, parallel),
+            run_ids)
 
         self.bugs_statistics = {}
 
+    def prefetch_blocking_results(self):
+        """Request results of blocking tests of all runs at once
+
+        Runs don't request them by their own concurrent requests then.
+        """
+        pending = [(test_run, test_id) for test_run in self.test_runs_stats
+                   if test_run.check_blocked
+                   for test_id in test_run.get_blocking_tests()]
+        if not pending:
+            return
+        logger.debug('Requesting results of {0} blocking tests'.format(
+            len(pending)))
+        results = self.project.map(
+            lambda item: self.project.get_results_for_test(item[1]), pending)
+        for (test_run, test_id), test_results in zip(pending, results):
+            test_run.blocking_results[test_id] = test_results
+
     def generate(self):
+        self.prefetch_blocking_results()
         for test_run in self.test_runs_stats:
             test_run_stats = test_run.bugs_statistics
             self.bugs_statistics[test_run['id']] = dict()
@@ -526,6 +605,7 @@ def main():
                         else args.html)
                 save_stats_to_file(stats, file_name, html)
 
+    testrail_project.client.log_stats()
     logger.info('Statistics generation complete!')
 
 
@@ -26,6 +26,7 @@ from optparse import OptionParser
 from fuelweb_test.testrail.builds import Build
 from fuelweb_test.testrail.builds import get_build_artifact
 from fuelweb_test.testrail.builds import get_downstream_builds_from_html
+from fuelweb_test.testrail.builds import get_jenkins_client
 from fuelweb_test.testrail.builds import get_jobs_for_view
 from fuelweb_test.testrail.launchpad_client import LaunchpadBug
 from fuelweb_test.testrail.settings import JENKINS
@@ -439,14 +440,11 @@ def publish_results(project, milestone_id, test_plan,
         days_to_analyze=TestRailSettings.previous_results_days_to_analyze)
     logger.debug('Found next test runs: {0}'.format(
         [test_run['description'] for test_run in previous_tests_runs]))
-    cases = project.get_cases(suite_id=suite_id)
-    tests = project.get_tests(run_id=test_run_ids[0])
     results_to_publish = []
 
     for result in results:
         test = project.get_test_by_group(run_id=test_run_ids[0],
-                                         group=result.group,
-                                         tests=tests)
+                                         group=result.group)
         if not test:
             logger.error("Test for '{0}' group not found: {1}".format(
                 result.group, result.url))
@@ -457,8 +455,7 @@ def publish_results(project, milestone_id, test_plan,
             continue
         if result.status not in ('passed', 'blocked'):
             case_id = project.get_case_by_group(suite_id=suite_id,
-                                                group=result.group,
-                                                cases=cases)['id']
+                                                group=result.group)['id']
             run_ids = [run['id'] for run in previous_tests_runs[0:
                        int(TestRailSettings.previous_results_depth)]]
             previous_results = project.get_all_results_for_case(
@@ -591,6 +588,7 @@ def main():
                      " or Jenkins view with system tests jobs (-w). Exiting..")
         return
 
+    systest_builds = []
     for systest_build in tests_jobs:
         if (options.one_job_name and
                 options.one_job_name != systest_build['name']):
@@ -611,9 +609,15 @@ def main():
                 continue
         for os in tests_results.keys():
             if os in systest_build['name'].lower():
-                tests_results[os].extend(
-                    get_tests_results(systest_build, os,
-                                      options.force_rebuild_search))
+                systest_builds.append((systest_build, os))
+
+    # Builds are independent, so get their results concurrently
+    builds_results = get_jenkins_client().map(
+        lambda build: get_tests_results(build[0], build[1],
+                                        options.force_rebuild_search),
+        systest_builds)
+    for (_, os), results in zip(systest_builds, builds_results):
+        tests_results[os].extend(results)
 
     # STEP #3
     # Create new TestPlan in TestRail (or get existing) and add TestRuns
@@ -710,6 +714,7 @@ def main():
             os=os['name'], tests=[r.group for r in results_to_publish]
         ))
 
+    project.client.log_stats()
     logger.info('Report URL: {0}'.format(test_plan['url']))
 
 
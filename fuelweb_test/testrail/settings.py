@@ -38,14 +38,28 @@ JENKINS = {
     'password': os.environ.get('JENKINS_PASS', None),
     'job_name': os.environ.get('TEST_RUNNER_JOB_NAME', '9.0.swarm.runner'),
     'xml_testresult_file_name': os.environ.get('TEST_XML_RESULTS',
-                                               'nosetests.xml')
+                                               'nosetests.xml'),
+    # Data of completed builds is cached here, set empty value to disable
+    'cache_dir': os.environ.get('JENKINS_CACHE_DIR',
+                                os.path.join(LOGS_DIR, '.jenkins_cache')),
+    'workers': int(os.environ.get('JENKINS_WORKERS', 10)),
 }
 
 GROUPS_TO_EXPAND = [
     'setup_master', 'prepare_release', 'prepare_slaves_1', 'prepare_slaves_3',
     'prepare_slaves_5', 'prepare_slaves_9']
 
-FAILURE_GROUPING = {'threshold': 0.04, 'max_len_diff': 0.1}
+FAILURE_GROUPING = {
+    'threshold': 0.04,
+    'max_len_diff': 0.1,
+    # 'levenshtein' - compare every pair of failures,
+    # 'lsh' - compare only candidates found by MinHash LSH
+    'engine': os.environ.get('FAILURE_GROUPING_ENGINE', 'levenshtein'),
+    # MinHash LSH parameters: shingle size, bands count, rows per band
+    'shingle_size': 5,
+    'bands': 16,
+    'rows': 2,
+}
 
 
 class LaunchpadSettings(object):
@@ -91,6 +105,19 @@ class TestRailSettings(object):
         'blocked': ['blocked']
     }
     max_results_per_request = 250
+    # Count of concurrent requests to TestRail
+    workers = int(os.environ.get('TESTRAIL_WORKERS', 10))
+    # Count of pages of paginated request fetched concurrently
+    pages_in_flight = int(os.environ.get('TESTRAIL_PAGES_IN_FLIGHT', 4))
+    # Size of HTTP connections pool and timeouts of requests, seconds
+    pool_size = int(os.environ.get('TESTRAIL_POOL_SIZE', 10))
+    connect_timeout = float(os.environ.get('TESTRAIL_CONNECT_TIMEOUT', 10))
+    read_timeout = float(os.environ.get('TESTRAIL_READ_TIMEOUT', 300))
+    # Hashes of test cases synced by delta upload of cases descriptions
+    cases_manifest = os.environ.get(
+        'TESTRAIL_CASES_MANIFEST',
+        os.path.join(os.path.expanduser('~'), '.fuel-qa',
+                     'testrail_cases.json'))
 
     extra_factor_of_tc_definition = os.environ.get(
         'EXTRA_FACTOR_OF_TC_DEFINITION', None)
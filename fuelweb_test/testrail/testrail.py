@@ -26,13 +26,16 @@
 from __future__ import unicode_literals
 
 import base64
+import threading
 import time
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
 from requests.packages.urllib3 import disable_warnings
 
 from fuelweb_test.testrail.settings import logger
+from fuelweb_test.testrail.settings import TestRailSettings
 
 
 disable_warnings()
@@ -67,14 +70,85 @@ def request_retry(codes):
 
 
 class APIClient(object):
-    """APIClient."""  # TODO documentation
-
-    def __init__(self, base_url):
-        self.user = ''
-        self.password = ''
+    """TestRail API client
+
+    Requests are sent through a persistent session, so connections to
+    TestRail are kept alive and reused by concurrent requests. Count and
+    time of requests are collected per API method in stats.
+    """
+
+    def __init__(self, base_url, pool_size=TestRailSettings.pool_size,
+                 timeout=(TestRailSettings.connect_timeout,
+                          TestRailSettings.read_timeout)):
+        """
+
+        :param base_url: str, TestRail URL
+        :param pool_size: int, max count of kept alive connections
+        :param timeout: tuple, connect and read timeouts, seconds
+        """
+        self.__user = ''
+        self.__password = ''
+        self.__headers = None
         if not base_url.endswith('/'):
             base_url += '/'
         self.__url = base_url + 'index.php?/api/v2/'
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.__stats_lock = threading.Lock()
+        self.stats = {}
+
+    @property
+    def user(self):
+        return self.__user
+
+    @user.setter
+    def user(self, value):
+        self.__user = value
+        self.__headers = None
+
+    @property
+    def password(self):
+        return self.__password
+
+    @password.setter
+    def password(self, value):
+        self.__password = value
+        self.__headers = None
+
+    @property
+    def headers(self):
+        """Headers of requests, built once per credentials"""
+        if self.__headers is None:
+            auth = base64.b64encode('{0}:{1}'.format(
+                self.user, self.password).encode('utf-8')).decode('ascii')
+            self.__headers = {'Authorization': 'Basic {}'.format(auth),
+                              'Content-Type': 'application/json'}
+        return self.__headers
+
+    def _add_latency(self, uri, latency):
+        method = uri.split('/', 1)[0].split('&', 1)[0]
+        with self.__stats_lock:
+            stats = self.stats.setdefault(
+                method, {'count': 0, 'time': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['time'] += latency
+            stats['max'] = max(stats['max'], latency)
+
+    def log_stats(self):
+        """Log count, total, average and max time of requests per method"""
+        with self.__stats_lock:
+            stats = sorted(self.stats.items(),
+                           key=lambda item: item[1]['time'], reverse=True)
+        for method, values in stats:
+            logger.info(
+                'TestRail {0}: {1} requests, {2:.1f} s total, {3:.3f} s avg,'
+                ' {4:.3f} s max'.format(method, values['count'],
+                                        values['time'],
+                                        values['time'] / values['count'],
+                                        values['max']))
 
     def send_get(self, uri):
         return self.__send_request('GET', uri, None)
@@ -88,20 +162,21 @@ class APIClient(object):
 
         @request_retry(codes=retry_codes)
         def __get_response(_url, _headers, _data):
-            if method == 'POST':
-                return requests.post(_url, json=_data, headers=_headers)
-            return requests.get(_url, headers=_headers)
+            started = time.time()
+            try:
+                if method == 'POST':
+                    return self.session.post(_url, json=_data,
+                                             headers=_headers,
+                                             timeout=self.timeout)
+                return self.session.get(_url, headers=_headers,
+                                        timeout=self.timeout)
+            finally:
+                self._add_latency(uri, time.time() - started)
 
         url = self.__url + uri
 
-        auth = base64.encodestring(
-            '{0}:{1}'.format(self.user, self.password)).strip()
-
-        headers = {'Authorization': 'Basic {}'.format(auth),
-                   'Content-Type': 'application/json'}
-
         try:
-            return __get_response(url, headers, data)
+            return __get_response(url, self.headers, data)
         except HTTPError as e:
             if e.message:
                 error = e.message
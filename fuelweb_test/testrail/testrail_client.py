@@ -14,9 +14,12 @@
 
 from __future__ import unicode_literals
 
+from collections import deque
+from multiprocessing.pool import ThreadPool
 import time
 
 from fuelweb_test.testrail.settings import logger
+from fuelweb_test.testrail.settings import TestRailSettings
 from fuelweb_test.testrail.testrail import APIClient
 from fuelweb_test.testrail.testrail import APIError
 
@@ -29,6 +32,73 @@ class TestRailProject(object):
         self.client.user = user
         self.client.password = password
         self.project = self._get_project(project)
+        self._statuses = None
+        self._cases_indexes = {}
+        self._tests_indexes = {}
+
+    @staticmethod
+    def map(func, items, workers=TestRailSettings.workers):
+        """Call func for every item concurrently
+
+        :param func: callable with single argument
+        :param items: iterable
+        :param workers: int, max count of concurrent calls
+        :return: list of results in order of items
+        """
+        items = list(items)
+        if len(items) < 2 or workers < 2:
+            return [func(item) for item in items]
+        pool = ThreadPool(min(workers, len(items)))
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.close()
+            pool.join()
+
+    @staticmethod
+    def iter_pages(fetch, page_size=TestRailSettings.max_results_per_request,
+                   in_flight=TestRailSettings.pages_in_flight, parallel=True):
+        """Generate items of all pages of paginated request
+
+        Up to in_flight next pages are requested concurrently while the
+        current one is consumed, items are yielded in order. Pages requested
+        after the last (incomplete) one are dropped. Throttled requests are
+        retried by APIClient according to Retry-After.
+
+        :param fetch: callable, fetch(limit=..., offset=...) returns a page
+        :param page_size: int, count of items per request
+        :param in_flight: int, max count of concurrent page requests
+        :param parallel: bool, request pages one by one if False, e.g. when
+                         called from a worker of map()
+        :return: generator of items
+        """
+        if not parallel:
+            offset = 0
+            while True:
+                page = fetch(limit=page_size, offset=offset)
+                for item in page:
+                    yield item
+                if len(page) < page_size:
+                    return
+                offset += page_size
+        in_flight = max(1, in_flight)
+        pool = ThreadPool(in_flight)
+        pages = deque()
+        offset = 0
+        try:
+            while True:
+                while len(pages) < in_flight:
+                    pages.append(pool.apply_async(
+                        fetch, kwds={'limit': page_size, 'offset': offset}))
+                    offset += page_size
+                page = pages.popleft().get()
+                for item in page:
+                    yield item
+                if len(page) < page_size:
+                    return
+        finally:
+            pool.close()
+            pool.join()
 
     def _get_project(self, project_name):
         projects_uri = 'get_projects'
@@ -142,6 +212,52 @@ class TestRailProject(object):
     def delete_section(self, section_id):
         return self.client.send_post('delete_section/' + str(section_id), {})
 
+    @staticmethod
+    def _make_index(items):
+        """Index cases or tests by test group and by title
+
+        :param items: list of dict - cases or tests
+        :return: dict - {'custom_test_group': {group: [items]},
+                         'title': {title: [items]}}
+        """
+        index = {'custom_test_group': {}, 'title': {}}
+        for item in items:
+            for key, values in index.items():
+                values.setdefault(item.get(key), []).append(item)
+        return index
+
+    def get_cases_index(self, suite_id):
+        """Get cases of suite indexed by test group and title
+
+        Index is built once per suite and is dropped on cases changes.
+        """
+        if suite_id not in self._cases_indexes:
+            self._cases_indexes[suite_id] = self._make_index(
+                self.get_cases(suite_id))
+        return self._cases_indexes[suite_id]
+
+    def get_tests_index(self, run_id):
+        """Get tests of run indexed by test group and title
+
+        Index is built once per run and is dropped on run changes.
+        """
+        if run_id not in self._tests_indexes:
+            self._tests_indexes[run_id] = self._make_index(
+                self.get_tests(run_id))
+        return self._tests_indexes[run_id]
+
+    def invalidate_cases_index(self, suite_id=None):
+        if suite_id is None:
+            self._cases_indexes.clear()
+        else:
+            self._cases_indexes.pop(suite_id, None)
+
+    def invalidate_tests_index(self, run_id=None):
+        if run_id is None:
+            self._tests_indexes.clear()
+        else:
+            self._tests_indexes.pop(run_id, None)
+
     def create_suite(self, name, description=None):
         return self.client.send_post('add_suite/' + str(self.project['id']),
                                      dict(name=name, description=description))
@@ -162,23 +278,33 @@ class TestRailProject(object):
         return self.client.send_get(case_uri)
 
     def get_case_by_name(self, suite_id, name, cases=None):
-        for case in cases or self.get_cases(suite_id):
+        if cases is None:
+            found = self.get_cases_index(suite_id)['title'].get(name)
+            return found[0] if found else None
+        for case in cases:
             if case['title'] == name:
                 return self.get_case(case_id=case['id'])
 
     def get_case_by_group(self, suite_id, group, cases=None):
-        for case in cases or self.get_cases(suite_id):
+        if cases is None:
+            found = self.get_cases_index(suite_id)[
+                'custom_test_group'].get(group)
+            return found[0] if found else None
+        for case in cases:
             if case['custom_test_group'] == group:
                 return self.get_case(case_id=case['id'])
 
     def add_case(self, section_id, case):
         add_case_uri = 'add_case/{section_id}'.format(section_id=section_id)
+        self.invalidate_cases_index()
         return self.client.send_post(add_case_uri, case)
 
     def update_case(self, case_id, fields):
+        self.invalidate_cases_index()
         return self.client.send_post('update_case/{0}'.format(case_id), fields)
 
     def delete_case(self, case_id):
+        self.invalidate_cases_index()
         return self.client.send_post('delete_case/' + str(case_id), None)
 
     def get_case_fields(self):
@@ -235,6 +361,7 @@ class TestRailProject(object):
             updated_plan['milestone_id'] = milestone_id
         if entries:
             updated_plan['entries'] = entries
+        self.invalidate_tests_index()
         return self.client.send_post(update_plan_uri, updated_plan)
 
     def add_plan_entry(self, plan_id, suite_id, config_ids, runs, name=None):
@@ -246,6 +373,7 @@ class TestRailProject(object):
         }
         if name:
             new_entry['name'] = name
+        self.invalidate_tests_index()
         return self.client.send_post(add_plan_entry_uri, new_entry)
 
     def delete_plan(self, plan_id):
@@ -312,6 +440,7 @@ class TestRailProject(object):
             update_run['case_ids'] = case_ids
         if config_ids:
             update_run['config_ids'] = config_ids
+        self.invalidate_tests_index(tests_run['id'])
         return self.client.send_post(update_run_uri, update_run)
 
     def create_or_update_run(self, name, suite, milestone_id, description,
@@ -336,9 +465,11 @@ class TestRailProject(object):
         return self.client.send_get(statuses_uri)
 
     def get_status(self, name):
-        for status in self.get_statuses():
-            if status['name'] == name:
-                return status
+        # Statuses are not changed, so request them only once
+        if self._statuses is None:
+            self._statuses = {status['name']: status
+                              for status in self.get_statuses()}
+        return self._statuses.get(name)
 
     def get_tests(self, run_id, status_id=None):
         tests_uri = 'get_tests/{run_id}'.format(run_id=run_id)
@@ -352,23 +483,28 @@ class TestRailProject(object):
         return self.client.send_get(test_uri)
 
     def get_test_by_name(self, run_id, name):
-        for test in self.get_tests(run_id):
-            if test['title'] == name:
-                return self.get_test(test_id=test['id'])
+        found = self.get_tests_index(run_id)['title'].get(name)
+        return found[0] if found else None
 
     def get_test_by_group(self, run_id, group, tests=None):
-        for test in tests or self.get_tests(run_id):
+        if tests is None:
+            found = self.get_tests_by_group(run_id, group)
+            return found[0] if found else None
+        for test in tests:
             if test['custom_test_group'] == group:
                 return self.get_test(test_id=test['id'])
 
     def get_test_by_name_and_group(self, run_id, name, group):
-        for test in self.get_tests(run_id):
-            if test['title'] == name and test['custom_test_group'] == group:
-                return self.get_test(test_id=test['id'])
+        for test in self.get_tests_by_group(run_id, group):
+            if test['title'] == name:
+                return test
 
     def get_tests_by_group(self, run_id, group, tests=None):
+        if tests is None:
+            return list(self.get_tests_index(run_id)[
+                'custom_test_group'].get(group, []))
         test_list = []
-        for test in tests or self.get_tests(run_id):
+        for test in tests:
             if test['custom_test_group'] == group:
                 test_list.append(self.get_test(test_id=test['id']))
         return test_list
@@ -401,6 +537,19 @@ class TestRailProject(object):
             results_run_uri += '&status_id={}'.format(status_id)
         return self.client.send_get(results_run_uri)
 
+    def iter_results_for_run(self, run_id, parallel=True, **kwargs):
+        """Generate all results of run fetching pages concurrently
+
+        :param run_id: int
+        :param parallel: bool, fetch pages one by one if False
+        :param kwargs: filters of get_results_for_run
+        :return: generator of results
+        """
+        return self.iter_pages(
+            lambda limit, offset: self.get_results_for_run(
+                run_id, limit=limit, offset=offset, **kwargs),
+            parallel=parallel)
+
     def get_results_for_case(self, run_id, case_id):
         results_case_uri = 'get_results_for_case/{run_id}/{case_id}'.format(
             run_id=run_id, case_id=case_id)
@@ -435,17 +584,25 @@ class TestRailProject(object):
 
     def add_raw_results_for_test(self, test_id, test_raw_results):
         add_results_test_uri = 'add_result/{test_id}'.format(test_id=test_id)
+        # run of the test is unknown here
+        self.invalidate_tests_index()
         return self.client.send_post(add_results_test_uri, test_raw_results)
 
-    def add_results_for_cases(self, run_id, suite_id, tests_results):
+    def add_results_for_cases(self, run_id, suite_id, tests_results,
+                              chunk_size=None):
+        """Add results for cases, sending them by chunks
+
+        :param chunk_size: int - max count of results per request,
+            TestRailSettings.max_results_per_request by default
+        :return: list - added results
+        """
+        chunk_size = chunk_size or TestRailSettings.max_results_per_request
         add_results_test_uri = 'add_results_for_cases/{run_id}'.format(
             run_id=run_id)
         new_results = {'results': []}
-        tests_cases = self.get_cases(suite_id)
         for results in tests_results:
             case = self.get_case_by_group(suite_id=suite_id,
-                                          group=results.group,
-                                          cases=tests_cases)
+                                          group=results.group)
             case_id = case['id']
             new_result = {
                 'case_id': case_id,
@@ -480,7 +637,14 @@ class TestRailProject(object):
                 new_result['custom_test_case_steps_results'] = \
                     custom_step_results
             new_results['results'].append(new_result)
-        return self.client.send_post(add_results_test_uri, new_results)
+        self.invalidate_tests_index(run_id)
+        added_results = []
+        for start in range(0, len(new_results['results']), chunk_size):
+            added_results.extend(self.client.send_post(
+                add_results_test_uri,
+                {'results': new_results['results'][start:start + chunk_size]}
+            ))
+        return added_results
 
     def add_results_for_tempest_cases(self, run_id, tests_results):
         add_results_test_uri = 'add_results_for_cases/{run_id}'.format(
@@ -14,6 +14,9 @@
 
 from __future__ import unicode_literals
 
+import hashlib
+import json
+import os
 import re
 import string
 
@@ -45,6 +48,10 @@ STEP_NUM_PATTERN = re.compile(r'^(\d{1,3})[.].+')
 DURATION_PATTERN = re.compile(r'Duration:?\s+(\d+(?:[sm]|\s?m))(?:in)?\b')
 TEST_GROUP_PATTERN = re.compile(r'run_system_test.py\s+.*--group=(\S+)\b')
 
+# Fields of test case which are uploaded to TestRail on changes
+CASE_FIELDS = ('title', 'estimate', 'custom_test_case_description',
+               'custom_test_case_steps', 'custom_job_settings')
+
 # Grab groups from pytest on import
 pytest.main(['--collect-only', 'fuel_tests', ])
 
@@ -170,9 +177,45 @@ def get_tests_descriptions(milestone_id, tests_include, tests_exclude, groups,
 
 
 def upload_tests_descriptions(testrail_project, section_id,
-                              tests, check_all_sections):
+                              tests, check_all_sections, delta=False,
+                              delete_removed=False):
+    """Add new and update changed test cases in TestRail
+
+    In delta mode only test cases which are changed since the last
+    upload (according to the manifest of hashes of synced cases) are
+    compared with TestRail, TestRail is not requested at all if nothing
+    is changed. Updates and deletions are uploaded concurrently, new cases
+    are added one by one to keep their order in the section.
+
+    :param testrail_project: TestRailProject
+    :param section_id: int, section for new test cases
+    :param tests: list of test cases descriptions
+    :param check_all_sections: bool, look for existing cases in all
+                               sections of suite
+    :param delta: bool, upload only cases changed since the last upload
+    :param delete_removed: bool, in delta mode delete synced cases which
+                           are absent in tests
+    """
     tests_suite = testrail_project.get_suite_by_name(
         TestRailSettings.tests_suite)
+    manifest_key = '{0}/{1}'.format(TestRailSettings.project,
+                                    tests_suite['id'])
+    synced = _load_manifest(manifest_key) if delta else {}
+    hashes = {test_case[GROUP_FIELD]: _get_case_hash(test_case)
+              for test_case in tests}
+    removed = sorted(set(synced) - set(hashes)) if delete_removed else []
+    if delta:
+        unchanged = len(tests)
+        tests = [test_case for test_case in tests
+                 if synced.get(test_case[GROUP_FIELD], {}).get('hash') !=
+                 hashes[test_case[GROUP_FIELD]]]
+        unchanged -= len(tests)
+        logger.info('{0} test case(s) are not changed since the last upload, '
+                    '{1} are changed, {2} are removed'.format(
+                        unchanged, len(tests), len(removed)))
+        if not tests and not removed:
+            return
+
     check_section = None if check_all_sections else section_id
     cases = testrail_project.get_cases(suite_id=tests_suite['id'],
                                        section_id=check_section)
@@ -181,8 +224,11 @@ def upload_tests_descriptions(testrail_project, section_id,
         case_fields=testrail_project.get_case_fields(),
         project_id=testrail_project.project['id'])
 
+    # updates and deletions, new cases
+    uploads, additions = [], []
     for test_case in tests:
-        if test_case[GROUP_FIELD] in existing_cases:
+        group = test_case[GROUP_FIELD]
+        if group in existing_cases:
             testrail_case = _get_testrail_case(testrail_cases=cases,
                                                test_case=test_case,
                                                group_field=GROUP_FIELD)
@@ -192,18 +238,21 @@ def upload_tests_descriptions(testrail_project, section_id,
                 logger.debug('Updating test "{0}" in TestRail project "{1}", '
                              'suite "{2}", section "{3}". Updated fields: {4}'
                              .format(
-                                 test_case[GROUP_FIELD],
+                                 group,
                                  TestRailSettings.project,
                                  TestRailSettings.tests_suite,
                                  TestRailSettings.tests_section,
                                  ', '.join(fields_to_update.keys())))
-                testrail_project.update_case(case_id=testrail_case['id'],
-                                             fields=fields_to_update)
+                uploads.append((group, testrail_project.update_case,
+                                {'case_id': testrail_case['id'],
+                                 'fields': fields_to_update}))
             else:
                 logger.debug('Skipping "{0}" test case uploading because '
                              'it is up-to-date in "{1}" suite'
-                             .format(test_case[GROUP_FIELD],
+                             .format(group,
                                      TestRailSettings.tests_suite))
+                synced[group] = {'hash': hashes[group],
+                                 'id': testrail_case['id']}
 
         else:
             for case_field, default_value in custom_cases_fields.items():
@@ -212,11 +261,63 @@ def upload_tests_descriptions(testrail_project, section_id,
 
             logger.debug('Uploading test "{0}" to TestRail project "{1}", '
                          'suite "{2}", section "{3}"'.format(
-                             test_case[GROUP_FIELD],
+                             group,
                              TestRailSettings.project,
                              TestRailSettings.tests_suite,
                              TestRailSettings.tests_section))
-            testrail_project.add_case(section_id=section_id, case=test_case)
+            additions.append((group, testrail_project.add_case,
+                              {'section_id': section_id, 'case': test_case}))
+
+    for group in removed:
+        logger.debug('Deleting removed test "{0}" from TestRail suite '
+                     '"{1}"'.format(group, TestRailSettings.tests_suite))
+        uploads.append((group, testrail_project.delete_case,
+                        {'case_id': synced[group]['id']}))
+
+    def upload(item):
+        group, method, kwargs = item
+        result = method(**kwargs)
+        if method == testrail_project.delete_case:
+            synced.pop(group, None)
+        else:
+            synced[group] = {'hash': hashes[group], 'id': result['id']}
+
+    try:
+        testrail_project.map(upload, uploads)
+        for item in additions:
+            upload(item)
+    finally:
+        if delta:
+            _save_manifest(manifest_key, synced)
+
+
+def _get_case_hash(test_case):
+    """Fingerprint of test case fields uploaded to TestRail"""
+    return hashlib.sha256(json.dumps(
+        [test_case[field] for field in CASE_FIELDS],
+        sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _load_manifest(key, path=TestRailSettings.cases_manifest):
+    """Get synced test cases of suite: {group: {'hash': ..., 'id': ...}}"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get(key, {})
+
+
+def _save_manifest(key, cases, path=TestRailSettings.cases_manifest):
+    manifest = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+    manifest[key] = cases
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    tmp_path = '{0}.tmp'.format(path)
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.rename(tmp_path, path)
 
 
 def get_tests_groups_from_jenkins(runner_name, build_number, distros):
@@ -418,8 +519,7 @@ def _get_fields_to_update(test_case, testrail_case):
     """Produces dictionary with fields to be updated
     """
     fields_to_update = {}
-    for field in ('title', 'estimate', 'custom_test_case_description',
-                  'custom_test_case_steps', 'custom_job_settings'):
+    for field in CASE_FIELDS:
         if test_case[field] and \
                 test_case[field] != testrail_case[field]:
             if field == 'estimate':
@@ -462,9 +562,23 @@ def main():
                            'section of test suite.')
     parser.add_option("-l", "--live", dest="live_upload", action="store_true",
                       help="Get tests results from running swarm")
+    parser.add_option('-d', '--delta', action='store_true', dest='delta',
+                      default=False,
+                      help='Upload only test cases changed since the last '
+                           'delta upload, see TESTRAIL_CASES_MANIFEST')
+    parser.add_option('--delete-removed', action='store_true',
+                      dest='delete_removed', default=False,
+                      help='Delete test cases uploaded by previous delta '
+                           'uploads which do not exist anymore')
 
     (options, _) = parser.parse_args()
 
+    if options.delete_removed and (
+            not options.delta or options.job_name or
+            TestRailSettings.tests_include or TestRailSettings.tests_exclude):
+        parser.error('--delete-removed requires --delta and full set of test '
+                     'cases (no job name, include or exclude filters)')
+
     if options.verbose:
         logger.setLevel(DEBUG)
 
@@ -517,7 +631,10 @@ def main():
     upload_tests_descriptions(testrail_project=project,
                               section_id=testrail_section['id'],
                               tests=tests_descriptions,
-                              check_all_sections=not options.check_one_section)
+                              check_all_sections=not options.check_one_section,
+                              delta=options.delta,
+                              delete_removed=options.delete_removed)
+    project.client.log_stats()
 
 
 if __name__ == '__main__':
@@ -143,7 +143,7 @@ class UpgradeCustom(DataDrivenUpgradeBase):
             self.env.make_snapshot(post_reinstall_snapshot)
         else:
             self.env.d_env.revert(post_reinstall_snapshot)
-        self.env.d_env.resume()
+        self.env.resume_environment()
         self.show_step(3)
         self.show_step(4)
         self.show_step(5)
@@ -11,6 +11,9 @@ from proboscis import TestProgram
 from proboscis import register
 
 from fuelweb_test.helpers.utils import pretty_log
+from fuelweb_test.settings import ENV_NAME
+from fuelweb_test.settings import LOGS_DIR
+from fuelweb_test.settings import SNAPSHOT_REVERT_TIME
 
 from gates_tests.helpers.utils import map_test_review_in_fuel_library
 from gates_tests.helpers.utils import \
@@ -26,11 +29,32 @@ from system_test import get_path_to_config
 from system_test import get_list_confignames
 from system_test import get_basepath
 
+from system_test.core.group_index import GroupIndex
+from system_test.core.group_index import get_index_file
 from system_test.core.repository import split_group_config
+from system_test.core.scheduler import order_by_snapshots
+from system_test.core.scheduler import run_shards
+from system_test.core.scheduler import split_to_shards
 
 basedir = get_basepath()
 
 
+def get_group_index():
+    return GroupIndex(basedir, tests_directory,
+                      cache_file=get_index_file(basedir))
+
+
+def get_groups_nums(**kwargs):
+    """Get groups of imported tests or of static index with --static-index
+
+    Static index doesn't contain groups registered at runtime, e.g. groups
+    of system tests bound to configs by define_custom_groups.
+    """
+    if kwargs.get('static_index'):
+        return get_group_index().get_groups()
+    return get_groups()
+
+
 def print_explain(names):
     groups_nums = get_groups()
     if not isinstance(names, list):
@@ -56,7 +80,36 @@ def clean_argv_proboscis():
     if '--explain' in argv:
         idx = argv.index('--explain')
         argv.pop(idx)
+    if '--import-all' in argv:
+        argv.remove('--import-all')
+    if '--order-by-snapshots' in argv:
+        argv.remove('--order-by-snapshots')
+    if '--shards' in argv:
+        idx = argv.index('--shards')
+        argv.pop(idx)
+        argv.pop(idx)
+
+    return argv
+
 
+def get_shard_argv():
+    """Get command line of run for shards
+
+    All options are kept except of groups (configs are passed in group
+    names), --shards and xunit options which are set by every shard.
+    """
+    argv = sys.argv[:2]
+    with_value = ('--shards', '--with-config', '--xunit-file', '--groups')
+    args = iter(sys.argv[2:])
+    for arg in args:
+        name = arg.split('=', 1)[0]
+        if name in with_value:
+            if '=' not in arg:
+                next(args, None)
+            continue
+        if name == '--with-xunit' or not arg.startswith('-'):
+            continue
+        argv.append(arg)
     return argv
 
 
@@ -83,6 +136,9 @@ def cli():
                          help="Show Proboscis test plan.")
     cli_run.add_argument("--with-xunit", default=False, action="store_true",
                          help="Use xuint report.")
+    cli_run.add_argument("--xunit-file", default="nosetests.xml", type=str,
+                         action="store", dest="xunit_file",
+                         help="Path to xunit report.")
     cli_run.add_argument("--nologcapture", default=False, action="store_true",
                          help="Disable log capture for Proboscis.")
     cli_run.add_argument("-q", default=False, action="store_true",
@@ -97,18 +153,40 @@ def cli():
     cli_run.add_argument("--groups", default=None, action="append", type=str,
                          help="Test group for testing. "
                               "(backward compatibility)")
+    cli_run.add_argument("--import-all", default=False, action="store_true",
+                         dest="import_all",
+                         help="Import all test modules instead of modules "
+                              "required by selected groups.")
+    cli_run.add_argument("--order-by-snapshots", default=False,
+                         action="store_true", dest="order_by_snapshots",
+                         help="Reorder tests (and methods of test classes) "
+                              "to run tests reverting the same snapshot one "
+                              "after another.")
+    cli_run.add_argument("--shards", default=1, type=int, action="store",
+                         help="Run independent groups in up to SHARDS "
+                              "parallel processes, every one with its own "
+                              "environment and logs directory.")
 
     cli_explain_group = commands.add_parser("explain-group",
                                             help="Explain selected group.")
     cli_explain_group.add_argument("name",
                                    help="Group name.")
 
-    commands.add_parser("show-all-groups",
-                        help="Show all Proboscis groups")
-    commands.add_parser("show-fuelweb-groups",
-                        help="Show Proboscis groups defined in fuelweb suite")
-    commands.add_parser("show-systest-groups",
-                        help="Show Proboscis groups defined in Systest suite")
+    cli_show_all = commands.add_parser("show-all-groups",
+                                       help="Show all Proboscis groups")
+    cli_show_fuelweb = commands.add_parser(
+        "show-fuelweb-groups",
+        help="Show Proboscis groups defined in fuelweb suite")
+    cli_show_systest = commands.add_parser(
+        "show-systest-groups",
+        help="Show Proboscis groups defined in Systest suite")
+    for cli_groups in (cli_explain_group, cli_show_all, cli_show_fuelweb,
+                       cli_show_systest):
+        cli_groups.add_argument(
+            "--static-index", default=False, action="store_true",
+            dest="static_index",
+            help="Use static groups index instead of importing tests. "
+                 "Groups registered at runtime are not shown.")
     commands.add_parser("show-systest-configs",
                         help="Show configurations for Systest suite")
 
@@ -149,28 +227,41 @@ def run(**kwargs):
                  'please be sure that you put right test group name.')
     if explain:
         print_explain(groups)
-    else:
-        register(groups=["run_system_test"], depends_on_groups=groups_to_run)
-        TestProgram(groups=['run_system_test'],
-                    argv=clean_argv_proboscis()).run_and_exit()
+        return
+    if kwargs.get('shards', 1) > 1:
+        shards = split_to_shards(groups_to_run, kwargs['shards'])
+        if len(shards) > 1:
+            sys.exit(run_shards(shards, get_shard_argv(), ENV_NAME,
+                                LOGS_DIR, xunit_file=kwargs['xunit_file']))
+    if kwargs.get('order_by_snapshots'):
+        order_by_snapshots(get_group_index(), groups_to_run,
+                           revert_time=SNAPSHOT_REVERT_TIME)
+    register(groups=["run_system_test"], depends_on_groups=groups_to_run)
+    TestProgram(groups=['run_system_test'],
+                argv=clean_argv_proboscis()).run_and_exit()
 
 
 def explain_group(**kwargs):
     """Explain selected group."""
     name = kwargs.get('name', None)
-    print_explain(name)
+    if not kwargs.get('static_index'):
+        print_explain(name)
+        return
+    g_c = split_group_config(name)
+    groups_nums = get_group_index().get_groups()
+    print(pretty_log(groups_nums.get(g_c[0] if g_c else name, [])))
 
 
 def show_all_groups(**kwargs):
     """Show all Proboscis groups"""
-    groups_nums = get_groups()
+    groups_nums = get_groups_nums(**kwargs)
     out = {k: len(v) for k, v in groups_nums.items()}
     print(pretty_log(out))
 
 
 def show_fuelweb_groups(**kwargs):
     """Show Proboscis groups defined in fuelweb suite"""
-    groups_nums = get_groups()
+    groups_nums = get_groups_nums(**kwargs)
 
     out = {k: len(v) for k, v in groups_nums.items()
            if not k.startswith('system_test')}
@@ -179,7 +270,7 @@ def show_fuelweb_groups(**kwargs):
 
 def show_systest_groups(**kwargs):
     """Show Proboscis groups defined in Systest suite"""
-    groups_nums = get_groups()
+    groups_nums = get_groups_nums(**kwargs)
 
     out = {k: len(v) for k, v in groups_nums.items()
            if k.startswith('system_test')}
@@ -204,9 +295,23 @@ COMMAND_MAP = {
 }
 
 
+def import_tests(**kwargs):
+    """Import test modules required by groups to run
+
+    All test modules are imported for other commands, e.g. show-all-groups.
+    """
+    groups = kwargs.get('run_groups', []) + (kwargs.get('groups') or [])
+    if (kwargs.get('command') != 'run' or kwargs.get('import_all') or
+            not get_group_index().import_modules(groups)):
+        discover_import_tests(basedir, tests_directory)
+
+
 def shell():
     args = cli()
-    discover_import_tests(basedir, tests_directory)
+    if getattr(args, 'static_index', False):
+        COMMAND_MAP[args.command](**vars(args))
+        return
+    import_tests(**vars(args))
     define_custom_groups()
     map_test_review_in_fuel_library(**vars(args))
     map_test_review_in_openstack_puppet_projects(**vars(args))
@@ -12,9 +12,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import atexit
+import copy
 import os.path
+import threading
+
+from six.moves import cPickle as pickle
 import yaml
 
+from fuelweb_test import logger
+
 
 def get_basepath():
     import system_test
@@ -56,44 +63,167 @@ def collect_yamls(path):
     return ret
 
 
-def load_yaml(path):
-    """Load yaml file from path"""
-    def yaml_include(loader, node):
-        file_name = os.path.join(get_path_to_template(), node.value)
-        if not os.path.isfile(file_name):
-            raise ValueError(
-                "Cannot load the template {0} : include file {1} "
-                "doesn't exist.".format(path, file_name))
-        return yaml.load(open(file_name))
-
-    def yaml_get_env_variable(loader, node):
-        if not node.value.strip():
-            raise ValueError("Environment variable is required after {tag} in "
-                             "{filename}".format(tag=node.tag,
-                                                 filename=loader.name))
-        node_value = node.value.split(',', 1)
-        # Get the name of environment variable
-        env_variable = node_value[0].strip()
-
-        # Get the default value for environment variable if it exists in config
-        if len(node_value) > 1:
-            default_val = node_value[1].strip()
-        else:
-            default_val = None
+class ConfigRegistry(object):
+    """Process wide cache of parsed yaml configs
+
+    Every file is parsed once. Parsed data is reused while modification
+    times of the file and of all its !include targets are the same and
+    environment variables read by !os_env have the same values.
+    If cache_file is set, parsed data is pickled there at exit and is
+    reused by next processes.
+    """
+
+    version = 1
+
+    def __init__(self, cache_file=None):
+        self.cache_file = cache_file
+        self.__lock = threading.RLock()
+        self.__entries = {}
+        # dependencies of files being parsed now: [(mtimes, env)]
+        self.__parsing = []
+        self.__dirty = False
+        self.__configs = None
+        if cache_file:
+            self._read_cache()
+            atexit.register(self.save)
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_file, 'rb') as f:
+                version, entries = pickle.load(f)
+        except (IOError, OSError, EOFError, ValueError,
+                pickle.UnpicklingError):
+            return
+        if version == self.version:
+            self.__entries.update(entries)
+
+    def save(self):
+        """Store parsed configs into cache file"""
+        with self.__lock:
+            if not self.cache_file or not self.__dirty:
+                return
+            tmp_file = '{0}.{1}'.format(self.cache_file, os.getpid())
+            try:
+                with open(tmp_file, 'wb') as f:
+                    pickle.dump((self.version, self.__entries), f,
+                                pickle.HIGHEST_PROTOCOL)
+                os.rename(tmp_file, self.cache_file)
+                self.__dirty = False
+            except (IOError, OSError) as e:
+                logger.warning(
+                    'Failed to store configs cache {0}: {1}'.format(
+                        self.cache_file, e))
+
+    @staticmethod
+    def _is_valid(entry):
+        for path, mtime in entry['mtimes'].items():
+            try:
+                if os.path.getmtime(path) != mtime:
+                    return False
+            except OSError:
+                return False
+        return all(os.environ.get(var) == value
+                   for var, value in entry['env'].items())
+
+    def record_env(self, var):
+        """Remember environment variable used by files being parsed"""
+        for _, env in self.__parsing:
+            env[var] = os.environ.get(var)
+
+    def load(self, path):
+        """Return parsed yaml file
+
+        :param path: str, path to yaml file
+        :return: a copy of parsed data
+        """
+        path = os.path.abspath(path)
+        with self.__lock:
+            entry = self.__entries.get(path)
+            if entry is None or not self._is_valid(entry):
+                entry = self._parse(path)
+            for mtimes, env in self.__parsing:
+                # file is included into files being parsed now
+                mtimes.update(entry['mtimes'])
+                env.update(entry['env'])
+            return copy.deepcopy(entry['data'])
+
+    def _parse(self, path):
+        mtimes, env = {path: os.path.getmtime(path)}, {}
+        self.__parsing.append((mtimes, env))
+        try:
+            with open(path) as f:
+                data = yaml.load(f)
+        finally:
+            self.__parsing.pop()
+        entry = {'mtimes': mtimes, 'env': env, 'data': data}
+        self.__entries[path] = entry
+        self.__dirty = True
+        return entry
+
+    def get_configs(self):
+        """Return dict of config name and path for test configs
+
+        Config directory is scanned once.
+        """
+        with self.__lock:
+            if self.__configs is None:
+                yamls = collect_yamls(get_path_to_config())
+                dup = find_duplicates(yamls)
+                if dup:
+                    raise NameError(
+                        "Found duplicate files in templates. "
+                        "Name of template should be unique. "
+                        "Errors: {}".format(dup))
+                self.__configs = {get_configname(y): y for y in yamls}
+            return dict(self.__configs)
+
+
+registry = ConfigRegistry(
+    cache_file=os.environ.get('SYSTEM_TEST_CONFIG_CACHE'))
+
+
+def yaml_include(loader, node):
+    file_name = os.path.join(get_path_to_template(), node.value)
+    if not os.path.isfile(file_name):
+        raise ValueError(
+            "Cannot load the template {0} : include file {1} "
+            "doesn't exist.".format(loader.name, file_name))
+    return registry.load(file_name)
+
+
+def yaml_get_env_variable(loader, node):
+    if not node.value.strip():
+        raise ValueError("Environment variable is required after {tag} in "
+                         "{filename}".format(tag=node.tag,
+                                             filename=loader.name))
+    node_value = node.value.split(',', 1)
+    # Get the name of environment variable
+    env_variable = node_value[0].strip()
+
+    # Get the default value for environment variable if it exists in config
+    if len(node_value) > 1:
+        default_val = node_value[1].strip()
+    else:
+        default_val = None
+
+    registry.record_env(env_variable)
+    value = os.environ.get(env_variable, default_val)
+    if value is None:
+        raise ValueError("Environment variable {var} is not set from shell"
+                         " environment! No default value provided in file "
+                         "{filename}".format(var=env_variable,
+                                             filename=loader.name))
+
+    return yaml.load(value)
+
+
+yaml.add_constructor("!include", yaml_include)
+yaml.add_constructor("!os_env", yaml_get_env_variable)
 
-        value = os.environ.get(env_variable, default_val)
-        if value is None:
-            raise ValueError("Environment variable {var} is not set from shell"
-                             " environment! No default value provided in file "
-                             "{filename}".format(var=env_variable,
-                                                 filename=loader.name))
 
-        return yaml.load(value)
-
-    yaml.add_constructor("!include", yaml_include)
-    yaml.add_constructor("!os_env", yaml_get_env_variable)
-
-    return yaml.load(open(path))
+def load_yaml(path):
+    """Load yaml file from path"""
+    return registry.load(path)
 
 
 def find_duplicates(yamls):
@@ -109,13 +239,7 @@ def find_duplicates(yamls):
 
 def get_configs():
     """Return list of dict environment configurations"""
-    yamls = collect_yamls(get_path_to_config())
-    dup = find_duplicates(yamls)
-    if dup:
-        raise NameError(
-            "Found duplicate files in templates. "
-            "Name of template should be unique. Errors: {}".format(dup))
-    return {get_configname(y): y for y in yamls}
+    return registry.get_configs()
 
 
 def config_filter(configs=None):
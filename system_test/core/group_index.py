@@ -0,0 +1,301 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import ast
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+from fuelweb_test import logger
+
+from system_test.core.discover import convert_files_to_modules
+from system_test.core.discover import discover_test_files
+
+
+# Test cases of these directories are bound to configs at runtime
+# (define_custom_groups), so they are always imported.
+ALWAYS_IMPORTED = ['system_test/tests']
+
+TEST_DECORATORS = ('test', 'testcase')
+
+
+def get_index_file(basedir):
+    """Get path of groups index cache for tests in basedir
+
+    SYSTEM_TEST_GROUP_INDEX environment variable overrides the path,
+    empty value disables the cache.
+    """
+    default = os.path.join(
+        tempfile.gettempdir(),
+        'system_test_groups_{0}.json'.format(
+            hashlib.md5(os.path.abspath(basedir).encode()).hexdigest()))
+    return os.environ.get('SYSTEM_TEST_GROUP_INDEX', default) or None
+
+
+def _decorator_kwargs(node):
+    """Get literal groups of @test/@testcase decorators of class or function
+
+    :return: list of dict {'groups': list, 'depends_on_groups': list}
+    """
+    found = []
+    for dec in node.decorator_list:
+        if isinstance(dec, ast.Call):
+            func = dec.func
+            name = getattr(func, 'id', getattr(func, 'attr', None))
+            if name not in TEST_DECORATORS:
+                continue
+            kwargs = {'groups': [], 'depends_on_groups': []}
+            for keyword in dec.keywords:
+                if keyword.arg in kwargs:
+                    kwargs[keyword.arg] = list(
+                        ast.literal_eval(keyword.value))
+            found.append(kwargs)
+        elif getattr(dec, 'id', getattr(dec, 'attr', None)) == 'test':
+            found.append({'groups': [], 'depends_on_groups': []})
+    return found
+
+
+def _snapshot_calls(node):
+    """Get names of snapshots reverted and made by test function
+
+    Only literal names are found, e.g. revert_snapshot("ready_with_3_slaves")
+
+    :return: tuple of lists (reverts, makes)
+    """
+    calls = {'revert_snapshot': [], 'make_snapshot': []}
+    for call in ast.walk(node):
+        if not isinstance(call, ast.Call):
+            continue
+        name = getattr(call.func, 'attr', None)
+        if name not in calls:
+            continue
+        args = list(call.args[:1]) + [
+            keyword.value for keyword in call.keywords
+            if keyword.arg in ('name', 'snapshot_name')]
+        for arg in args[:1]:
+            if isinstance(arg, ast.Str):
+                calls[name].append(arg.s)
+    return calls['revert_snapshot'], calls['make_snapshot']
+
+
+def scan_test_file(path):
+    """Get test entries of module without importing it
+
+    Groups of class decorator are applied to decorated methods like
+    Proboscis does.
+
+    :param path: str, path to module
+    :return: list of entries {'name', 'groups', 'depends_on_groups',
+             'reverts', 'makes'}
+    :raises: SyntaxError, ValueError if module can't be scanned
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    entries = []
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            reverts, makes = _snapshot_calls(node)
+            for kwargs in _decorator_kwargs(node):
+                entries.append(dict(name=node.name, reverts=reverts,
+                                    makes=makes, **kwargs))
+        elif isinstance(node, ast.ClassDef):
+            class_kwargs = _decorator_kwargs(node)
+            class_groups = [g for kwargs in class_kwargs
+                            for g in kwargs['groups']]
+            class_depends = [g for kwargs in class_kwargs
+                             for g in kwargs['depends_on_groups']]
+            for kwargs in class_kwargs:
+                entries.append(dict(name=node.name, reverts=[], makes=[],
+                                    **kwargs))
+            for method in node.body:
+                if not isinstance(method, ast.FunctionDef):
+                    continue
+                reverts, makes = _snapshot_calls(method)
+                for kwargs in _decorator_kwargs(method):
+                    entries.append({
+                        'name': '{0}.{1}'.format(node.name, method.name),
+                        'groups': class_groups + kwargs['groups'],
+                        'depends_on_groups':
+                            class_depends + kwargs['depends_on_groups'],
+                        'reverts': reverts,
+                        'makes': makes})
+    return entries
+
+
+class GroupIndex(object):
+    """Static index of Proboscis groups of test modules
+
+    Test modules are scanned with ast, so groups can be shown and
+    modules required by groups can be found without importing test code.
+    Scan results are stored in cache_file and are reused while
+    modification time of module is the same.
+    """
+
+    version = 2
+
+    def __init__(self, basedir, dirs, cache_file=None):
+        """
+
+        :param basedir: str, base directory of tests packages
+        :param dirs: list of test directories relative to basedir
+        :param cache_file: str, path of json cache, None disables it
+        """
+        self.basedir = basedir
+        self.dirs = dirs
+        self.cache_file = cache_file
+        # {module: {'mtime', 'path', 'entries', 'error'}}
+        self.modules = {}
+        self.group_modules = {}
+        # entries of modules which are not test modules, e.g. base_test_case
+        self.__extra = {}
+        self._build()
+
+    def _read_cache(self):
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file) as f:
+                cache = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        if cache.get('version') != self.version:
+            return {}
+        return cache['modules']
+
+    def _write_cache(self):
+        if not self.cache_file:
+            return
+        tmp_file = '{0}.{1}'.format(self.cache_file, os.getpid())
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump({'version': self.version,
+                           'modules': self.modules}, f)
+            os.rename(tmp_file, self.cache_file)
+        except (IOError, OSError) as e:
+            logger.warning('Failed to store groups index {0}: {1}'.format(
+                self.cache_file, e))
+
+    def _build(self):
+        cached = self._read_cache()
+        files = discover_test_files(self.basedir, self.dirs)
+        changed = False
+        for path, module in zip(files,
+                                convert_files_to_modules(self.basedir, files)):
+            mtime = os.path.getmtime(path)
+            info = cached.get(module)
+            if info is None or info['mtime'] != mtime:
+                changed = True
+                info = {'mtime': mtime, 'path': path, 'entries': [],
+                        'error': None}
+                try:
+                    info['entries'] = scan_test_file(path)
+                except (SyntaxError, ValueError) as e:
+                    # such module will be imported in any case
+                    info['error'] = str(e)
+            self.modules[module] = info
+        if changed or set(cached) != set(self.modules):
+            self._write_cache()
+        for module, info in self.modules.items():
+            for entry in info['entries']:
+                for group in entry['groups']:
+                    self.group_modules.setdefault(group, set()).add(module)
+
+    @staticmethod
+    def _base_group(group):
+        # system test group with config: group_name(config_name)
+        return group.split('(', 1)[0]
+
+    def get_groups(self):
+        """Return dict of group name and list of its test entries"""
+        groups = {}
+        for module, info in sorted(self.modules.items()):
+            for entry in info['entries']:
+                for group in entry['groups']:
+                    groups.setdefault(group, []).append(
+                        '{0}:{1}'.format(module, entry['name']))
+        return groups
+
+    def get_modules(self, groups):
+        """Find modules required to run groups
+
+        Modules which define groups are taken with modules defining
+        their depends_on_groups recursively.
+
+        :param groups: list of group names
+        :return: list of module names or None if some group is unknown
+        """
+        modules = set(
+            module for module, info in self.modules.items()
+            if info['error'] or any(
+                info['path'].startswith(os.path.join(self.basedir, d))
+                for d in ALWAYS_IMPORTED))
+        queue = [self._base_group(g) for g in groups]
+        if any(group not in self.group_modules for group in queue):
+            return None
+        seen = set()
+        while queue:
+            group = self._base_group(queue.pop())
+            if group in seen:
+                continue
+            seen.add(group)
+            for module in self.group_modules.get(group, ()):
+                if module in modules:
+                    continue
+                modules.add(module)
+                queue.extend(
+                    g for entry in self.modules[module]['entries']
+                    for g in entry['depends_on_groups'])
+        return sorted(modules)
+
+    def get_entry(self, module, name):
+        """Get test entry of function or method
+
+        Modules without tests (e.g. base_test_case) are scanned on demand.
+
+        :param module: str, module name
+        :param name: str, function name or 'Class.method'
+        :return: dict, entry or None
+        """
+        if module in self.modules:
+            entries = self.modules[module]['entries']
+        else:
+            if module not in self.__extra:
+                path = getattr(sys.modules.get(module), '__file__', None)
+                try:
+                    self.__extra[module] = scan_test_file(
+                        os.path.splitext(path)[0] + '.py')
+                except (TypeError, IOError, SyntaxError, ValueError):
+                    self.__extra[module] = []
+            entries = self.__extra[module]
+        for entry in entries:
+            if entry['name'] == name:
+                return entry
+
+    def import_modules(self, groups):
+        """Import only modules required to run groups
+
+        :param groups: list of group names
+        :return: True if modules were imported, False if some group is
+                 not known by index and tests should be imported as is
+        """
+        modules = self.get_modules(groups)
+        if modules is None:
+            return False
+        logger.debug('Import {0} of {1} test modules for groups {2}'.format(
+            len(modules), len(self.modules), groups))
+        for module in modules:
+            __import__(module)
+        return True
@@ -0,0 +1,329 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from collections import deque
+import os
+import subprocess
+import sys
+from xml.etree import ElementTree
+
+from proboscis.core import TestMethodClassEntry
+from proboscis.decorators import DEFAULT_REGISTRY
+
+from fuelweb_test import logger
+from system_test.core.repository import split_group_config
+
+
+XUNIT_COUNTERS = ('tests', 'errors', 'failures', 'skip')
+
+
+def get_group_dependencies(group, registry=DEFAULT_REGISTRY):
+    """Get groups required by group through depends_on_groups and depends_on
+
+    :param group: str, group name
+    :param registry: proboscis TestRegistry
+    :return: set of group names including group itself
+    """
+    homes = {entry.home: entry for entry in registry.tests}
+    seen = set()
+    queue = [group]
+    while queue:
+        name = queue.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        test_group = registry.groups.get(name)
+        if test_group is None:
+            continue
+        for entry in test_group.entries:
+            queue.extend(entry.info.depends_on_groups)
+            for home in entry.info.depends_on:
+                if home in homes:
+                    queue.extend(homes[home].info.groups)
+    return seen
+
+
+def split_to_shards(groups, count, registry=DEFAULT_REGISTRY):
+    """Split groups to shards without dependencies between them
+
+    Groups are dependent if one of them is required by another one, such
+    groups are always placed in the same shard. Common requirements
+    (e.g. prepare_slaves_3) are not an edge: every shard runs them in its
+    own environment. Independent components are distributed to shards by
+    count of required groups, the biggest first.
+
+    :param groups: list of group names
+    :param count: int, maximal count of shards
+    :param registry: proboscis TestRegistry
+    :return: list of lists of group names
+    """
+    depends = {}
+    for group in groups:
+        g_c = split_group_config(group)
+        depends[group] = get_group_dependencies(
+            g_c[0] if g_c else group, registry)
+
+    # union-find over requested groups
+    parent = {group: group for group in groups}
+
+    def find(group):
+        while parent[group] != group:
+            parent[group] = parent[parent[group]]
+            group = parent[group]
+        return group
+
+    for group in groups:
+        for other in groups:
+            if other != group and other in depends[group]:
+                parent[find(other)] = find(group)
+
+    components = {}
+    for group in groups:
+        components.setdefault(find(group), []).append(group)
+
+    def weight(component):
+        return len(set().union(*[depends[g] for g in component]))
+
+    shards = [[] for _ in range(min(count, len(components)))]
+    weights = [0] * len(shards)
+    for component in sorted(components.values(), key=weight, reverse=True):
+        idx = weights.index(min(weights))
+        shards[idx].extend(component)
+        weights[idx] += weight(component)
+    return shards
+
+
+def _plan_entries(registry):
+    """Get entries of test methods and functions in Proboscis plan order"""
+    for entry in registry.tests:
+        if isinstance(entry, TestMethodClassEntry):
+            for child in entry.children:
+                yield child
+        elif not entry.is_child:
+            yield entry
+
+
+def _get_test_entries(registry, groups):
+    """Get test entries of groups with all entries they run after
+
+    :return: list of entries in plan order, dict of their dependencies
+             {entry: [entry]}
+    """
+    homes = {}
+    for entry in _plan_entries(registry):
+        for home in entry.homes:
+            homes.setdefault(home, []).append(entry)
+
+    def group_entries(name):
+        group = registry.groups.get(name)
+        return [entry for entry in group.entries
+                if not isinstance(entry, TestMethodClassEntry)
+                ] if group else []
+
+    queue = [entry for group in groups for entry in group_entries(group)]
+    depends = {}
+    while queue:
+        entry = queue.pop()
+        if entry in depends:
+            continue
+        info = entry.info
+        depends[entry] = [
+            dep for group in info.runs_after_groups + info.depends_on_groups
+            for dep in group_entries(group)] + [
+            dep for home in list(info.runs_after) + list(info.depends_on)
+            for dep in homes.get(home, [])]
+        queue.extend(depends[entry])
+    return ([entry for entry in _plan_entries(registry) if entry in depends],
+            depends)
+
+
+def _sort_entries(entries, depends):
+    """Sort entries like Proboscis does: depth first from dependencies"""
+    dependents = {entry: [] for entry in entries}
+    count = {}
+    for entry in entries:
+        unique = []
+        for dep in depends[entry]:
+            if dep not in unique and dep in dependents:
+                unique.append(dep)
+                dependents[dep].append(entry)
+        count[entry] = len(unique)
+    independent = deque(entry for entry in entries if not count[entry])
+    ordered = []
+    while independent:
+        entry = independent.popleft()
+        ordered.append(entry)
+        for dep in reversed(dependents[entry]):
+            count[dep] -= 1
+            if not count[dep]:
+                independent.appendleft(dep)
+    return ordered
+
+
+def _entry_name(entry):
+    if entry.method is not None:
+        return entry.home.__module__, '{0}.{1}'.format(
+            entry.parent.home.__name__, entry.home.__name__)
+    return entry.home.__module__, entry.home.__name__
+
+
+def _count_skipped_reverts(ordered, snapshots):
+    """Count reverts of snapshot made by previous test"""
+    skipped = 0
+    for prev, entry in zip(ordered, ordered[1:]):
+        reverts = snapshots[entry][0]
+        makes = snapshots[prev][1]
+        if reverts and makes and reverts[0] == makes[-1]:
+            skipped += 1
+    return skipped
+
+
+def order_by_snapshots(index, groups, registry=DEFAULT_REGISTRY,
+                       revert_time=300):
+    """Reorder tests of registry to minimise count of snapshot reverts
+
+    Base snapshot of test is the first snapshot it reverts. Proboscis runs
+    tests depth first in order of registration, so registered tests (and
+    methods in classes) are stably reordered: tests reverting snapshot
+    made by their dependency go first, so they run right after the test
+    making the snapshot and the revert is skipped by EnvironmentModel,
+    then tests are grouped by base snapshot to run back-to-back.
+    Registry is changed in place and methods of test classes can run in
+    another order, so the runner reorders tests only on request.
+
+    :param index: GroupIndex, source of snapshot names of tests
+    :param groups: list of group names to run
+    :param registry: proboscis TestRegistry
+    :param revert_time: int, seconds of single revert for estimation
+    :return: tuple, (count of reverts, count of skipped reverts before
+             and after ordering)
+    """
+    entries, depends = _get_test_entries(
+        registry, [split_group_config(g)[0] if split_group_config(g) else g
+                   for g in groups])
+    snapshots = {}
+    for entry in entries:
+        found = index.get_entry(*_entry_name(entry)) or {}
+        snapshots[entry] = (found.get('reverts', []), found.get('makes', []))
+    ordered = _sort_entries(entries, depends)
+    skipped_before = _count_skipped_reverts(ordered, snapshots)
+
+    rank = {}
+    for entry in ordered:
+        if snapshots[entry][0]:
+            rank.setdefault(snapshots[entry][0][0], len(rank))
+
+    def key(entry):
+        if entry not in snapshots or not snapshots[entry][0]:
+            return 2, len(rank)
+        base = snapshots[entry][0][0]
+        follower = any(snapshots[dep][1][-1:] == [base]
+                       for dep in depends[entry])
+        return (0 if follower else 1), rank[base]
+
+    def class_key(entry):
+        if isinstance(entry, TestMethodClassEntry) and entry.children:
+            entry.children.sort(key=key)
+            return key(entry.children[0])
+        return key(entry)
+
+    registry.tests.sort(key=class_key)
+
+    entries, depends = _get_test_entries(
+        registry, [split_group_config(g)[0] if split_group_config(g) else g
+                   for g in groups])
+    reverts = sum(1 for entry in entries if snapshots[entry][0])
+    skipped = _count_skipped_reverts(_sort_entries(entries, depends),
+                                     snapshots)
+    logger.info(
+        'Test plan has {0} tests with {1} snapshot reverts, {2} of them '
+        'can be skipped ({3} without reordering), estimated time saved: '
+        '{4} sec'.format(len(entries), reverts, skipped, skipped_before,
+                         skipped * revert_time))
+    return reverts, skipped_before, skipped
+
+
+def merge_xunit_reports(reports, path):
+    """Merge xunit reports of shards into single testsuite
+
+    :param reports: list of paths to xunit xml files, missed are skipped
+    :param path: str, path to merged report
+    """
+    merged = ElementTree.Element('testsuite', name='nosetests')
+    counters = dict.fromkeys(XUNIT_COUNTERS, 0)
+    for report in reports:
+        if not os.path.exists(report):
+            logger.error('xunit report {0} is not found'.format(report))
+            continue
+        suite = ElementTree.parse(report).getroot()
+        for counter in XUNIT_COUNTERS:
+            counters[counter] += int(suite.get(counter, 0))
+        for case in suite:
+            merged.append(case)
+    for counter, value in counters.items():
+        merged.set(counter, str(value))
+    ElementTree.ElementTree(merged).write(path, encoding='UTF-8',
+                                          xml_declaration=True)
+
+
+def run_shards(shards, argv, env_name, logs_dir,
+               xunit_file='nosetests.xml'):
+    """Run every shard in its own runner process and environment
+
+    Shard N is run with ENV_NAME=<env_name>_N and LOGS_DIR=<logs_dir>/shard_N,
+    xunit reports of shards are merged into xunit_file.
+
+    :param shards: list of lists of group names
+    :param argv: list, runner command line without groups
+    :param env_name: str, base name of devops environments
+    :param logs_dir: str, base logs directory
+    :param xunit_file: str, path to merged xunit report
+    :return: int, maximal exit code of shards
+    """
+    processes = []
+    reports = []
+    codes = []
+    try:
+        for num, groups in enumerate(shards):
+            shard_logs = os.path.join(logs_dir, 'shard_{0}'.format(num))
+            if not os.path.exists(shard_logs):
+                os.makedirs(shard_logs)
+            report = os.path.join(shard_logs, os.path.basename(xunit_file))
+            env = os.environ.copy()
+            env['ENV_NAME'] = '{0}_{1}'.format(env_name, num)
+            env['LOGS_DIR'] = shard_logs
+            cmd = [sys.executable] + argv + groups + [
+                '--with-xunit', '--xunit-file={0}'.format(report)]
+            logger.info('Start shard {0} in environment {1}: {2}'.format(
+                num, env['ENV_NAME'], ' '.join(groups)))
+            with open(os.path.join(shard_logs, 'runner.log'), 'w') as out:
+                processes.append(subprocess.Popen(
+                    cmd, env=env, stdout=out, stderr=subprocess.STDOUT))
+            reports.append(report)
+
+        for num, process in enumerate(processes):
+            codes.append(process.wait())
+            logger.info('Shard {0} is finished with exit code {1}'.format(
+                num, codes[-1]))
+    except BaseException:
+        # e.g. KeyboardInterrupt: don't leave shards running without runner
+        for num, process in enumerate(processes):
+            if process.poll() is None:
+                logger.error('Terminate shard {0}'.format(num))
+                process.terminate()
+        for process in processes:
+            process.wait()
+        raise
+    merge_xunit_reports(reports, xunit_file)
+    return max(codes)
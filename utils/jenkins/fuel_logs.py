@@ -52,17 +52,46 @@ fuel_logs.py -c Truncates Astute and Puppet logs. Respects -a and -p options.
 It you are running and debugging many deployments on a single Fuel Master
 node, you may want to truncate the logs from the previous deployments.
 Using -l option is also recommended for interactive use.
+
+Indexing the snapshots to query them many times:
+
+fuel_logs.py index [--db DB] SNAPSHOT [SNAPSHOT ...]
+
+All Astute and Puppet records of the snapshots are stored to the sqlite
+database (FUEL_LOGS_INDEX, ~/.fuel_logs_index.db by default) with their
+time, node, task and level. Unchanged snapshots are not indexed again.
+
+fuel_logs.py query [--db DB] [--node NODE] [--task TASK] [--level LEVEL]
+                   [--since TIME] [--until TIME] [--source {astute,puppet}]
+                   [--snapshot SNAPSHOT] [--match TEXT] [--limit N]
+
+# Errors of the node-2 during the netconfig task
+fuel_logs.py query --node node-2 --task netconfig --level err
+# Full text search of Puppet records in the time range
+fuel_logs.py query --source puppet --match 'Could not' \\
+    --since 2016-03-01T10:00 --until 2016-03-01T11:00
 """
 
 import argparse
 from datetime import datetime
+import heapq
 import os
 import re
+import sqlite3
 import sys
 import tarfile
+import tempfile
 
 PUPPET_LOG = 'puppet-apply.log'
 ASTUTE_LOG = 'astute.log'
+# Records kept in memory before sorted chunk is spilled to a temporary file
+SORT_CHUNK_SIZE = 100000
+# Index of the records of the snapshots
+INDEX_DB = os.environ.get(
+    'FUEL_LOGS_INDEX', os.path.join(os.path.expanduser('~'),
+                                    '.fuel_logs_index.db'))
+# Records inserted to the index by one statement
+INDEX_BATCH_SIZE = 10000
 
 
 class IO(object):
@@ -144,6 +173,9 @@ class IO(object):
         The main application workflow
         :return:
         """
+        if sys.argv[1:2] in (['index'], ['query']):
+            return cls.index_main()
+
         cls.options()
 
         if cls.args.less:
@@ -157,6 +189,91 @@ class IO(object):
         if cls.args.less:
             cls.close_pager()
 
+    @classmethod
+    def index_main(cls):
+        """
+        Index the snapshots or query the indexed records
+        :return:
+        """
+        cls.index_options()
+
+        with LogIndex(cls.args.db) as index:
+            if cls.args.command == 'index':
+                for snapshot in cls.args.snapshots:
+                    if not os.path.isfile(snapshot):
+                        IO.output('File "%s" is not found!' % snapshot)
+                        continue
+                    index.add_snapshot(snapshot)
+                return
+
+            if cls.args.less:
+                cls.open_pager()
+            try:
+                for record in index.query(
+                        node=cls.args.node,
+                        task=cls.args.task,
+                        levels=cls.args.level,
+                        since=cls.args.since,
+                        until=cls.args.until,
+                        source=cls.args.source,
+                        snapshot=cls.args.snapshot,
+                        match=cls.args.match,
+                        limit=cls.args.limit):
+                    IO.output(LogIndex.format_record(record))
+            finally:
+                if cls.args.less:
+                    cls.close_pager()
+
+    @classmethod
+    def index_options(cls):
+        """
+        Parse the options of the index and query commands
+        :return: arguments structure
+        """
+        parser = argparse.ArgumentParser()
+        commands = parser.add_subparsers(dest='command')
+        index_parser = commands.add_parser(
+            'index', help='Index the records of the snapshots')
+        index_parser.add_argument('snapshots',
+                                  metavar='SNAPSHOT',
+                                  type=str,
+                                  nargs='+',
+                                  help='Index logs of these snapshots')
+        query_parser = commands.add_parser(
+            'query', help='Show the indexed records')
+        query_parser.add_argument('--node', '-n',
+                                  help='Node name or id')
+        query_parser.add_argument('--task', '-t',
+                                  help='Part of the task name')
+        query_parser.add_argument('--level', '-L',
+                                  action='append',
+                                  help='Log level, e.g. err, warning')
+        query_parser.add_argument('--since',
+                                  help='Show records since this time, '
+                                       'e.g. 2016-03-01T10:00')
+        query_parser.add_argument('--until',
+                                  help='Show records before this time')
+        query_parser.add_argument('--source',
+                                  choices=['astute', 'puppet'],
+                                  help='Show records of this log only')
+        query_parser.add_argument('--snapshot',
+                                  help='Part of the snapshot path')
+        query_parser.add_argument('--match', '-M',
+                                  help='Text to search in the records')
+        query_parser.add_argument('--limit',
+                                  type=int,
+                                  help='Max count of records')
+        query_parser.add_argument('--less', '-l',
+                                  action='store_true',
+                                  default=False,
+                                  help='Redirect data to the "less" pager')
+        for command_parser in (index_parser, query_parser):
+            command_parser.add_argument('--db',
+                                        default=INDEX_DB,
+                                        help='Path to the index database')
+        cls.args = parser.parse_args()
+        return cls.args
+
     @classmethod
     def open_pager(cls):
         """
@@ -246,22 +363,37 @@ class IO(object):
 class AbstractLog(object):
     """
     The abstract log object with common methods
+    Records are streamed: every line of the content is read
+    only once and every caught record is passed to the output
+    without collecting the whole log in memory.
     Attributes:
-        content logging content list
-        log     list() of collected logging records
+        content logging content iterable of lines
     """
 
     def __init__(self):
         self.content = []
-        self.log = []
 
     def clear(self):
         """
-        Clear the parsed and raw log contents
+        Clear the raw log contents
         :return:
         """
         self.content = []
-        self.log = []
+
+    @staticmethod
+    def lines(content):
+        """
+        Iterate through the content lines without line endings
+        :param content: log content or iterable of lines, e.g. file object
+        :type content: str, bytes, iter
+        :return: iter
+        """
+        if isinstance(content, (str, bytes)):
+            content = content.splitlines()
+        for line in content:
+            if isinstance(line, bytes):
+                line = line.decode(errors='replace')
+            yield line.rstrip('\r\n')
 
     def catch_record(self, record, include_markers=None, exclude_markers=None):
         """
@@ -295,27 +427,28 @@ class AbstractLog(object):
         through the content lines
         :return: iter
         """
-        for record in self.content:
-            yield record.decode()
+        for record in self.lines(self.content):
+            yield record
 
     def parse(self, content):
         """
         Abstract parser that adds every line
-        :param content: Input log content
-        :type content: str
+        :param content: Input log content or iterable of lines
+        :type content: str, iter
         :return:
         """
-        self.content = content.splitlines()
+        self.content = content
         for record in self.each_record():
             self.add_record(record)
 
     def output(self):
         """
-        Output the parsed log content
+        Finish the output of the parsed log content
+        Records are written as soon as they are caught,
+        so there is nothing left to output
         :return:
         """
-        for record in self.log:
-            IO.output(record)
+        pass
 
     @staticmethod
     def normalize_record(record):
@@ -335,12 +468,11 @@ class AbstractLog(object):
 
     def add_record(self, record):
         """
-        Add this record to the result log
+        Output this record of the result log
         :param record Record text
         :type record str
         """
-        record = self.normalize_record(record)
-        self.log.append(record)
+        IO.output(self.normalize_record(record))
 
 
 class AstuteLog(AbstractLog):
@@ -358,11 +490,11 @@ class AstuteLog(AbstractLog):
     def parse(self, content):
         """
         Parse the string containing the log content
-        :param content: the log file content
-        :type content: str
+        :param content: the log file content or iterable of lines
+        :type content: str, iter
         :return:
         """
-        self.content = content.splitlines()
+        self.content = content
         for record in self.each_record():
             if self.show_full:
                 self.add_record(record)
@@ -383,8 +515,7 @@ class AstuteLog(AbstractLog):
         """
         record = ''
         date_regexp = re.compile(r'^\d+-\d+-\S+\s')
-        for bline in self.content:
-            line = bline.decode()
+        for line in self.lines(self.content):
             if re.match(date_regexp, line):
                 yield record
                 record = line
@@ -473,23 +604,44 @@ class PuppetLog(AbstractLog):
         log_name    name for logger
         show_evals  show of Puppet evaltrace lines
         enable_sort sorting log lines by event time
+    Sorting is done by the external merge sort: records are
+    collected into chunks of SORT_CHUNK_SIZE, every full chunk is
+    sorted and spilled to a temporary file and the chunks are merged
+    during the output.
     """
 
+    time_format = "%Y-%m-%dT%H:%M:%S.%f"
+
     def __init__(self):
         self.log_name = None
         self.show_evals = False
         self.enable_sort = False
         self.show_full = False
+        self.previous_log = None
+        self.chunk = []
+        self.chunk_files = []
         super(PuppetLog, self).__init__()
 
+    def clear(self):
+        """
+        Clear the raw log contents and drop the sorting chunks
+        :return:
+        """
+        super(PuppetLog, self).clear()
+        self.previous_log = None
+        self.chunk = []
+        for chunk_file in self.chunk_files:
+            chunk_file.close()
+        self.chunk_files = []
+
     def parse(self, content):
         """
         Parse the string with Puppet log content
-        :param content: Puppet log
-        :type content: str
+        :param content: Puppet log or iterable of its lines
+        :type content: str, iter
         :return:
         """
-        self.content = content.splitlines()
+        self.content = content
         for record in self.each_record():
             if self.show_full:
                 self.add_record(record)
@@ -521,37 +673,81 @@ class PuppetLog(AbstractLog):
             return None
         return path_elements[name_index]
 
+    def output_record(self, record):
+        """
+        Output a single converted log record
+        :param record: log record
+        :type record: dict
+        :return:
+        """
+        log = record.get('log', None)
+        if log and not self.enable_sort and self.previous_log != log:
+            IO.output("Log file: '{0}'".format(log))
+            self.previous_log = log
+        time = record.get('time', None)
+        line = record.get('line', None)
+        if not (log and time and line):
+            return
+        IO.output("{name:s} {time:s} {line:s}".format(
+            name=self.node_name(log),
+            time=time.isoformat(),
+            line=line
+        ))
+
     def output(self):
         """
-        Output the collected log lines sorting
-        them if enabled
-        :return:
-        """
-        if self.enable_sort:
-            self.sort_log()
-        previous_log = None
-        for record in self.log:
-            log = record.get('log', None)
-            if log and not self.enable_sort and previous_log != log:
-                IO.output("Log file: '{0}'".format(log))
-                previous_log = log
-            time = record.get('time', None)
-            line = record.get('line', None)
-            if not (log and time and line):
-                continue
-            IO.output("{name:s} {time:s} {line:s}".format(
-                name=self.node_name(log),
-                time=time.isoformat(),
-                line=line
-            ))
+        Output the sorted log lines if sorting is enabled
+        Unsorted lines are written as soon as they are caught
+        :return:
+        """
+        if not self.enable_sort:
+            return
+        for record in self.sort_log():
+            self.output_record(record)
+        self.clear()
 
-    def sort_log(self):
+    def spill_chunk(self):
         """
-        Sort the collected log lines bu the event date and time
+        Sort the collected chunk of records and move it to a temporary file
+        Every record is stored as a line of tab separated time,
+        log name and normalized log line
         :return:
         """
-        self.log = sorted(self.log,
-                          key=lambda record: record.get('time', None))
+        self.chunk.sort(key=lambda record: record['time'])
+        chunk_file = tempfile.TemporaryFile(mode='w+')
+        for record in self.chunk:
+            chunk_file.write('{time}\t{log}\t{line}'.format(
+                time=record['time'].strftime(self.time_format),
+                log=record['log'],
+                line=record['line']))
+        chunk_file.seek(0)
+        self.chunk_files.append(chunk_file)
+        self.chunk = []
+
+    def read_chunk(self, chunk_file):
+        """
+        Read the sorted records back from the chunk file
+        :param chunk_file: opened temporary file
+        :return: iter
+        """
+        for row in chunk_file:
+            time, log, line = row.split('\t', 2)
+            yield {
+                'time': datetime.strptime(time, self.time_format),
+                'log': log,
+                'line': line,
+            }
+
+    def sort_log(self):
+        """
+        Merge the sorted chunks by the event date and time
+        :return: iter
+        """
+        self.chunk.sort(key=lambda record: record['time'])
+        chunks = [self.read_chunk(chunk_file)
+                  for chunk_file in self.chunk_files]
+        chunks.append(iter(self.chunk))
+        return heapq.merge(*chunks, key=lambda record: record['time'])
 
     def convert_record(self, line):
         """
@@ -579,13 +775,21 @@ class PuppetLog(AbstractLog):
     def add_record(self, record):
         """
         Add this record to the result log
+        Record is written to the output at once or
+        collected for sorting if sorting is enabled
         :param record: Record text
         :type record: str
         :return:
         """
         record = self.convert_record(record)
-        if record:
-            self.log.append(record)
+        if not record:
+            return
+        if not self.enable_sort:
+            self.output_record(record)
+            return
+        self.chunk.append(record)
+        if len(self.chunk) >= SORT_CHUNK_SIZE:
+            self.spill_chunk()
 
     def err_line(self, record):
         """
@@ -714,8 +918,10 @@ class FuelSnapshot(object):
         :type parser PuppetLog, AstuteLog
         """
         log = self.snapshot.extractfile(log_file)
-        content = log.read()
-        parser.parse(content)
+        try:
+            parser.parse(log)
+        finally:
+            log.close()
 
     def parse_astute_log(self,
                          show_mcagent=False,
@@ -816,8 +1022,7 @@ class FuelLogs(object):
         :param parser Parser object
         :type parser PuppetLog, AstuteLog
         """
-        content = log_file.read()
-        parser.parse(content)
+        parser.parse(log_file)
 
     def parse_astute_logs(self,
                           show_mcagent=False,
@@ -832,7 +1037,7 @@ class FuelLogs(object):
         astute_logs.show_mcagent = show_mcagent
         astute_logs.show_full = show_full
         for astute_log in self.astute_logs():
-            with open(astute_log, 'r') as log:
+            with open(astute_log, 'rb') as log:
                 self.parse_log(log, astute_logs)
         astute_logs.output()
         astute_logs.clear()
@@ -854,7 +1059,7 @@ class FuelLogs(object):
         puppet_logs.enable_sort = enable_sort
         puppet_logs.show_full = show_full
         for puppet_log in self.puppet_logs():
-            with open(puppet_log, 'r') as log:
+            with open(puppet_log, 'rb') as log:
                 puppet_logs.log_name = puppet_log
                 self.parse_log(log, puppet_logs)
         puppet_logs.output()
@@ -883,6 +1088,418 @@ class FuelLogs(object):
         """
         self.clear_logs(self.puppet_logs())
 
+
+class LogIndex(object):
+    """
+    This class stores Astute and Puppet records of the Fuel log snapshots
+    in the sqlite database and queries them
+    Every record is stored with its time, node, task and level.
+    Full text search is done by the FTS5 index if sqlite supports it.
+    """
+
+    time_format = "%Y-%m-%dT%H:%M:%S.%f"
+    level_names = {
+        'err': 'error',
+        'warn': 'warning',
+        'crit': 'critical',
+        'fatal': 'critical',
+        'emerg': 'emergency',
+    }
+    levels = {
+        'debug', 'info', 'notice', 'warning', 'error', 'critical', 'alert',
+        'emergency',
+    }
+    astute_header = re.compile(
+        r'^(\d+-\d+-\d+[T ]\d+:\d+:\d+(?:\.\d+)?)\S*\s+(\w+):?\s')
+    astute_node = re.compile(
+        r'\bnode-(\d+)|\b(?:node|uids?)\b[\s\'"=>:\[]*(\d+)', re.IGNORECASE)
+    astute_task = re.compile(
+        r'"(?:id|task_name)"\s*=>\s*"([^"]+)"|'
+        r'\btask\b[\s\'"=>:]*([\w./-]+)', re.IGNORECASE)
+    puppet_task = re.compile(r'MODULAR:\s*(\S+)')
+    time_zone = re.compile(r'(?:Z|[+-]\d\d:?\d\d)$')
+
+    def __init__(self, db=INDEX_DB):
+        self.db = db
+        self.connection = None
+        self.fts = False
+
+    def __enter__(self):
+        """
+        Open the index database
+        """
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Close the index database
+        """
+        self.close()
+
+    def open(self):
+        """
+        Open the index database and create the tables
+        :return:
+        """
+        self.connection = sqlite3.connect(self.db)
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE,
+                size INTEGER,
+                mtime REAL
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                snapshot_id INTEGER,
+                source TEXT,
+                log TEXT,
+                node TEXT,
+                time TEXT,
+                level TEXT,
+                task TEXT,
+                line TEXT
+            );
+            CREATE INDEX IF NOT EXISTS records_time ON records (time);
+            CREATE INDEX IF NOT EXISTS records_node ON records (node, time);
+        ''')
+        try:
+            self.connection.execute(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING '
+                'fts5(line, content=records, content_rowid=id)')
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+
+    def close(self):
+        """
+        Close the index database
+        :return:
+        """
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    @classmethod
+    def normalize_level(cls, level):
+        """
+        Convert the level name to the common form
+        :param level: level name, e.g. 'err:', 'WARN'
+        :type level: str
+        :return: level or None if it is not a level name
+        :rtype: str
+        """
+        level = level.rstrip(':').lower()
+        level = cls.level_names.get(level, level)
+        if level in cls.levels:
+            return level
+        return None
+
+    @staticmethod
+    def normalize_node(node):
+        """
+        Convert the node name or id to the short node name
+        Astute refers to nodes by uid, Puppet logs are stored
+        in the directories named by FQDN of nodes.
+        :param node: node name, e.g. '2', 'node-2.test.domain.local'
+        :type node: str
+        :return: node name, e.g. 'node-2'
+        :rtype: str
+        """
+        if not node:
+            return None
+        parts = node.split('.')
+        if all(part.isdigit() for part in parts):
+            # uid of the node, IP address is kept as is
+            return 'node-{0}'.format(node) if len(parts) == 1 else node
+        return parts[0]
+
+    @classmethod
+    def normalize_time(cls, time):
+        """
+        Convert the record time to the sortable form
+        The time zone is dropped, logs of the snapshot are written
+        in the same time zone.
+        :param time: time string, e.g. '2016-03-01 10:11:12+00:00'
+        :type time: str
+        :return: time in ISO format or None
+        :rtype: str
+        """
+        time = cls.time_zone.sub(
+            '', time.strip().replace(' ', 'T').replace(',', '.'))[0:26]
+        for time_format in (cls.time_format, "%Y-%m-%dT%H:%M:%S",
+                            "%Y-%m-%dT%H:%M", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(time, time_format).strftime(
+                    cls.time_format)
+            except ValueError:
+                continue
+        return None
+
+    def astute_records(self, content, log_name=None):
+        """
+        Convert the Astute log records to the index rows
+        :param content: Astute log or iterable of its lines
+        :type content: str, iter
+        :param log_name: name of the log file, not used
+        :type log_name: str
+        :return: iter of (node, time, level, task, line)
+        """
+        parser = AstuteLog()
+        parser.content = content
+        time = None
+        for record in parser.each_record():
+            match = self.astute_header.match(record)
+            if not match:
+                continue
+            node = self.astute_node.search(record)
+            task = self.astute_task.search(record)
+            # record with broken time is kept in place of the previous one
+            time = self.normalize_time(match.group(1)) or time
+            yield (
+                self.normalize_node(node.group(1) or node.group(2))
+                if node else None,
+                time,
+                self.normalize_level(match.group(2)),
+                (task.group(1) or task.group(2)) if task else None,
+                parser.normalize_record(record[match.end():]).rstrip('\n'),
+            )
+
+    def puppet_records(self, content, log_name):
+        """
+        Convert the Puppet log records to the index rows
+        The task of the record is the last modular task
+        started in this log before the record. Lines without
+        time get the time of the previous record.
+        :param content: Puppet log or iterable of its lines
+        :type content: str, iter
+        :param log_name: name of the log file
+        :type log_name: str
+        :return: iter of (node, time, level, task, line)
+        """
+        node = self.normalize_node(PuppetLog.node_name(log_name))
+        task = None
+        time = None
+        for record in AbstractLog.lines(content):
+            fields = record.split(None, 2)
+            if not fields:
+                continue
+            record_time = self.normalize_time(fields[0])
+            if record_time:
+                time = record_time
+                fields = fields[1:]
+            else:
+                fields = record.split(None, 1)
+            match = self.puppet_task.search(record)
+            if match:
+                task = match.group(1)
+            level = self.normalize_level(fields[0]) if fields else None
+            line = fields[1] if level and len(fields) > 1 else \
+                ' '.join(fields)
+            yield (
+                node,
+                time,
+                level,
+                task,
+                AbstractLog.normalize_record(line).rstrip('\n'),
+            )
+
+    def insert_records(self, snapshot_id, source, log_name, rows):
+        """
+        Insert the rows of the log to the index by batches
+        :param snapshot_id: id of the snapshot in the index
+        :type snapshot_id: int
+        :param source: 'astute' or 'puppet'
+        :type source: str
+        :param log_name: name of the log file
+        :type log_name: str
+        :param rows: iter of (node, time, level, task, line)
+        :return: count of the inserted records
+        :rtype: int
+        """
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append((snapshot_id, source, log_name) + row)
+            if len(batch) >= INDEX_BATCH_SIZE:
+                count += self.insert_batch(batch)
+                batch = []
+        if batch:
+            count += self.insert_batch(batch)
+        return count
+
+    def insert_batch(self, batch):
+        """
+        Insert the records to the index
+        :param batch: list of records
+        :return: count of the inserted records
+        :rtype: int
+        """
+        self.connection.executemany(
+            'INSERT INTO records (snapshot_id, source, log, node, time, '
+            'level, task, line) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', batch)
+        return len(batch)
+
+    def remove_snapshot(self, snapshot_id):
+        """
+        Remove the snapshot records from the index
+        :param snapshot_id: id of the snapshot in the index
+        :type snapshot_id: int
+        :return:
+        """
+        if self.fts:
+            self.connection.execute(
+                'INSERT INTO records_fts (records_fts, rowid, line) '
+                'SELECT \'delete\', id, line FROM records '
+                'WHERE snapshot_id = ?', (snapshot_id,))
+        self.connection.execute(
+            'DELETE FROM records WHERE snapshot_id = ?', (snapshot_id,))
+        self.connection.execute(
+            'DELETE FROM snapshots WHERE id = ?', (snapshot_id,))
+
+    def add_snapshot(self, snapshot):
+        """
+        Index the Astute and Puppet records of the snapshot
+        The archive is read only once, the snapshot is not indexed again
+        if its file is not changed.
+        :param snapshot: path to the snapshot file
+        :type snapshot: str
+        :return: count of the indexed records or None if it is up to date
+        """
+        path = os.path.abspath(snapshot)
+        stat = os.stat(path)
+        row = self.connection.execute(
+            'SELECT id, size, mtime FROM snapshots WHERE path = ?',
+            (path,)).fetchone()
+        if row and row[1] == stat.st_size and row[2] == stat.st_mtime:
+            IO.output('Snapshot is already indexed: %s' % path)
+            return None
+        with self.connection:
+            if row:
+                self.remove_snapshot(row[0])
+            snapshot_id = self.connection.execute(
+                'INSERT INTO snapshots (path, size, mtime) VALUES (?, ?, ?)',
+                (path, stat.st_size, stat.st_mtime)).lastrowid
+            count = 0
+            with tarfile.open(path) as archive:
+                for member in archive:
+                    if not member.isfile():
+                        continue
+                    if member.name.endswith(ASTUTE_LOG):
+                        source, rows = 'astute', self.astute_records
+                    elif member.name.endswith(PUPPET_LOG):
+                        source, rows = 'puppet', self.puppet_records
+                    else:
+                        continue
+                    log = archive.extractfile(member)
+                    try:
+                        count += self.insert_records(
+                            snapshot_id, source, member.name,
+                            rows(log, member.name))
+                    finally:
+                        log.close()
+            if self.fts:
+                self.connection.execute(
+                    'INSERT INTO records_fts (rowid, line) '
+                    'SELECT id, line FROM records WHERE snapshot_id = ?',
+                    (snapshot_id,))
+        IO.output('Indexed %d records of %s' % (count, path))
+        return count
+
+    def query(self, node=None, task=None, levels=None, since=None,
+              until=None, source=None, snapshot=None, match=None,
+              limit=None):
+        """
+        Find the indexed records sorted by time
+        :param node: node name, FQDN or id
+        :type node: str
+        :param task: part of the task name
+        :type task: str
+        :param levels: log levels
+        :type levels: list
+        :param since: show records since this time
+        :type since: str
+        :param until: show records before this time
+        :type until: str
+        :param source: 'astute' or 'puppet'
+        :type source: str
+        :param snapshot: part of the snapshot path
+        :type snapshot: str
+        :param match: text to search, the phrase is searched by FTS
+        :type match: str
+        :param limit: max count of records
+        :type limit: int
+        :return: iter of records
+        :rtype: iter
+        """
+        conditions = []
+        params = []
+        if node:
+            # FQDN of Puppet nodes is stored by older versions
+            node = self.normalize_node(node)
+            conditions.append('(records.node = ? OR records.node LIKE ?)')
+            params.extend([node, '{0}.%'.format(node)])
+        if task:
+            conditions.append('records.task LIKE ?')
+            params.append('%{0}%'.format(task))
+        if levels:
+            levels = [self.normalize_level(level) or level
+                      for level in levels]
+            conditions.append('records.level IN ({0})'.format(
+                ', '.join('?' * len(levels))))
+            params.extend(levels)
+        if since:
+            conditions.append('records.time >= ?')
+            params.append(self.normalize_time(since) or since)
+        if until:
+            conditions.append('records.time < ?')
+            params.append(self.normalize_time(until) or until)
+        if source:
+            conditions.append('records.source = ?')
+            params.append(source)
+        if snapshot:
+            conditions.append('snapshots.path LIKE ?')
+            params.append('%{0}%'.format(snapshot))
+        if match and self.fts:
+            conditions.append('records.id IN (SELECT rowid FROM records_fts '
+                              'WHERE records_fts MATCH ?)')
+            # quoted as a phrase: FTS syntax (e.g. "-") is not parsed
+            params.append('"{0}"'.format(match.replace('"', '""')))
+        elif match:
+            conditions.append('records.line LIKE ?')
+            params.append('%{0}%'.format(match))
+        sql = ('SELECT snapshots.path, records.source, records.log, '
+               'records.node, records.time, records.level, records.task, '
+               'records.line FROM records JOIN snapshots '
+               'ON records.snapshot_id = snapshots.id')
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY records.time, records.id'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        columns = ('snapshot', 'source', 'log', 'node', 'time', 'level',
+                   'task', 'line')
+        for row in self.connection.execute(sql, params):
+            yield dict(zip(columns, row))
+
+    @staticmethod
+    def format_record(record):
+        """
+        Format the indexed record for the output
+        :param record: indexed record
+        :type record: dict
+        :return: output line
+        :rtype: str
+        """
+        return '{node} {time} [{level}] {task}: {line}'.format(
+            node=record['node'] or '-',
+            time=record['time'],
+            level=record['level'] or '-',
+            task=record['task'] or '-',
+            line=record['line'])
+
 ##############################################################################
 
 